@@ -0,0 +1,20 @@
+from rest_framework import serializers
+from ..history import audited_models
+
+
+class AuditStateQuerySerializer(serializers.Serializer):
+    entity = serializers.ChoiceField(choices=[])
+    entity_id = serializers.UUIDField()
+    at = serializers.DateTimeField(required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['entity'].choices = sorted(audited_models())
+
+
+class AuditStateSerializer(serializers.Serializer):
+    entity = serializers.CharField()
+    entity_id = serializers.UUIDField()
+    at = serializers.DateTimeField()
+    state = serializers.JSONField()
+    changes_applied = serializers.IntegerField()
@@ -0,0 +1,58 @@
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema, extend_schema_view
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.exceptions import PermissionDenied
+from ...users.models import User
+from ..history import state_at
+from .serializers import AuditStateQuerySerializer, AuditStateSerializer
+
+
+@extend_schema_view(
+    state=extend_schema(tags=['Audit V1']),
+)
+class AuditViewSet(viewsets.GenericViewSet):
+    """
+    Historial de cambios registrado en AuditLog.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = AuditStateSerializer
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='state'
+    )
+    @extend_schema(
+        tags=['Audit V1'],
+        description="State of an audited entity at a point in time (default: now), rebuilt from the "
+                    "closest full snapshot and the changes recorded after it.",
+        parameters=[AuditStateQuerySerializer],
+        responses={200: AuditStateSerializer}
+    )
+    def state(self, request):
+        if request.user.role not in [User.Roles.ADMIN, User.Roles.INTERNAL]:
+            raise PermissionDenied("You do not have permission to access this resource.")
+
+        query = AuditStateQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        at = query.validated_data.get('at') or timezone.now()
+
+        result = state_at(query.validated_data['entity'], query.validated_data['entity_id'], at)
+        if result is None:
+            return Response(
+                {"detail": "No audit history for this entity at the given time."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        state, changes_applied = result
+        serializer = AuditStateSerializer({
+            'entity': query.validated_data['entity'],
+            'entity_id': query.validated_data['entity_id'],
+            'at': at,
+            'state': state,
+            'changes_applied': changes_applied,
+        })
+        return Response(serializer.data, status=status.HTTP_200_OK)
@@ -0,0 +1,48 @@
+"""
+Reconstrucción del estado de una entidad auditada a partir de AuditLog.
+
+El estado en un instante es el último snapshot (is_snapshot) anterior más el
+new_data de cada entrada posterior, en orden de created_at. Funciona con
+ambos formatos de AUDIT_PAYLOAD_MODE: new_data siempre trae los valores
+nuevos de los campos modificados. Las claves que no son campos del modelo
+(p. ej. orders_updated) se ignoran.
+"""
+from django.apps import apps
+from django.utils import timezone
+from .models import AuditLog
+from .tracking import AuditedModel
+
+
+def audited_models():
+    """{entity: modelo} de los modelos que registran cambios en AuditLog."""
+    return {
+        model.audit_entity_name(): model
+        for model in apps.get_models()
+        if issubclass(model, AuditedModel)
+    }
+
+
+def state_at(entity, entity_id, at=None):
+    """
+    Retorna (estado, entradas aplicadas) de la entidad en `at` (por defecto
+    ahora), o None si no hay un snapshot anterior (p. ej. eliminado por la
+    retención de particiones). Los valores son los guardados en JSON.
+    """
+    fields = set(audited_models()[entity].audit_field_names())
+    entries = AuditLog.objects.filter(
+        entity=entity, entity_id=entity_id, created_at__lte=at or timezone.now()
+    )
+
+    snapshot = (
+        entries.filter(is_snapshot=True).order_by('-created_at').values('created_at', 'new_data').first()
+    )
+    if snapshot is None:
+        return None
+
+    state = {name: value for name, value in snapshot['new_data'].items() if name in fields}
+    applied = 0
+    changes = entries.filter(created_at__gt=snapshot['created_at']).order_by('created_at', 'id')
+    for new_data in changes.values_list('new_data', flat=True).iterator():
+        state.update((name, value) for name, value in (new_data or {}).items() if name in fields)
+        applied += 1
+    return state, applied
@@ -0,0 +1,51 @@
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from ... import partitions
+
+
+class Command(BaseCommand):
+    help = "Create upcoming monthly AuditLog partitions and drop (optionally exporting) expired ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead', type=int, default=settings.AUDIT_PARTITIONS_AHEAD_MONTHS,
+            help="Months after the current one that must have a partition."
+        )
+        parser.add_argument(
+            '--retention-months', type=int, default=settings.AUDIT_RETENTION_MONTHS,
+            help="Full months kept before the current one."
+        )
+        parser.add_argument(
+            '--export-dir', default=settings.AUDIT_RETENTION_EXPORT_DIR or None,
+            help="Write expired partitions as CSV (gzip) to this directory before dropping them."
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true', help="Only report what would be created or dropped."
+        )
+
+    def handle(self, *args, **options):
+        if options['months_ahead'] < 0 or options['retention_months'] < 0:
+            raise CommandError("--months-ahead and --retention-months must not be negative.")
+        export_dir = options['export_dir']
+        if export_dir and not os.path.isdir(export_dir):
+            raise CommandError(f"Export directory {export_dir} does not exist.")
+
+        expired = partitions.expired_partitions(options['retention_months'])
+        if options['dry_run']:
+            for month in partitions.missing_partitions(options['months_ahead']):
+                self.stdout.write(f"Would create {partitions.partition_name(month)}")
+            for month in expired:
+                self.stdout.write(f"Would drop {partitions.partition_name(month)}")
+            return
+
+        for month in partitions.ensure_partitions(options['months_ahead']):
+            self.stdout.write(f"Created {partitions.partition_name(month)}")
+        for month in expired:
+            path = partitions.drop_partition(month, export_dir)
+            exported = f" (exported to {path})" if path else ""
+            self.stdout.write(f"Dropped {partitions.partition_name(month)}{exported}")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"AuditLog partitions up to date, {len(expired)} expired dropped.")
+        )
@@ -0,0 +1,15 @@
+from .tracking import current_request
+
+
+class AuditContextMiddleware:
+    """Expone la petición en curso a tracking.record para atribuir los cambios al usuario."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            current_request.reset(token)
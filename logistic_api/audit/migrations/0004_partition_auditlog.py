@@ -0,0 +1,102 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:52
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations
+
+
+# audit_auditlog pasa a estar particionada por mes (ver audit.partitions). La
+# clave primaria debe incluir la columna de partición: (id, created_at). Se
+# crean las particiones de los meses con filas, del actual y de los 3 siguientes.
+PARTITION_SQL = """
+ALTER TABLE audit_auditlog RENAME TO audit_auditlog_unpartitioned;
+
+CREATE TABLE audit_auditlog (
+    id uuid NOT NULL,
+    action varchar(50) NOT NULL,
+    entity varchar(100) NOT NULL,
+    entity_id uuid NOT NULL,
+    old_data jsonb NULL,
+    new_data jsonb NULL,
+    created_at timestamp with time zone NOT NULL,
+    user_id uuid NULL,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE audit_auditlog_default PARTITION OF audit_auditlog DEFAULT;
+
+DO $$
+DECLARE
+    month timestamp;
+BEGIN
+    FOR month IN
+        SELECT generate_series(
+            date_trunc('month', coalesce(
+                (SELECT min(created_at) FROM audit_auditlog_unpartitioned), now()
+            ) AT TIME ZONE 'UTC'),
+            date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months',
+            interval '1 month'
+        )
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF audit_auditlog FOR VALUES FROM (%L) TO (%L)',
+            'audit_auditlog_p' || to_char(month, 'YYYYMM'),
+            month AT TIME ZONE 'UTC',
+            (month + interval '1 month') AT TIME ZONE 'UTC'
+        );
+    END LOOP;
+END $$;
+
+INSERT INTO audit_auditlog (id, action, entity, entity_id, old_data, new_data, created_at, user_id)
+SELECT id, action, entity, entity_id, old_data, new_data, created_at, user_id
+FROM audit_auditlog_unpartitioned;
+
+DROP TABLE audit_auditlog_unpartitioned;
+
+CREATE INDEX audit_audit_entity_8edb54_idx ON audit_auditlog (entity, entity_id);
+CREATE INDEX audit_auditlog_user_id_c1cca96c ON audit_auditlog (user_id);
+ALTER TABLE audit_auditlog ADD CONSTRAINT audit_auditlog_user_id_c1cca96c_fk_users_user_id
+    FOREIGN KEY (user_id) REFERENCES users_user (id) DEFERRABLE INITIALLY DEFERRED;
+"""
+
+UNPARTITION_SQL = """
+ALTER TABLE audit_auditlog RENAME TO audit_auditlog_partitioned;
+
+CREATE TABLE audit_auditlog (
+    id uuid NOT NULL PRIMARY KEY,
+    action varchar(50) NOT NULL,
+    entity varchar(100) NOT NULL,
+    entity_id uuid NOT NULL,
+    old_data jsonb NULL,
+    new_data jsonb NULL,
+    created_at timestamp with time zone NOT NULL,
+    user_id uuid NULL
+);
+
+INSERT INTO audit_auditlog (id, action, entity, entity_id, old_data, new_data, created_at, user_id)
+SELECT id, action, entity, entity_id, old_data, new_data, created_at, user_id
+FROM audit_auditlog_partitioned;
+
+DROP TABLE audit_auditlog_partitioned;
+
+CREATE INDEX audit_audit_entity_8edb54_idx ON audit_auditlog (entity, entity_id);
+CREATE INDEX audit_auditlog_user_id_c1cca96c ON audit_auditlog (user_id);
+ALTER TABLE audit_auditlog ADD CONSTRAINT audit_auditlog_user_id_c1cca96c_fk_users_user_id
+    FOREIGN KEY (user_id) REFERENCES users_user (id) DEFERRABLE INITIALLY DEFERRED;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0003_alter_auditlog_created_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunSQL(PARTITION_SQL, UNPARTITION_SQL),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['created_at'], name='audit_created_at_brin_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0004_partition_auditlog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditlog',
+            name='is_snapshot',
+            field=models.BooleanField(default=False),
+        ),
+    ]
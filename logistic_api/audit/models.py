@@ -1,8 +1,14 @@
 import uuid
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class AuditLog(models.Model):
+    """
+    Tabla particionada por mes de created_at (ver audit.partitions); la clave
+    primaria en la base de datos es (id, created_at).
+    """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
     user = models.ForeignKey(
@@ -18,10 +24,15 @@ class AuditLog(models.Model):
 
     old_data = models.JSONField(null=True, blank=True)
     new_data = models.JSONField(null=True, blank=True)
+    # new_data tiene el estado completo de la entidad (ver audit.tracking)
+    is_snapshot = models.BooleanField(default=False)
 
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Momento del cambio, no de la escritura en lote (ver audit.writer)
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         indexes = [
             models.Index(fields=["entity", "entity_id"]),
+            # Rangos dentro de cada mes; las filas llegan en orden de created_at
+            BrinIndex(fields=["created_at"], name="audit_created_at_brin_idx"),
         ]
\ No newline at end of file
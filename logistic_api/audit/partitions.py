@@ -0,0 +1,141 @@
+"""
+Particiones mensuales de AuditLog (RANGE sobre created_at, meses UTC).
+
+Cada mes es una tabla audit_auditlog_pYYYYMM; la partición DEFAULT recibe las
+filas de meses sin partición, así ninguna escritura falla si el comando de
+mantenimiento no corrió a tiempo. Crear un mes mueve a su partición las filas
+que hubieran caído en DEFAULT.
+
+Eliminar un mes vencido es DETACH + DROP de su tabla: una operación de
+catálogo, sin DELETE ni VACUUM sobre la tabla completa. Opcionalmente se
+exporta antes como CSV comprimido (COPY).
+"""
+import gzip
+import os
+import re
+from datetime import date, datetime, timezone as dt_timezone
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import AuditLog
+
+DEFAULT_SUFFIX = '_default'
+_NAME_RE = re.compile(r'_p(\d{4})(\d{2})$')
+
+
+def month_start(value):
+    """Primer día del mes (UTC) de un datetime o date."""
+    if isinstance(value, datetime):
+        value = value.astimezone(dt_timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _bound(month):
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+
+
+def table_name():
+    return AuditLog._meta.db_table
+
+
+def partition_name(month):
+    return f"{table_name()}_p{month:%Y%m}"
+
+
+def list_partitions():
+    """Meses con partición, {mes: nombre}, según el nombre de cada tabla hija."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            """,
+            [table_name()]
+        )
+        names = [name for name, in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        match = _NAME_RE.search(name)
+        if match and name == partition_name(date(int(match[1]), int(match[2]), 1)):
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+def create_partition(month):
+    """
+    Crea la partición del mes. Las filas de ese mes que estén en DEFAULT se
+    mueven antes de adjuntarla (ATTACH verifica que DEFAULT no las contenga).
+    """
+    quote = connection.ops.quote_name
+    parent = quote(table_name())
+    default = quote(table_name() + DEFAULT_SUFFIX)
+    partition = quote(partition_name(month))
+    start, end = _bound(month), _bound(add_months(month, 1))
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Ninguna fila del mes puede entrar a DEFAULT entre el traslado y el ATTACH
+        cursor.execute(f"LOCK TABLE {default} IN SHARE ROW EXCLUSIVE MODE")
+        cursor.execute(f"CREATE TABLE {partition} (LIKE {parent} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {default} WHERE created_at >= %s AND created_at < %s RETURNING *
+            )
+            INSERT INTO {partition} SELECT * FROM moved
+            """,
+            [start, end]
+        )
+        cursor.execute(
+            f"ALTER TABLE {parent} ATTACH PARTITION {partition} FOR VALUES FROM (%s) TO (%s)",
+            [start, end]
+        )
+
+
+def missing_partitions(months_ahead, now=None):
+    """Meses sin partición entre el actual y los months_ahead siguientes."""
+    current = month_start(now or timezone.now())
+    existing = list_partitions()
+    months = (add_months(current, offset) for offset in range(months_ahead + 1))
+    return [month for month in months if month not in existing]
+
+
+def ensure_partitions(months_ahead, now=None):
+    """Crea las particiones faltantes (ver missing_partitions). Retorna los meses creados."""
+    created = missing_partitions(months_ahead, now)
+    for month in created:
+        create_partition(month)
+    return created
+
+
+def expired_partitions(retention_months, now=None):
+    """Meses cuyas filas son todas anteriores a la ventana de retención."""
+    cutoff = add_months(month_start(now or timezone.now()), -retention_months)
+    return sorted(month for month in list_partitions() if month < cutoff)
+
+
+def export_partition(month, directory):
+    """Escribe la partición en <directory>/<partición>.csv.gz. Retorna la ruta."""
+    path = os.path.join(directory, f"{partition_name(month)}.csv.gz")
+    partition = connection.ops.quote_name(partition_name(month))
+    with gzip.open(path, 'wb') as output, connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {partition} TO STDOUT WITH (FORMAT csv, HEADER)", output)
+    return path
+
+
+def drop_partition(month, export_dir=None):
+    """Exporta (opcional) y elimina la partición del mes. Retorna la ruta exportada o None."""
+    path = export_partition(month, export_dir) if export_dir else None
+
+    quote = connection.ops.quote_name
+    partition = quote(partition_name(month))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {quote(table_name())} DETACH PARTITION {partition}")
+        cursor.execute(f"DROP TABLE {partition}")
+    return path
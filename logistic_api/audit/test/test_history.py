@@ -0,0 +1,102 @@
+import uuid
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+import pytest
+from ...users.models import User
+from ...users.test.factories import UserFactory
+from ...operations.models import OperationStatus
+from ...operations.test.factories import OperationFactory, OperationStatusFactory
+from ...orders.models import Order
+from ...orders.test.factories import OrderFactory
+from .. import history
+from ..models import AuditLog
+from ..writer import get_writer
+
+
+@pytest.mark.django_db
+class TestAuditHistoryTestCase(APITestCase):
+    """
+    Tests diff payloads, periodic snapshots and /audit/state/.
+    """
+
+    def setUp(self):
+        self.user = UserFactory(role=User.Roles.INTERNAL)
+        self.client.force_authenticate(self.user)
+        self.url = reverse('audit-state')
+
+    def save_order(self, order, **values):
+        for name, value in values.items():
+            setattr(order, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+        return timezone.now()
+
+    def test_diff_mode_stores_new_values_and_rebuilds_state_at_any_time(self):
+        with self.settings(AUDIT_PAYLOAD_MODE='diff', AUDIT_SNAPSHOT_INTERVAL=3):
+            new = OrderFactory.build(delivery_address='Av. Larga 1234', notes='x' * 500)
+            created = self.save_order(new)
+            order = Order.objects.get(pk=new.pk)
+            first = self.save_order(order, current_status='Recogido')
+            self.save_order(order, delivery_address='Av. Corta 1')
+            self.save_order(order, current_status='Entregado')
+            get_writer().flush()
+
+        entries = list(AuditLog.objects.filter(entity_id=order.pk).order_by('created_at'))
+        assert [entry.is_snapshot for entry in entries] == [True, False, True, False]
+        assert all(entry.old_data is None for entry in entries)
+        assert entries[1].new_data == {'current_status': 'Recogido'}
+
+        assert history.state_at('order', order.pk, created)[0]['current_status'] is None
+        state, applied = history.state_at('order', order.pk, first)
+        assert (state['current_status'], state['delivery_address']) == ('Recogido', 'Av. Larga 1234')
+        assert applied == 1
+
+        response = self.client.get(self.url, {'entity': 'order', 'entity_id': order.pk})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['state']['current_status'] == 'Entregado'
+        assert response.data['state']['delivery_address'] == 'Av. Corta 1'
+        assert response.data['changes_applied'] == 1
+
+    def test_state_follows_bulk_route_and_status_updates(self):
+        with self.settings(AUDIT_PAYLOAD_MODE='diff', AUDIT_SNAPSHOT_INTERVAL=2):
+            with self.captureOnCommitCallbacks(execute=True):
+                operation = OperationFactory(name='Lima Norte')
+                statuses = [
+                    OperationStatusFactory(operation=operation, name=name, sort_key=n)
+                    for n, name in enumerate(['Recogido', 'Entregado'], start=1)
+                ]
+                orders = [
+                    OrderFactory(
+                        operation=operation, delivery_latitude='-12.050000', delivery_longitude=longitude
+                    )
+                    for longitude in ['-77.01', '-77.02']
+                ]
+                operation.refresh_final_status()
+            # Cada llamada es un UPDATE masivo; las versiones pares son snapshots
+            for start, status_ids in [((-12.05, -77.00), statuses[::-1]), ((-12.05, -77.05), statuses)]:
+                with self.captureOnCommitCallbacks(execute=True):
+                    operation.optimize_route(start=start)
+                    operation.reorder_statuses([status_obj.id for status_obj in status_ids])
+            get_writer().flush()
+
+        # La segunda ruta parte del oeste: el segundo pedido queda primero
+        for order, route_sequence in zip(orders, [2, 1]):
+            state, applied = history.state_at('order', order.pk)
+            assert (state['route_sequence'], applied) == (route_sequence, 1)
+
+        for status_obj in OperationStatus.objects.filter(operation=operation):
+            assert history.state_at('operationstatus', status_obj.pk)[0]['sort_key'] == status_obj.sort_key
+
+        state, applied = history.state_at('operation', operation.pk)
+        assert (state['final_status'], applied) == ('Entregado', 0)
+        snapshots = AuditLog.objects.filter(entity='operation', entity_id=operation.pk, is_snapshot=True)
+        assert snapshots.count() == 3
+
+    def test_get_request_without_history_fails(self):
+        response = self.client.get(self.url, {'entity': 'order', 'entity_id': uuid.uuid4()})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+        response = self.client.get(self.url, {'entity': 'unknown', 'entity_id': uuid.uuid4()})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
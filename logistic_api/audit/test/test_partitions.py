@@ -0,0 +1,56 @@
+import gzip
+import tempfile
+import uuid
+from datetime import date, datetime, timezone as dt_timezone
+from django.core.management import call_command
+from django.db import connection
+from rest_framework.test import APITestCase
+import pytest
+from .. import partitions
+from ..models import AuditLog
+
+
+@pytest.mark.django_db
+class TestAuditPartitionsTestCase(APITestCase):
+    """
+    Tests the monthly AuditLog partitions and the manage_audit_partitions command.
+    """
+
+    def create_entry(self, created_at):
+        return AuditLog.objects.create(
+            action='UPDATE', entity='order', entity_id=uuid.uuid4(), new_data={'notes': 'x'},
+            created_at=created_at
+        )
+
+    def partition_of(self, entry):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT tableoid::regclass::text FROM audit_auditlog WHERE id = %s", [entry.pk])
+            return cursor.fetchone()[0]
+
+    def test_create_partition_moves_rows_from_default(self):
+        entry = self.create_entry(datetime(2020, 1, 15, tzinfo=dt_timezone.utc))
+        assert self.partition_of(entry) == 'audit_auditlog_default'
+
+        partitions.create_partition(date(2020, 1, 1))
+        assert self.partition_of(entry) == 'audit_auditlog_p202001'
+        assert date(2020, 1, 1) in partitions.list_partitions()
+
+    def test_command_creates_upcoming_and_drops_expired_partitions(self):
+        partitions.create_partition(date(2020, 1, 1))
+        old = self.create_entry(datetime(2020, 1, 15, tzinfo=dt_timezone.utc))
+        recent = self.create_entry(datetime.now(dt_timezone.utc))
+
+        # Las FK diferidas de las filas recién insertadas impedirían el DROP dentro de la transacción del test
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        with tempfile.TemporaryDirectory() as export_dir:
+            call_command(
+                'manage_audit_partitions', months_ahead=6, retention_months=12, export_dir=export_dir
+            )
+            with gzip.open(f'{export_dir}/audit_auditlog_p202001.csv.gz', 'rt') as exported:
+                assert str(old.pk) in exported.read()
+
+        existing = partitions.list_partitions()
+        assert date(2020, 1, 1) not in existing
+        assert not partitions.missing_partitions(6)
+        assert list(AuditLog.objects.values_list('id', flat=True)) == [recent.pk]
@@ -0,0 +1,76 @@
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+import pytest
+from ...users.models import User
+from ...users.test.factories import UserFactory
+from ...operations.test.factories import OperationFactory, OperationStatusFactory
+from ...orders.models import Order
+from ...orders.test.factories import OrderFactory
+from ..models import AuditLog
+from ..writer import get_writer
+
+
+@pytest.mark.django_db
+class TestAuditTrackingTestCase(APITestCase):
+    """
+    Tests the AuditLog entries recorded by AuditedModel and bulk operations.
+    """
+
+    def setUp(self):
+        self.user = UserFactory(role=User.Roles.INTERNAL)
+        self.client.force_authenticate(self.user)
+        self.operation = OperationFactory(name='Lima Norte')
+        for n, name in enumerate(['Recogido', 'Entregado'], start=1):
+            OperationStatusFactory(operation=self.operation, name=name, sort_key=n)
+        self.operation.refresh_final_status()
+        self.order = OrderFactory(delivery_address='x', operation=self.operation)
+
+    def test_save_records_changed_fields_after_commit(self):
+        order = Order.objects.get(pk=self.order.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            order.current_status = 'Recogido'
+            order.delivery_address = 'y'
+            order.save()
+            assert get_writer().pending() == 0
+        get_writer().flush()
+
+        entry = AuditLog.objects.get(entity='order', entity_id=order.pk)
+        assert entry.action == 'STATUS_CHANGE'
+        assert entry.old_data == {'current_status': None, 'delivery_address': 'x'}
+        assert entry.new_data == {'current_status': 'Recogido', 'delivery_address': 'y'}
+
+        # Sin cambios no hay entrada, salvo el snapshot de la nueva versión
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+        assert get_writer().pending() == 0
+        with self.settings(AUDIT_SNAPSHOT_INTERVAL=order.version + 1):
+            with self.captureOnCommitCallbacks(execute=True):
+                order.save()
+        get_writer().flush()
+        snapshot = AuditLog.objects.get(entity_id=order.pk, is_snapshot=True)
+        assert snapshot.new_data['delivery_address'] == 'y'
+
+    def test_patch_request_attributes_entry_to_user(self):
+        url = reverse('operation-detail', kwargs={'pk': self.operation.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(url, {'name': 'Lima Sur'}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        get_writer().flush()
+
+        entry = AuditLog.objects.get(entity='operation', entity_id=self.operation.pk)
+        assert (entry.action, entry.user) == ('UPDATE', self.user)
+        assert entry.new_data == {'name': 'Lima Sur'}
+
+    def test_bulk_status_change_records_one_entry_per_order_in_batches(self):
+        Order.objects.bulk_create(OrderFactory.build_batch(3, operation=self.operation))
+        with self.settings(AUDIT_BATCH_SIZE=2), self.captureOnCommitCallbacks(execute=True):
+            assert self.operation.set_orders_status('Recogido') == 4
+            self.operation.name = 'Lima Sur'
+            self.operation.save()
+        # Los 4 pedidos se escribieron al llenarse el lote; el operativo sigue en el buffer
+        assert get_writer().pending() == 1
+
+        entries = AuditLog.objects.filter(entity='order', action='STATUS_CHANGE')
+        assert entries.count() == 4
+        assert {entry.new_data['current_status'] for entry in entries} == {'Recogido'}
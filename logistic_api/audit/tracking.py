@@ -0,0 +1,205 @@
+"""
+Captura de cambios para AuditLog.
+
+- AuditedModel: los save() de instancias registran CREATE, UPDATE o
+  STATUS_CHANGE con los campos que cambiaron. Los valores anteriores se toman
+  de los que trajo la consulta que cargó la instancia, sin consultas
+  adicionales.
+- record_version(), record_rows() y record_created(): para cambios hechos con
+  UPDATE masivos (ver Operation) y bulk_create. Todo UPDATE sobre un modelo
+  auditado que cambie su versión debe registrarse con alguno de ellos, o la
+  versión de snapshot (y el cambio) se perdería.
+
+Formato de los datos según AUDIT_PAYLOAD_MODE:
+
+- 'full': old_data y new_data con los valores anteriores y nuevos de los
+  campos modificados.
+- 'diff': solo new_data, como merge patch (RFC 7396) de los campos
+  modificados; los valores anteriores se obtienen del historial (ver history).
+
+En ambos modos CREATE y una de cada AUDIT_SNAPSHOT_INTERVAL versiones de la
+entidad guardan el estado completo en new_data (is_snapshot), para
+reconstruir el estado sin recorrer todo el historial.
+
+Las entradas se entregan al writer (ver writer) al confirmar la transacción;
+un rollback no deja rastro.
+"""
+import contextvars
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+CREATE = 'CREATE'
+UPDATE = 'UPDATE'
+STATUS_CHANGE = 'STATUS_CHANGE'
+
+FULL = 'full'
+DIFF = 'diff'
+
+# Petición en curso, para atribuir los cambios (ver middleware)
+current_request = contextvars.ContextVar('audit_current_request', default=None)
+
+
+def current_user_id():
+    request = current_request.get()
+    # DRF copia el usuario autenticado (JWT) al HttpRequest
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    return None
+
+
+def stores_old_data():
+    return settings.AUDIT_PAYLOAD_MODE == FULL
+
+
+def is_snapshot_version(version):
+    return version is not None and version % settings.AUDIT_SNAPSHOT_INTERVAL == 0
+
+
+def _entry(entity, entity_id, action, old_data, new_data, user_id, is_snapshot=False):
+    return {
+        'user_id': user_id,
+        'action': action,
+        'entity': entity,
+        'entity_id': entity_id,
+        'old_data': old_data if stores_old_data() else None,
+        'new_data': new_data,
+        'is_snapshot': is_snapshot,
+        'created_at': timezone.now(),
+    }
+
+
+def _enqueue_on_commit(entries):
+    def enqueue():
+        from .writer import get_writer
+        get_writer().enqueue(entries)
+
+    transaction.on_commit(enqueue)
+
+
+def record(entity, entity_id, action, old_data=None, new_data=None, user=None, is_snapshot=False):
+    user_id = user.pk if user is not None else current_user_id()
+    _enqueue_on_commit([_entry(entity, entity_id, action, old_data, new_data, user_id, is_snapshot)])
+
+
+def record_version(model, pk, version, action, old_data=None, new_data=None, user=None):
+    """
+    Registra un UPDATE de una sola fila que la dejó en `version`; se llama
+    después del UPDATE. Si es una versión de snapshot relee la fila completa
+    (una consulta) y la registra aunque no haya cambios, para que ninguna
+    versión de snapshot se omita.
+    """
+    is_snapshot = is_snapshot_version(version)
+    if is_snapshot:
+        row = model.objects.filter(pk=pk).values(*model.audit_field_names()).get()
+        new_data = {**row, **(new_data or {})}
+    elif not new_data:
+        return
+    record(model.audit_entity_name(), pk, action, old_data, new_data, user, is_snapshot)
+
+
+def record_rows(model, rows, fields, action, user=None):
+    """
+    Registra un cambio por fila (dicts con id, version y `fields`, p. ej. las
+    leídas por events.notify) sin valores anteriores. Las filas que llegan a
+    una versión de snapshot se releen completas con una sola consulta.
+    """
+    user_id = user.pk if user is not None else current_user_id()
+    snapshot_ids = [row['id'] for row in rows if is_snapshot_version(row['version'])]
+    snapshots = {}
+    if snapshot_ids:
+        snapshots = {
+            row['id']: row
+            for row in model.objects.filter(pk__in=snapshot_ids).values(*model.audit_field_names())
+        }
+
+    entity = model.audit_entity_name()
+    entries = []
+    for row in rows:
+        state = snapshots.get(row['id'])
+        new_data = state if state is not None else {field: row[field] for field in fields}
+        entries.append(
+            _entry(entity, row['id'], action, None, new_data, user_id, is_snapshot=state is not None)
+        )
+    if entries:
+        _enqueue_on_commit(entries)
+
+
+def record_created(instances):
+    """Registra CREATE para instancias de AuditedModel insertadas con bulk_create."""
+    user_id = current_user_id()
+    entries = [
+        _entry(
+            instance.audit_entity_name(), instance.pk, CREATE, None, instance._audit_values(), user_id, True
+        )
+        for instance in instances
+    ]
+    if entries:
+        _enqueue_on_commit(entries)
+
+
+class AuditedModel(models.Model):
+    # Nombre en AuditLog.entity (por defecto el model_name)
+    audit_entity = None
+    # Cambios en estos campos se registran como STATUS_CHANGE
+    audit_status_fields = ()
+    # Campos que cambian en cada escritura y no aportan al historial
+    audit_ignored_fields = ('updated_at', 'version')
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._audit_loaded = dict(zip(field_names, values))
+        return instance
+
+    @classmethod
+    def audit_entity_name(cls):
+        return cls.audit_entity or cls._meta.model_name
+
+    @classmethod
+    def audit_field_names(cls):
+        """Campos (attname) que forman el estado registrado en AuditLog."""
+        return [
+            field.attname for field in cls._meta.concrete_fields
+            if field.attname not in cls.audit_ignored_fields
+        ]
+
+    def _audit_values(self):
+        # Los campos diferidos no se leen: sería una consulta por campo
+        deferred = self.get_deferred_fields()
+        return {name: getattr(self, name) for name in self.audit_field_names() if name not in deferred}
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+
+        current = self._audit_values()
+        loaded = getattr(self, '_audit_loaded', None)
+        complete = len(current) == len(self.audit_field_names())
+        if adding or loaded is None:
+            action, old_data, new_data, is_snapshot = CREATE if adding else UPDATE, None, current, complete
+        else:
+            changed = [name for name, value in current.items() if name in loaded and loaded[name] != value]
+            if not changed:
+                # VersionedModel suma 1 a version igual: esa versión no puede quedar sin su snapshot
+                version = getattr(self, 'version', None)
+                if is_snapshot_version(version):
+                    if complete:
+                        record(self.audit_entity_name(), self.pk, UPDATE, None, current, is_snapshot=True)
+                    else:
+                        record_version(type(self), self.pk, version, UPDATE)
+                return
+            old_data = {name: loaded[name] for name in changed}
+            status_changed = any(
+                self._meta.get_field(name).attname in changed for name in self.audit_status_fields
+            )
+            action = STATUS_CHANGE if status_changed else UPDATE
+            is_snapshot = complete and is_snapshot_version(getattr(self, 'version', None))
+            new_data = current if is_snapshot else {name: current[name] for name in changed}
+
+        record(self.audit_entity_name(), self.pk, action, old_data, new_data, is_snapshot=is_snapshot)
+        self._audit_loaded = {**(loaded or {}), **current}
@@ -0,0 +1,7 @@
+from rest_framework.routers import DefaultRouter
+from .api.views import AuditViewSet
+
+router = DefaultRouter()
+router.register('audit', AuditViewSet, basename='audit')
+
+urlpatterns = router.urls
@@ -0,0 +1,159 @@
+"""
+Escritura diferida de AuditLog.
+
+Las entradas se registran al confirmar la transacción (ver tracking.record) y
+se acumulan en memoria del proceso; agregarlas no toca la base de datos. Se
+escriben con bulk_create por lotes de AUDIT_BATCH_SIZE:
+
+- AuditWriter: solo cuando el lote se llena o al llamar flush(). Es el que se
+  usa en los tests, para escribir en la conexión del test.
+- BackgroundAuditWriter: un hilo por proceso escribe cuando el lote se llena
+  o cada AUDIT_FLUSH_INTERVAL_SECONDS, fuera del camino de la petición.
+
+Si la escritura falla, el lote vuelve al buffer, que se limita a
+AUDIT_BUFFER_MAX_SIZE entradas (se descartan las más antiguas); los lotes
+que violan restricciones se descartan.
+"""
+import atexit
+import json
+import logging
+import threading
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, close_old_connections, connection
+from django.utils.module_loading import import_string
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+def _as_json(data):
+    # UUID, Decimal y datetime a sus formas JSON, como los guarda JSONField
+    return json.loads(json.dumps(data, cls=DjangoJSONEncoder)) if data is not None else None
+
+
+class AuditWriter:
+    def __init__(self):
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def enqueue(self, entries):
+        """Agrega entradas (dicts con los campos de AuditLog) al buffer."""
+        with self._lock:
+            self._buffer.extend(entries)
+            full = len(self._buffer) >= settings.AUDIT_BATCH_SIZE
+        if full:
+            self.batch_full()
+
+    def batch_full(self):
+        self.flush()
+
+    def clear(self):
+        """Descarta las entradas pendientes."""
+        with self._lock:
+            self._buffer = []
+
+    def pending(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self):
+        """Escribe todo el buffer. Retorna la cantidad de entradas escritas."""
+        with self._flush_lock:
+            with self._lock:
+                entries, self._buffer = self._buffer, []
+            written = 0
+            batch_size = settings.AUDIT_BATCH_SIZE
+            for start in range(0, len(entries), batch_size):
+                batch = entries[start:start + batch_size]
+                try:
+                    AuditLog.objects.bulk_create([
+                        AuditLog(
+                            user_id=entry['user_id'],
+                            action=entry['action'],
+                            entity=entry['entity'],
+                            entity_id=entry['entity_id'],
+                            old_data=_as_json(entry['old_data']),
+                            new_data=_as_json(entry['new_data']),
+                            is_snapshot=entry['is_snapshot'],
+                            created_at=entry['created_at'],
+                        )
+                        for entry in batch
+                    ])
+                except IntegrityError:
+                    # Reintentar no lo arregla (p. ej. un usuario eliminado entretanto)
+                    logger.exception("Dropping %s audit entries that cannot be written.", len(batch))
+                    continue
+                except Exception:
+                    logger.exception(
+                        "Could not write %s audit entries, keeping them for the next flush.", len(batch)
+                    )
+                    self._requeue(entries[start:])
+                    raise
+                written += len(batch)
+            return written
+
+    def _requeue(self, entries):
+        with self._lock:
+            self._buffer[:0] = entries
+            overflow = len(self._buffer) - settings.AUDIT_BUFFER_MAX_SIZE
+            if overflow > 0:
+                logger.error("Audit buffer full, dropping the %s oldest entries.", overflow)
+                del self._buffer[:overflow]
+
+
+class BackgroundAuditWriter(AuditWriter):
+    def __init__(self):
+        super().__init__()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        atexit.register(self._flush_at_exit)
+
+    def enqueue(self, entries):
+        self._ensure_thread()
+        super().enqueue(entries)
+
+    def batch_full(self):
+        self._wakeup.set()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(settings.AUDIT_FLUSH_INTERVAL_SECONDS)
+            self._wakeup.clear()
+            if not self.pending():
+                continue
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                # La conexión puede haber quedado inservible; se reabre en el próximo intento
+                connection.close()
+
+    def _flush_at_exit(self):
+        if self.pending():
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer():
+    path = settings.AUDIT_WRITER
+    with _writers_lock:
+        if path not in _writers:
+            _writers[path] = import_string(path)()
+        return _writers[path]
@@ -0,0 +1,46 @@
+"""
+Control de concurrencia optimista.
+
+Los modelos versionados guardan un contador `version`. Cada save() de una
+fila existente se ejecuta como UPDATE ... WHERE id = %s AND version = %s y
+suma 1 a version; si otra escritura ganó, ninguna fila coincide y se lanza
+VersionConflict en lugar de sobrescribirla. Los UPDATE masivos sobre estos
+modelos deben incluir version=F('version') + 1 (ver bump_version).
+
+En la API, el cliente envía la versión que leyó en If-Match (el ETag de la
+respuesta o el campo version); ver mixins.OptimisticConcurrencyMixin.
+"""
+from django.db import models
+
+
+class VersionConflict(Exception):
+    pass
+
+
+def bump_version():
+    return models.F('version') + 1
+
+
+class VersionedModel(models.Model):
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def _do_update(self, base_qs, using, pk_val, values, *args, **kwargs):
+        # UPDATE de save(): condicionado a la versión leída y con version + 1
+        expected = self.version
+        values = [
+            (field, model, bump_version() if field.attname == 'version' else value)
+            for field, model, value in values
+        ]
+        if not any(field.attname == 'version' for field, _, _ in values):
+            # save(update_fields=[...]) sin version
+            values.append((self._meta.get_field('version'), None, bump_version()))
+
+        updated = super()._do_update(base_qs.filter(version=expected), using, pk_val, values, *args, **kwargs)
+        if not updated and base_qs.filter(pk=pk_val).exists():
+            raise VersionConflict(f"{self._meta.object_name} {pk_val} was modified concurrently.")
+        if updated:
+            self.version = expected + 1
+        return updated
@@ -15,6 +15,7 @@ class Common(Configuration):
         'django.contrib.sessions',
         'django.contrib.messages',
         'django.contrib.staticfiles',
+        'django.contrib.postgres',
 
 
         # Third party apps
@@ -28,7 +29,10 @@ class Common(Configuration):
         'logistic_api.audit',
         'logistic_api.operations',
         'logistic_api.orders',
-        'logistic_api.profile'
+        'logistic_api.profile',
+        'logistic_api.reports',
+        'logistic_api.idempotency',
+        'logistic_api.events',
     )
 
     # https://docs.djangoproject.com/en/2.0/topics/http/middleware/
@@ -41,8 +45,9 @@ class Common(Configuration):
         'django.contrib.auth.middleware.AuthenticationMiddleware',
         'django.contrib.messages.middleware.MessageMiddleware',
         'django.middleware.clickjacking.XFrameOptionsMiddleware',
+        'logistic_api.audit.middleware.AuditContextMiddleware',
     )
-    
+
     # CORS settings
     CORS_ALLOW_ALL_ORIGINS = True
     CORS_ALLOW_CREDENTIALS = True
@@ -227,6 +232,59 @@ class Common(Configuration):
         'SIGNING_KEY': 'settings.SECRET_KEY'
     }
 
+    # Orders
+    # Tamaño máximo de un lote en POST /orders/bulk/ y filas por INSERT
+    ORDERS_BULK_MAX_SIZE = int(os.getenv('ORDERS_BULK_MAX_SIZE', 20000))
+    ORDERS_BULK_BATCH_SIZE = int(os.getenv('ORDERS_BULK_BATCH_SIZE', 1000))
+    # Filas por FETCH del cursor de servidor en GET /orders/export/
+    ORDERS_EXPORT_CHUNK_SIZE = int(os.getenv('ORDERS_EXPORT_CHUNK_SIZE', 2000))
+    # Prefijo de los order_number asignados por el servidor a clientes sin prefijo propio
+    ORDERS_NUMBER_DEFAULT_PREFIX = os.getenv('ORDERS_NUMBER_DEFAULT_PREFIX', 'ORD')
+
+    # Operations
+    # Máximo de order_ids por creación/edición de operativo y pedidos por UPDATE al asignarlos
+    OPERATIONS_ORDER_IDS_MAX_SIZE = int(os.getenv('OPERATIONS_ORDER_IDS_MAX_SIZE', 50000))
+    OPERATIONS_ASSIGN_CHUNK_SIZE = int(os.getenv('OPERATIONS_ASSIGN_CHUNK_SIZE', 1000))
+
+    # Idempotency
+    # Horas durante las que un Idempotency-Key reproduce la respuesta almacenada
+    IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_KEY_TTL_HOURS', 24))
+    # Segundos tras los que una petición con la clave sin terminar se da por abandonada
+    IDEMPOTENCY_PENDING_TIMEOUT_SECONDS = int(os.getenv('IDEMPOTENCY_PENDING_TIMEOUT_SECONDS', 300))
+
+    # Audit
+    # AuditLog se escribe en lotes desde memoria: al llenarse AUDIT_BATCH_SIZE
+    # entradas o cada AUDIT_FLUSH_INTERVAL_SECONDS (ver audit.writer)
+    AUDIT_WRITER = os.getenv('AUDIT_WRITER', 'logistic_api.audit.writer.BackgroundAuditWriter')
+    AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', 500))
+    AUDIT_FLUSH_INTERVAL_SECONDS = float(os.getenv('AUDIT_FLUSH_INTERVAL_SECONDS', 2))
+    AUDIT_BUFFER_MAX_SIZE = int(os.getenv('AUDIT_BUFFER_MAX_SIZE', 50000))
+    # 'full': valores anteriores y nuevos de los campos modificados; 'diff': solo
+    # los nuevos (merge patch). Cada AUDIT_SNAPSHOT_INTERVAL versiones de una
+    # entidad se guarda su estado completo (ver audit.tracking y audit.history)
+    AUDIT_PAYLOAD_MODE = os.getenv('AUDIT_PAYLOAD_MODE', 'full')
+    AUDIT_SNAPSHOT_INTERVAL = int(os.getenv('AUDIT_SNAPSHOT_INTERVAL', 20))
+    # Particiones mensuales (manage_audit_partitions): meses creados por
+    # adelantado, meses conservados y carpeta donde exportar los vencidos antes
+    # de eliminarlos (vacío: se eliminan sin exportar)
+    AUDIT_PARTITIONS_AHEAD_MONTHS = int(os.getenv('AUDIT_PARTITIONS_AHEAD_MONTHS', 3))
+    AUDIT_RETENTION_MONTHS = int(os.getenv('AUDIT_RETENTION_MONTHS', 12))
+    AUDIT_RETENTION_EXPORT_DIR = os.getenv('AUDIT_RETENTION_EXPORT_DIR', '')
+
+    # Events (GET /orders/events/)
+    # LocalBroker solo entrega eventos dentro del mismo proceso; con varios
+    # workers usar logistic_api.events.brokers.PostgresBroker (LISTEN/NOTIFY)
+    EVENTS_BROKER = os.getenv('EVENTS_BROKER', 'logistic_api.events.brokers.LocalBroker')
+    # Eventos recientes por proceso disponibles para reanudar con Last-Event-ID
+    EVENTS_BUFFER_SIZE = int(os.getenv('EVENTS_BUFFER_SIZE', 5000))
+    EVENTS_HEARTBEAT_SECONDS = float(os.getenv('EVENTS_HEARTBEAT_SECONDS', 15))
+    # Duración máxima de una conexión; el cliente se reconecta con Last-Event-ID.
+    # Cada stream ocupa un hilo del worker (gthread, --threads 32 en el
+    # Procfile) durante todo ese tiempo: 32 clientes conectados a un worker lo
+    # dejan sin hilos para el resto de la API. Escalar workers según los
+    # clientes de /orders/events/ o atenderlos con un proceso propio.
+    EVENTS_STREAM_TIMEOUT_SECONDS = float(os.getenv('EVENTS_STREAM_TIMEOUT_SECONDS', 300))
+
     SPECTACULAR_SETTINGS = {
         'TITLE': 'Logistic API',
         'DESCRIPTION': 'Documentation of the API',
@@ -30,3 +30,6 @@ class Production(Common):
     AWS_HEADERS = {
         'Cache-Control': 'max-age=86400, s-maxage=86400, must-revalidate',
     }
+
+    # Varios workers de gunicorn: los eventos se reparten con LISTEN/NOTIFY
+    EVENTS_BROKER = os.getenv('EVENTS_BROKER', 'logistic_api.events.brokers.PostgresBroker')
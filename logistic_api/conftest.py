@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def synchronous_audit_writer(settings):
+    # Sin hilo de escritura: las entradas se escriben en la conexión del test al llamar flush()
+    settings.AUDIT_WRITER = 'logistic_api.audit.writer.AuditWriter'
+    yield
+    from logistic_api.audit.writer import get_writer
+    get_writer().clear()
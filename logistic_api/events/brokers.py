@@ -0,0 +1,222 @@
+"""
+Brokers de eventos para el stream SSE.
+
+Cada proceso guarda los últimos EVENTS_BUFFER_SIZE eventos en memoria. El id
+de cada evento (el que ve el cliente como Last-Event-ID) es creciente y lo
+asigna el broker al publicar, de modo que un cliente puede reanudar en
+cualquier proceso que tenga ese id en su buffer; si no lo tiene (eventos que
+ya salieron del buffer, o anteriores a que el proceso empezara a escuchar) el
+cliente recibe un evento `reset` en lugar de un hueco silencioso.
+
+- LocalBroker: solo en memoria, para tests y un único proceso; los ids son
+  un contador del proceso.
+- PostgresBroker: los ids salen de la secuencia events_event_id_seq y viajan
+  en el payload de NOTIFY; cada proceso escucha con LISTEN en un hilo propio,
+  por lo que todos los workers reciben todos los eventos con los mismos ids
+  sin dependencias nuevas.
+"""
+import json
+import logging
+import select
+import threading
+import time
+from collections import deque, namedtuple
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# type: p. ej. 'order.status'; data: lo que recibe el cliente;
+# scope: a quién se entrega (client_id, driver_user_id), ver events.notify
+Event = namedtuple('Event', ['seq', 'type', 'data', 'scope'])
+
+
+class LocalBroker:
+    def __init__(self, buffer_size=None):
+        self._events = deque(maxlen=buffer_size or settings.EVENTS_BUFFER_SIZE)
+        # Id del último evento recibido; los ids <= _floor ya no están en el buffer
+        self._seq = 0
+        self._floor = 0
+        self._condition = threading.Condition()
+
+    def publish(self, messages):
+        """Publica una lista de mensajes {'type', 'data', 'scope'}."""
+        with self._condition:
+            self._append([
+                Event(self._seq + n, message['type'], message['data'], message['scope'])
+                for n, message in enumerate(messages, start=1)
+            ])
+
+    def _append(self, events):
+        with self._condition:
+            for event in events:
+                # Repetidos o anteriores a la posición inicial del proceso
+                if event.seq <= self._seq:
+                    continue
+                if len(self._events) == self._events.maxlen:
+                    self._floor = self._events[0].seq
+                self._events.append(event)
+                self._seq = event.seq
+            self._condition.notify_all()
+
+    def _reset(self, seq):
+        """Vacía el buffer y se posiciona en `seq`: solo se puede reanudar desde ahí."""
+        with self._condition:
+            self._events.clear()
+            self._seq = self._floor = seq
+            self._condition.notify_all()
+
+    def _last_published_id(self):
+        return self._seq
+
+    def event_id(self, event):
+        return str(event.seq)
+
+    def cursor(self, last_event_id=None):
+        """
+        Posición desde la que leer. Retorna (cursor, reanudado): reanudado es
+        False si last_event_id no se puede continuar (eventos que ya salieron
+        del buffer, o un id que no se publicó), en cuyo caso se lee desde ahora.
+        """
+        with self._condition:
+            current, floor = self._seq, self._floor
+        if not last_event_id:
+            return current, True
+        if not last_event_id.isdigit():
+            return current, False
+        seq = int(last_event_id)
+        # Un id posterior al último recibido puede venir de otro proceso que
+        # recibió el evento antes que este
+        if seq < floor or (seq > current and seq > self._last_published_id()):
+            return current, False
+        return seq, True
+
+    def wait(self, cursor, timeout):
+        """
+        Espera hasta `timeout` segundos eventos posteriores a cursor.
+        Retorna (eventos, cursor); eventos es None si el lector se quedó atrás
+        del buffer y perdió eventos.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._seq > cursor, timeout)
+            if self._seq <= cursor:
+                return [], cursor
+            if cursor < self._floor:
+                return None, self._seq
+            # Los ids son crecientes pero pueden tener huecos (ver PostgresBroker)
+            events = []
+            for event in reversed(self._events):
+                if event.seq <= cursor:
+                    break
+                events.append(event)
+            events.reverse()
+            return events, self._seq
+
+
+class PostgresBroker(LocalBroker):
+    channel = 'logistic_api_events'
+    sequence = 'events_event_id_seq'
+    # Margen bajo el límite de 8000 bytes de un payload de NOTIFY
+    max_payload = 7000
+    # Segundos que cursor() espera a que el hilo de LISTEN fije la posición inicial
+    listen_timeout = 5
+
+    def __init__(self, buffer_size=None):
+        super().__init__(buffer_size)
+        self._listener = None
+        self._listener_lock = threading.Lock()
+        self._listening = threading.Event()
+
+    def publish(self, messages):
+        if not messages:
+            return
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Serializa a los publicadores hasta el COMMIT, que es cuando se
+            # entregan los NOTIFY: así llegan a cada proceso en el orden de sus
+            # ids. Un id tomado por una publicación que falla queda como hueco.
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [self.channel])
+            cursor.execute("SELECT nextval(%s) FROM generate_series(1, %s)", [self.sequence, len(messages)])
+            ids = sorted(seq for seq, in cursor.fetchall())
+
+            payloads, batch, size = [], [], 0
+            for seq, message in zip(ids, messages):
+                encoded = json.dumps({**message, 'id': seq}, cls=DjangoJSONEncoder)
+                if batch and size + len(encoded) > self.max_payload:
+                    payloads.append(f"[{','.join(batch)}]")
+                    batch, size = [], 0
+                batch.append(encoded)
+                size += len(encoded) + 1
+            if batch:
+                payloads.append(f"[{','.join(batch)}]")
+
+            cursor.execute(
+                "SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload",
+                [self.channel, payloads]
+            )
+
+    def _last_published_id(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM {self.sequence}")
+            return cursor.fetchone()[0]
+
+    def cursor(self, last_event_id=None):
+        self._ensure_listener()
+        return super().cursor(last_event_id)
+
+    def _ensure_listener(self):
+        with self._listener_lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='events-listener', daemon=True)
+                self._listener.start()
+        self._listening.wait(self.listen_timeout)
+
+    def _listen(self):
+        wrapper = connections['default']
+        while True:
+            listener = None
+            try:
+                listener = wrapper.get_new_connection(wrapper.get_connection_params())
+                listener.autocommit = True
+                with listener.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.channel}")
+                    # Los eventos con id posterior llegan por NOTIFY; los
+                    # anteriores a este punto no se pueden entregar
+                    cursor.execute(
+                        f"SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM {self.sequence}"
+                    )
+                    self._reset(cursor.fetchone()[0])
+                self._listening.set()
+                while True:
+                    if select.select([listener], [], [], 5) == ([], [], []):
+                        continue
+                    listener.poll()
+                    messages = []
+                    while listener.notifies:
+                        messages.extend(json.loads(listener.notifies.pop(0).payload))
+                    if messages:
+                        self._append([
+                            Event(message['id'], message['type'], message['data'], message['scope'])
+                            for message in messages
+                        ])
+            except Exception:
+                # Los eventos emitidos mientras no hay conexión se pierden; al
+                # reconectar el buffer se vacía y los clientes que reanuden
+                # con un id anterior reciben `reset`
+                logger.exception("Event listener connection lost, reconnecting.")
+                if listener is not None:
+                    listener.close()
+                time.sleep(1)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(settings.EVENTS_BROKER)()
+        return _broker
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    # Ids globales de los eventos SSE (ver events.brokers.PostgresBroker)
+    operations = [
+        migrations.RunSQL(
+            "CREATE SEQUENCE events_event_id_seq",
+            "DROP SEQUENCE events_event_id_seq",
+        ),
+    ]
@@ -0,0 +1,70 @@
+"""
+Publicación de cambios de pedidos y operativos en el stream de eventos.
+
+Los cambios se leen con una consulta por llamada (sin importar la cantidad de
+pedidos) y se publican al confirmar la transacción, así un rollback no emite
+eventos.
+"""
+from django.db import transaction
+from .brokers import get_broker
+
+ORDER_STATUS = 'order.status'
+ORDER_ASSIGNMENT = 'order.assignment'
+OPERATION_UPDATED = 'operation.updated'
+
+ORDER_FIELDS = (
+    'id', 'order_number', 'client_id', 'operation_id', 'operation__driver__user_id',
+    'current_status', 'finalized_at', 'is_active', 'version', 'updated_at',
+)
+
+
+def publish(messages):
+    if messages:
+        transaction.on_commit(lambda: get_broker().publish(messages))
+
+
+def _str_or_none(value):
+    return str(value) if value is not None else None
+
+
+def orders_changed(orders, event_type):
+    """
+    Publica un evento por cada pedido del queryset, con sus valores actuales.
+    Retorna las filas leídas.
+    """
+    rows = list(orders.values(*ORDER_FIELDS))
+    messages = []
+    for row in rows:
+        driver_user_id = row.pop('operation__driver__user_id')
+        messages.append({
+            'type': event_type,
+            'data': row,
+            'scope': {
+                'client_id': _str_or_none(row['client_id']),
+                'driver_user_id': _str_or_none(driver_user_id),
+            },
+        })
+    publish(messages)
+    return rows
+
+
+def operation_changed(operation):
+    """Publica el estado actual del operativo (solo para staff y su conductor)."""
+    driver = operation.driver
+    publish([{
+        'type': OPERATION_UPDATED,
+        'data': {
+            'id': operation.id,
+            'name': operation.name,
+            'driver_id': operation.driver_id,
+            'final_status': operation.final_status,
+            'is_active': operation.is_active,
+            'is_finalized': operation.is_finalized,
+            'version': operation.version,
+            'updated_at': operation.updated_at,
+        },
+        'scope': {
+            'client_id': None,
+            'driver_user_id': _str_or_none(driver.user_id if driver else None),
+        },
+    }])
@@ -0,0 +1,75 @@
+"""
+Formato Server-Sent Events sobre un broker (ver events.brokers).
+
+La conexión se cierra tras EVENTS_STREAM_TIMEOUT_SECONDS; EventSource se
+reconecta solo y envía Last-Event-ID, así ningún worker queda ocupado
+indefinidamente y no se pierden eventos entre conexiones. Mientras dura, la
+conexión ocupa un hilo del worker (ver EVENTS_STREAM_TIMEOUT_SECONDS).
+"""
+import json
+import time
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+RESET = 'reset'
+# Milisegundos que espera EventSource antes de reconectarse
+RETRY_MS = 3000
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Permite negociar text/event-stream; los errores se envían como JSON."""
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+def format_event(event_type, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, cls=DjangoJSONEncoder)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def matches(event, scope):
+    """scope None entrega todo; si no, cada clave debe coincidir con la del evento."""
+    return scope is None or all(event.scope.get(key) == value for key, value in scope.items())
+
+
+def event_stream(broker, scope, last_event_id=None):
+    """
+    Generador SSE con los eventos visibles para `scope`. Se posiciona al
+    crearse (no al empezar a iterar), así los eventos publicados entre la
+    petición y la primera lectura no se pierden.
+    """
+    cursor, resumed = broker.cursor(last_event_id)
+
+    def generate(cursor):
+        yield f"retry: {RETRY_MS}\n\n"
+        if not resumed:
+            # El cliente debe recargar por REST: no se puede reanudar desde su id
+            yield format_event(RESET, {'detail': "Cannot resume from Last-Event-ID."})
+
+        deadline = time.monotonic() + settings.EVENTS_STREAM_TIMEOUT_SECONDS
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            events, cursor = broker.wait(cursor, min(settings.EVENTS_HEARTBEAT_SECONDS, remaining))
+            if events is None:
+                yield format_event(RESET, {'detail': "Events were dropped, reload."})
+                continue
+
+            chunk = ''.join(
+                format_event(event.type, event.data, broker.event_id(event))
+                for event in events if matches(event, scope)
+            )
+            # Comentario de keepalive para que proxies no cierren la conexión
+            yield chunk or ": keepalive\n\n"
+
+    return generate(cursor)
@@ -0,0 +1,31 @@
+from rest_framework.test import APITransactionTestCase
+import pytest
+from ..brokers import PostgresBroker
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPostgresBrokerTestCase(APITransactionTestCase):
+    """
+    Tests event ids shared by every process through PostgresBroker.
+    """
+
+    def test_event_ids_resume_across_processes(self):
+        # Dos brokers con su propio LISTEN, como dos workers; NOTIFY requiere COMMIT
+        publisher, other = PostgresBroker(), PostgresBroker()
+        publisher_cursor, _ = publisher.cursor()
+        other_cursor, _ = other.cursor()
+
+        publisher.publish([{'type': 'order.status', 'data': {'n': n}, 'scope': {}} for n in range(3)])
+        published, _ = publisher.wait(publisher_cursor, 5)
+        received, _ = other.wait(other_cursor, 5)
+        assert [event.seq for event in published] == [event.seq for event in received]
+        assert [event.data['n'] for event in received] == [0, 1, 2]
+
+        # Un id visto en un proceso se reanuda en el otro
+        cursor, resumed = other.cursor(publisher.event_id(published[0]))
+        assert resumed
+        assert [event.data['n'] for event in other.wait(cursor, 0)[0]] == [1, 2]
+
+        # Ids anteriores a que el proceso empezara a escuchar, o ajenos, no se reanudan
+        assert not PostgresBroker().cursor(str(published[0].seq))[1]
+        assert not other.cursor('unknown-1')[1]
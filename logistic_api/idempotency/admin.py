@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import IdempotencyKey
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('key', 'user', 'method', 'path', 'response_status', 'created_at', 'expires_at')
+    search_fields = ('key', 'user__email', 'path')
+    list_filter = ('method', 'response_status')
+    readonly_fields = ('id', 'created_at')
+    ordering = ['-created_at']
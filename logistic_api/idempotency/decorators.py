@@ -0,0 +1,132 @@
+"""
+Soporte del header Idempotency-Key en acciones de creación.
+
+La clave se reserva confirmando una fila pendiente (response_status = 0) en
+una transacción corta; la vista se ejecuta después, fuera de ella, para no
+convertir sus propias transacciones en savepoints que retengan bloqueos hasta
+el final de la petición (p. ej. Operation.assign_orders). Al terminar se
+guarda la respuesta, o se elimina la fila si la creación falló.
+
+Un reintento mientras la primera petición sigue en curso recibe 409; una
+reserva pendiente más antigua que IDEMPOTENCY_PENDING_TIMEOUT_SECONDS se
+considera abandonada (p. ej. el worker murió) y se reemplaza.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import status
+from rest_framework.response import Response
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+IDEMPOTENCY_KEY_PARAMETER = OpenApiParameter(
+    name=IDEMPOTENCY_HEADER,
+    type=str,
+    location=OpenApiParameter.HEADER,
+    required=False,
+    description="Unique key for this creation. Retries with the same key within "
+                f"{settings.IDEMPOTENCY_KEY_TTL_HOURS}h replay the stored response."
+)
+
+
+def request_fingerprint(request):
+    payload = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(f"{request.method} {request.path}\n{payload}".encode()).hexdigest()
+
+
+def replay(stored, fingerprint):
+    if stored.fingerprint != fingerprint:
+        return Response(
+            {"detail": f"{IDEMPOTENCY_HEADER} was already used for a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    if stored.response_status == IdempotencyKey.PENDING:
+        return Response(
+            {"detail": f"A request with this {IDEMPOTENCY_HEADER} is still in progress."},
+            status=status.HTTP_409_CONFLICT
+        )
+    response = Response(stored.response_body, status=stored.response_status)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def reserve(request, key, fingerprint):
+    """
+    Confirma la fila pendiente de la clave. Retorna (fila, None) o, si la
+    clave ya está en uso, (None, respuesta para el cliente).
+    """
+    user = request.user
+    now = timezone.now()
+    abandoned_before = now - timedelta(seconds=settings.IDEMPOTENCY_PENDING_TIMEOUT_SECONDS)
+    record = IdempotencyKey(
+        user=user,
+        key=key,
+        method=request.method,
+        path=request.path[:255],
+        fingerprint=fingerprint,
+        response_status=IdempotencyKey.PENDING,
+        expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+    )
+    try:
+        with transaction.atomic():
+            expired = models.Q(expires_at__lte=now)
+            abandoned = models.Q(response_status=IdempotencyKey.PENDING, created_at__lt=abandoned_before)
+            IdempotencyKey.objects.filter(user=user, key=key).filter(expired | abandoned).delete()
+            record.save(force_insert=True)
+    except IntegrityError:
+        # Otra petición con la misma clave la reservó primero
+        return None, replay(IdempotencyKey.objects.get(user=user, key=key), fingerprint)
+    return record, None
+
+
+def idempotent(view_method):
+    """
+    Decora un método create de un viewset. Sin el header se comporta igual;
+    con el header, solo las respuestas 2xx se almacenan para reintentos.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response(
+                {"detail": f"{IDEMPOTENCY_HEADER} must be at most 255 characters."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fingerprint = request_fingerprint(request)
+
+        # Reintento habitual: una búsqueda por el índice único
+        stored = IdempotencyKey.objects.filter(
+            user=request.user, key=key, expires_at__gt=timezone.now()
+        ).first()
+        if stored is not None and not stored.is_abandoned():
+            return replay(stored, fingerprint)
+
+        record, conflict = reserve(request, key, fingerprint)
+        if conflict is not None:
+            return conflict
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except BaseException:
+            record.delete()
+            raise
+        if not status.is_success(response.status_code):
+            record.delete()
+            return response
+
+        record.response_status = response.status_code
+        record.response_body = response.data
+        record.save(update_fields=['response_status', 'response_body'])
+        return response
+
+    return wrapper
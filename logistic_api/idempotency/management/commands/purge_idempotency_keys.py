@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from ...models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete expired idempotency keys, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help="Keys deleted per statement.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+
+        now = timezone.now()
+        total = 0
+        while True:
+            # Lotes acotados por el índice de expires_at para no bloquear la tabla
+            batch = IdempotencyKey.objects.filter(expires_at__lte=now).values('id')[:options['batch_size']]
+            deleted, _ = IdempotencyKey.objects.filter(id__in=batch).delete()
+            if not deleted:
+                break
+            total += deleted
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {total} expired idempotency keys."))
@@ -0,0 +1,48 @@
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class IdempotencyKey(models.Model):
+    """
+    Respuesta almacenada de una creación enviada con el header Idempotency-Key.
+    Los reintentos con la misma clave (del mismo usuario) dentro del TTL
+    reciben esta respuesta sin volver a ejecutar la creación.
+    """
+    PENDING = 0
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys'
+    )
+    key = models.CharField(max_length=255)
+
+    # Identifican la petición original; una clave reutilizada con otra petición se rechaza
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+
+    # PENDING mientras la petición original está en curso (ver decorators)
+    response_status = models.PositiveSmallIntegerField()
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} - {self.method} {self.path}"
+
+    def is_abandoned(self):
+        timeout = timedelta(seconds=settings.IDEMPOTENCY_PENDING_TIMEOUT_SECONDS)
+        return self.response_status == self.PENDING and self.created_at < timezone.now() - timeout
@@ -0,0 +1,27 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APITestCase
+import pytest
+from ...users.test.factories import UserFactory
+from ..models import IdempotencyKey
+
+
+@pytest.mark.django_db
+class TestPurgeIdempotencyKeysTestCase(APITestCase):
+    """
+    Tests the purge_idempotency_keys command.
+    """
+
+    def test_command_deletes_only_expired_keys(self):
+        user = UserFactory()
+        now = timezone.now()
+        for key, expires_at in (('old', now - timedelta(hours=1)), ('live', now + timedelta(hours=1))):
+            IdempotencyKey.objects.create(
+                user=user, key=key, method='POST', path='/api/v1/orders/',
+                fingerprint='x', response_status=201, expires_at=expires_at
+            )
+
+        call_command('purge_idempotency_keys', '--batch-size', '1', stdout=StringIO())
+        assert list(IdempotencyKey.objects.values_list('key', flat=True)) == ['live']
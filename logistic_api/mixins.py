@@ -0,0 +1,170 @@
+import hashlib
+from operator import attrgetter
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+from .concurrency import VersionConflict
+
+
+class ConditionalGetMixin:
+    """
+    Agrega ETag y Last-Modified a retrieve y list, calculados a partir de
+    updated_at (y del updated_at de las relaciones que el serializer expone).
+    Si el cliente envía If-None-Match / If-Modified-Since y nada cambió, se
+    responde 304 antes de serializar.
+    """
+    # Rutas (con puntos) a los timestamps que afectan la representación
+    conditional_timestamp_fields = ('updated_at',)
+
+    def get_object_versions(self, obj):
+        timestamps = []
+        for field in self.conditional_timestamp_fields:
+            try:
+                value = attrgetter(field)(obj)
+            except AttributeError:
+                # Relación nula (p. ej. order.operation)
+                continue
+            if value is not None:
+                timestamps.append(value)
+        return timestamps
+
+    def check_conditional_get(self, request, objects, meta=None, version=None):
+        """
+        Retorna (etag, last_modified, not_modified_response). La respuesta es None
+        cuando el cliente no tiene una copia vigente.
+        Con `version` (modelos versionados) el ETag empieza con ella, para que
+        sirva también como If-Match (ver OptimisticConcurrencyMixin).
+        """
+        digest = hashlib.sha1(repr((request.accepted_renderer.format, meta)).encode())
+        timestamps = []
+        for obj in objects:
+            versions = self.get_object_versions(obj)
+            digest.update(f"{obj.pk}:{','.join(v.isoformat() for v in versions)};".encode())
+            timestamps.extend(versions)
+
+        etag = digest.hexdigest()
+        etag = quote_etag(f"{version}.{etag}" if version is not None else etag)
+        last_modified = int(max(timestamps).timestamp()) if timestamps else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            self.set_conditional_headers(response, etag, last_modified)
+        return etag, last_modified, response
+
+    def set_conditional_headers(self, response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified, not_modified = self.check_conditional_get(
+            request, [instance], version=getattr(instance, 'version', None)
+        )
+        if not_modified is not None:
+            return not_modified
+
+        serializer = self.get_serializer(instance)
+        return self.set_conditional_headers(Response(serializer.data), etag, last_modified)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            # Metadatos de la página (count/next/previous) sin serializar los resultados
+            meta = self.get_paginated_response([]).data
+            etag, last_modified, not_modified = self.check_conditional_get(request, page, meta)
+            if not_modified is not None:
+                return not_modified
+
+            serializer = self.get_serializer(page, many=True)
+            response = self.get_paginated_response(serializer.data)
+            return self.set_conditional_headers(response, etag, last_modified)
+
+        objects = list(queryset)
+        etag, last_modified, not_modified = self.check_conditional_get(request, objects)
+        if not_modified is not None:
+            return not_modified
+
+        serializer = self.get_serializer(objects, many=True)
+        return self.set_conditional_headers(Response(serializer.data), etag, last_modified)
+
+
+class VersionMismatch(APIException):
+    """La versión de If-Match no es la vigente."""
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "The resource was modified since it was read (If-Match does not match)."
+    default_code = 'precondition_failed'
+
+
+class ConcurrentUpdate(APIException):
+    """Otra escritura ganó entre la lectura y el UPDATE de esta petición."""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The resource was modified concurrently. Reload it and retry."
+    default_code = 'conflict'
+
+
+IF_MATCH_PARAMETER = OpenApiParameter(
+    name='If-Match',
+    type=str,
+    location=OpenApiParameter.HEADER,
+    required=False,
+    description="ETag (or version) of the representation being edited. "
+                "Responds 412 if the resource changed since it was read."
+)
+
+
+def parse_if_match(request):
+    """
+    Versión pedida en If-Match, o None si no se envió (o es *).
+    Acepta el ETag de retrieve ("<version>.<hash>"), "<version>" o W/"<version>".
+    """
+    value = request.headers.get('If-Match', '').strip()
+    if not value or value == '*':
+        return None
+    if value.startswith('W/'):
+        value = value[2:]
+    version = value.strip('"').split('.', 1)[0]
+    if not version.isdigit():
+        raise VersionMismatch("Malformed If-Match header.")
+    return int(version)
+
+
+class OptimisticConcurrencyMixin:
+    """
+    Escrituras con control de concurrencia optimista sobre modelos
+    versionados (ver concurrency.VersionedModel), sin bloqueos de fila:
+
+    - If-Match con una versión distinta de la leída: 412 sin escribir.
+    - Otra escritura gana entre la lectura y el UPDATE condicional: 412 si se
+      envió If-Match, 409 si no.
+
+    Las respuestas de escritura llevan ETag con la versión nueva.
+    """
+
+    def check_if_match(self, instance):
+        """Valida If-Match contra la instancia que se va a escribir."""
+        expected = parse_if_match(self.request)
+        if expected is not None and expected != instance.version:
+            raise VersionMismatch()
+        self.versioned_instance = instance
+
+    def perform_update(self, serializer):
+        self.check_if_match(serializer.instance)
+        super().perform_update(serializer)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, VersionConflict):
+            exc = VersionMismatch() if self.request.headers.get('If-Match') else ConcurrentUpdate()
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        instance = getattr(self, 'versioned_instance', None)
+        if instance is not None and status.is_success(response.status_code):
+            response['ETag'] = quote_etag(str(instance.version))
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -1,13 +1,14 @@
 from django.contrib import admin
-from .models import Operation, OperationStatus
+from .models import Operation, OperationStatus, OperationTemplate, OperationTemplateStatus
 
 
 class OperationStatusInline(admin.TabularInline):
     """Inline para mostrar y editar estados dentro de un operativo"""
     model = OperationStatus
     extra = 1
-    ordering = ['order']
-    fields = ('name', 'description', 'order')
+    ordering = ['sort_key']
+    # sort_key vacío agrega el estado al final
+    fields = ('name', 'description', 'sort_key')
     readonly_fields = ('created_at',)
 
 
@@ -16,7 +17,7 @@ class OperationAdmin(admin.ModelAdmin):
     list_display = ('name', 'created_by', 'driver', 'is_active', 'is_finalized', 'created_at', 'updated_at')
     search_fields = ('name', 'description', 'created_by__email', 'driver__first_name', 'driver__last_name')
     list_filter = ('is_active', 'is_finalized', 'created_at', 'driver')
-    readonly_fields = ('id', 'created_at', 'updated_at')
+    readonly_fields = ('id', 'final_status', 'created_at', 'updated_at')
     fieldsets = (
         (None, {
             'fields': ('id', 'name', 'description')
@@ -25,7 +26,7 @@ class OperationAdmin(admin.ModelAdmin):
             'fields': ('driver',)
         }),
         ('Estado', {
-            'fields': ('is_active', 'is_finalized')
+            'fields': ('is_active', 'is_finalized', 'final_status')
         }),
         ('Información', {
             'fields': ('created_by', 'created_at', 'updated_at')
@@ -34,20 +35,60 @@ class OperationAdmin(admin.ModelAdmin):
     inlines = [OperationStatusInline]
     autocomplete_fields = ['created_by', 'driver']
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        form.instance.refresh_final_status()
+
 
 @admin.register(OperationStatus)
 class OperationStatusAdmin(admin.ModelAdmin):
-    list_display = ('name', 'operation', 'order', 'created_at')
+    # Sin position: sería un COUNT por fila, y with_position() no es correcta con búsquedas
+    list_display = ('name', 'operation', 'sort_key', 'created_at')
     search_fields = ('name', 'description', 'operation__name')
     list_filter = ('operation', 'created_at')
     readonly_fields = ('id', 'created_at')
     fieldsets = (
         (None, {
-            'fields': ('id', 'operation', 'name', 'description', 'order')
+            'fields': ('id', 'operation', 'name', 'description', 'sort_key')
         }),
         ('Información', {
             'fields': ('created_at',)
         }),
     )
     autocomplete_fields = ['operation']
-    ordering = ['operation', 'order']
+    ordering = ['operation', 'sort_key']
+
+    def save_model(self, request, obj, form, change):
+        previous_operation_id = form.initial.get('operation')
+        super().save_model(request, obj, form, change)
+        obj.operation.refresh_final_status()
+        if previous_operation_id and previous_operation_id != obj.operation_id:
+            Operation.objects.get(pk=previous_operation_id).refresh_final_status()
+
+    def delete_model(self, request, obj):
+        operation = obj.operation
+        super().delete_model(request, obj)
+        operation.refresh_final_status()
+
+    def delete_queryset(self, request, queryset):
+        operations = list(Operation.objects.filter(statuses__in=queryset).distinct())
+        super().delete_queryset(request, queryset)
+        for operation in operations:
+            operation.refresh_final_status()
+
+
+class OperationTemplateStatusInline(admin.TabularInline):
+    model = OperationTemplateStatus
+    extra = 1
+    ordering = ['order']
+    fields = ('name', 'description', 'order')
+
+
+@admin.register(OperationTemplate)
+class OperationTemplateAdmin(admin.ModelAdmin):
+    list_display = ('name', 'created_by', 'is_active', 'created_at', 'updated_at')
+    search_fields = ('name', 'description')
+    list_filter = ('is_active', 'created_at')
+    readonly_fields = ('id', 'created_at', 'updated_at')
+    inlines = [OperationTemplateStatusInline]
+    autocomplete_fields = ['created_by']
@@ -0,0 +1,17 @@
+from django_filters import rest_framework as filters
+from ..models import Operation
+
+
+class OperationFilter(filters.FilterSet):
+    """
+    Filtros del listado de operativos.
+    Las combinaciones habituales están cubiertas por índices compuestos en Operation.Meta.
+    """
+    # UUIDFilter en lugar de ModelChoiceFilter para no consultar la FK al validar
+    driver = filters.UUIDFilter()
+    # ?created_at_after=...&created_at_before=...
+    created_at = filters.IsoDateTimeFromToRangeFilter()
+
+    class Meta:
+        model = Operation
+        fields = ['driver', 'is_active', 'is_finalized', 'created_at']
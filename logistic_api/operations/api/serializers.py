@@ -1,22 +1,99 @@
-from django.db import models
+from decimal import Decimal
+from django.conf import settings
+from django.db import connection, models, transaction
 from rest_framework import serializers
-from ..models import Operation, OperationStatus
+from ...audit import tracking
+from ...orders.models import Order
+from ..models import Operation, OperationStatus, OperationTemplate, OperationTemplateStatus
+
+
+def validate_assignable_order_ids(value):
+    """
+    Verifica que todos los orders existan y que ninguno esté finalizado con una
+    sola consulta: los ids viajan como un único arreglo (unnest) y el anti-join
+    devuelve solo los ids faltantes o finalizados, sin importar cuántos sean.
+    """
+    if not value:
+        return value
+
+    quote = connection.ops.quote_name
+    sql = f"""
+        SELECT ids.id, o.id IS NULL AS missing
+        FROM unnest(%s::uuid[]) AS ids(id)
+        LEFT JOIN {quote(Order._meta.db_table)} o ON o.id = ids.id
+        LEFT JOIN {quote(Operation._meta.db_table)} op ON op.id = o.operation_id
+        WHERE o.id IS NULL OR o.current_status = op.final_status
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [list({str(order_id) for order_id in value})])
+        rejected = cursor.fetchall()
+
+    missing_ids = sorted(str(order_id) for order_id, missing in rejected if missing)
+    finalized_ids = sorted(str(order_id) for order_id, missing in rejected if not missing)
+    errors = []
+    if missing_ids:
+        errors.append(f"Orders not found: {missing_ids}")
+    if finalized_ids:
+        errors.append(f"Cannot assign finalized orders to an operation: {', '.join(finalized_ids)}")
+    if errors:
+        raise serializers.ValidationError(errors)
+
+    return value
 
 
 class OperationStatusSerializer(serializers.ModelSerializer):
+    # Posición densa 1..n; el orden se guarda como clave dispersa (sort_key)
+    order = serializers.IntegerField(source='position', min_value=1, required=False)
+
     class Meta:
         model = OperationStatus
-        fields = '__all__'
-        read_only_fields = ('id', 'created_at')
+        fields = ('id', 'operation', 'name', 'description', 'order', 'version', 'created_at')
+        read_only_fields = ('id', 'version', 'created_at')
+
+    def update(self, instance, validated_data):
+        position = validated_data.pop('position', None)
+        operation = validated_data.get('operation', instance.operation)
+
+        with transaction.atomic():
+            # Mover o cambiar de operativo solo reescribe la clave de este estado
+            if position is not None or operation.pk != instance.operation_id:
+                operation.lock()
+                if position is not None:
+                    instance.sort_key = operation.status_key_at(position, exclude=instance)
+                else:
+                    instance.sort_key = operation.next_status_key()
+                instance.dense_position = None
+            return super().update(instance, validated_data)
 
 
 class OperationSerializer(serializers.ModelSerializer):
     statuses = OperationStatusSerializer(many=True, read_only=True)
-    
+
     class Meta:
         model = Operation
         fields = '__all__'
-        read_only_fields = ('id', 'created_at', 'updated_at', 'created_by')
+        read_only_fields = ('id', 'created_at', 'updated_at', 'created_by', 'final_status')
+
+
+class ManifestOrderSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Order
+        fields = (
+            'id', 'order_number', 'description',
+            'delivery_address', 'delivery_city', 'delivery_region', 'delivery_country',
+            'delivery_latitude', 'delivery_longitude', 'route_sequence',
+            'current_status', 'notes',
+        )
+
+
+class DriverManifestOperationSerializer(serializers.ModelSerializer):
+    """Operativo con sus estados ordenados y sus pedidos, para la app del conductor."""
+    statuses = OperationStatusSerializer(many=True, read_only=True)
+    orders = ManifestOrderSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Operation
+        fields = ('id', 'name', 'description', 'final_status', 'statuses', 'orders', 'updated_at')
 
 
 class CreateOperationSerializer(serializers.Serializer):
@@ -25,54 +102,48 @@ class CreateOperationSerializer(serializers.Serializer):
     order_ids = serializers.ListField(
         child=serializers.UUIDField(),
         required=False,
-        allow_empty=True
+        allow_empty=True,
+        max_length=settings.OPERATIONS_ORDER_IDS_MAX_SIZE
     )
-    
+    # Plantilla cuyos estados se copian al operativo
+    from_template = serializers.UUIDField(required=False)
+
     def validate_order_ids(self, value):
         """Validar que los orders no estén finalizados"""
-        if not value:
-            return value
-        
-        from ...orders.models import Order
-        orders = Order.objects.filter(id__in=value)
-        
-        # Verificar que todos los orders existan
-        found_ids = set(orders.values_list('id', flat=True))
-        requested_ids = set(value)
-        missing_ids = requested_ids - found_ids
-        if missing_ids:
-            raise serializers.ValidationError(
-                f"Orders not found: {list(missing_ids)}"
-            )
-        
-        # Verificar que ningún order esté finalizado
-        finalized_orders = []
-        for order in orders:
-            if order.is_finalized():
-                finalized_orders.append(str(order.id))
-        
-        if finalized_orders:
-            raise serializers.ValidationError(
-                f"Cannot assign finalized orders to an operation: {', '.join(finalized_orders)}"
-            )
-        
-        return value
+        return validate_assignable_order_ids(value)
+
+    def validate_from_template(self, value):
+        template = OperationTemplate.objects.filter(
+            id=value, is_active=True
+        ).prefetch_related('statuses').first()
+        if template is None:
+            raise serializers.ValidationError("Operation template not found.")
+        return template
 
     def create(self, validated_data):
         request = self.context['request']
         order_ids = validated_data.pop('order_ids', [])
-        
-        operation = Operation.objects.create(
-            name=validated_data['name'],
-            description=validated_data.get('description', ''),
-            created_by=request.user
-        )
-        
-        # Asignar pedidos al operativo si se proporcionaron
+        template = validated_data.pop('from_template', None)
+        template_statuses = list(template.statuses.all()) if template else []
+
+        with transaction.atomic():
+            operation = Operation.objects.create(
+                name=validated_data['name'],
+                description=validated_data.get('description', ''),
+                created_by=request.user,
+                final_status=template_statuses[-1].name if template_statuses else None
+            )
+
+            # Toda la secuencia de estados en un solo INSERT
+            if template_statuses:
+                tracking.record_created(
+                    OperationStatus.objects.bulk_create(template.build_statuses(operation))
+                )
+
+        # Asignar pedidos al operativo si se proporcionaron (por bloques)
         if order_ids:
-            from ...orders.models import Order
-            Order.objects.filter(id__in=order_ids).update(operation=operation)
-        
+            operation.assign_orders(order_ids)
+
         return operation
 
 
@@ -83,40 +154,22 @@ class UpdateOperationSerializer(serializers.Serializer):
     order_ids = serializers.ListField(
         child=serializers.UUIDField(),
         required=False,
-        allow_empty=True
+        allow_empty=True,
+        max_length=settings.OPERATIONS_ORDER_IDS_MAX_SIZE
     )
     is_active = serializers.BooleanField(required=False)
-    is_finalized = serializers.BooleanField(required=False)
-    
+
     def validate_order_ids(self, value):
         """Validar que los orders no estén finalizados"""
-        if not value:
-            return value
-        
-        from ...orders.models import Order
-        orders = Order.objects.filter(id__in=value)
-        
-        # Verificar que todos los orders existan
-        found_ids = set(orders.values_list('id', flat=True))
-        requested_ids = set(value)
-        missing_ids = requested_ids - found_ids
-        if missing_ids:
-            raise serializers.ValidationError(
-                f"Orders not found: {list(missing_ids)}"
-            )
-        
-        # Verificar que ningún order esté finalizado
-        finalized_orders = []
-        for order in orders:
-            if order.is_finalized():
-                finalized_orders.append(str(order.id))
-        
-        if finalized_orders:
-            raise serializers.ValidationError(
-                f"Cannot assign finalized orders to an operation: {', '.join(finalized_orders)}"
-            )
-        
-        return value
+        return validate_assignable_order_ids(value)
+
+    def validate(self, attrs):
+        # Finalizar mueve y desactiva los pedidos: solo vía POST /finalize/
+        if 'is_finalized' in self.initial_data:
+            raise serializers.ValidationError({
+                'is_finalized': ["Cannot be updated, use POST /operations/{id}/finalize/."]
+            })
+        return attrs
 
 
 class CreateOperationStatusSerializer(serializers.Serializer):
@@ -133,31 +186,65 @@ class CreateOperationStatusSerializer(serializers.Serializer):
     def create(self, validated_data):
         operation = self.context['operation']
         order = validated_data.get('order')
-        
-        # Si no se especifica order, se coloca al final
-        if order is None:
-            from django.db.models import Max
-            max_order = OperationStatus.objects.filter(operation=operation).aggregate(
-                max_order=Max('order')
-            )['max_order'] or 0
-            order = max_order + 1
-        
-        # Reordenar estados existentes si es necesario
-        from django.db.models import F
-        OperationStatus.objects.filter(
-            operation=operation,
-            order__gte=order
-        ).update(order=F('order') + 1)
-        
-        status = OperationStatus.objects.create(
-            operation=operation,
-            name=validated_data['name'],
-            description=validated_data.get('description', ''),
-            order=order
-        )
+
+        with transaction.atomic():
+            operation.lock()
+            # Una sola fila nueva: la clave cae entre sus vecinos (o al final si no se indica order)
+            status = OperationStatus.objects.create(
+                operation=operation,
+                name=validated_data['name'],
+                description=validated_data.get('description', ''),
+                sort_key=operation.status_key_at(order) if order is not None else operation.next_status_key()
+            )
+            operation.refresh_final_status()
         return status
 
 
+class AdvanceOrdersStatusSerializer(serializers.Serializer):
+    # Si no se envía, se actualizan todos los pedidos del operativo
+    order_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        required=False,
+        allow_empty=False
+    )
+
+
+class SetOrdersStatusSerializer(AdvanceOrdersStatusSerializer):
+    status_id = serializers.UUIDField()
+
+    def validate(self, attrs):
+        operation = self.context['operation']
+        try:
+            attrs['status'] = operation.statuses.get(id=attrs['status_id'])
+        except OperationStatus.DoesNotExist:
+            raise serializers.ValidationError({"status_id": "Status not found in this operation."})
+        return attrs
+
+
+class OrdersStatusResultSerializer(serializers.Serializer):
+    updated = serializers.IntegerField()
+
+
+class OptimizeRouteSerializer(serializers.Serializer):
+    # Punto de partida opcional (p. ej. el almacén); sin él la ruta empieza en cualquier parada
+    start_latitude = serializers.DecimalField(
+        max_digits=9, decimal_places=6, min_value=Decimal('-90'), max_value=Decimal('90'), required=False
+    )
+    start_longitude = serializers.DecimalField(
+        max_digits=9, decimal_places=6, min_value=Decimal('-180'), max_value=Decimal('180'), required=False
+    )
+
+    def validate(self, attrs):
+        if ('start_latitude' in attrs) != ('start_longitude' in attrs):
+            raise serializers.ValidationError("start_latitude and start_longitude must be sent together.")
+        return attrs
+
+
+class OptimizeRouteResultSerializer(serializers.Serializer):
+    order_ids = serializers.ListField(child=serializers.UUIDField())
+    distance_km = serializers.FloatField()
+
+
 class UpdateOperationStatusOrderSerializer(serializers.Serializer):
     status_id = serializers.UUIDField()
     new_order = serializers.IntegerField()
@@ -169,5 +256,68 @@ class UpdateOperationStatusOrderSerializer(serializers.Serializer):
 
 
 class ReorderOperationStatusesSerializer(serializers.Serializer):
-    statuses = UpdateOperationStatusOrderSerializer(many=True)
+    # Movimientos individuales, aplicados uno a uno
+    statuses = UpdateOperationStatusOrderSerializer(many=True, required=False)
+    # Secuencia completa deseada, aplicada con un único UPDATE (ver Operation.reorder_statuses)
+    status_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        required=False,
+        allow_empty=False
+    )
+
+    def validate(self, attrs):
+        if ('statuses' in attrs) == ('status_ids' in attrs):
+            raise serializers.ValidationError("Send either statuses or status_ids.")
+        status_ids = attrs.get('status_ids')
+        if status_ids and len(set(status_ids)) != len(status_ids):
+            raise serializers.ValidationError({"status_ids": "Duplicated status ids."})
+        return attrs
+
+
+class OperationTemplateStatusSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OperationTemplateStatus
+        fields = ('id', 'name', 'description', 'order')
+        read_only_fields = ('id', 'order')
+
+
+class OperationTemplateSerializer(serializers.ModelSerializer):
+    """
+    Plantilla con su secuencia de estados. El orden de los estados es el de la
+    lista enviada; al editarla se reemplaza la secuencia completa.
+    """
+    statuses = OperationTemplateStatusSerializer(many=True)
+
+    class Meta:
+        model = OperationTemplate
+        fields = (
+            'id', 'name', 'description', 'is_active', 'statuses', 'created_by', 'created_at', 'updated_at'
+        )
+        read_only_fields = ('id', 'created_by', 'created_at', 'updated_at')
+
+    def validate_statuses(self, value):
+        if not value:
+            raise serializers.ValidationError("A template needs at least one status.")
+        return value
+
+    def _replace_statuses(self, template, statuses):
+        template.statuses.all().delete()
+        OperationTemplateStatus.objects.bulk_create([
+            OperationTemplateStatus(template=template, order=order, **data)
+            for order, data in enumerate(statuses, start=1)
+        ])
+
+    @transaction.atomic
+    def create(self, validated_data):
+        statuses = validated_data.pop('statuses')
+        template = super().create(validated_data)
+        self._replace_statuses(template, statuses)
+        return template
 
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        statuses = validated_data.pop('statuses', None)
+        template = super().update(instance, validated_data)
+        if statuses is not None:
+            self._replace_statuses(template, statuses)
+        return template
@@ -1,3 +1,4 @@
+from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, extend_schema_view
 from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
@@ -5,9 +6,13 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied
 from django.db import transaction
-from django.db.models import F
+from django.db.models import Prefetch, prefetch_related_objects
+from ...events import notify
+from ...idempotency.decorators import IDEMPOTENCY_KEY_PARAMETER, idempotent
+from ...mixins import IF_MATCH_PARAMETER, ConditionalGetMixin, OptimisticConcurrencyMixin
+from ...pagination import PageNumberOrCursorPagination
 from ...users.models import User
-from ..models import Operation, OperationStatus
+from ..models import Operation, OperationStatus, OperationTemplate
 from .serializers import (
     OperationSerializer,
     CreateOperationSerializer,
@@ -15,26 +20,44 @@ from .serializers import (
     OperationStatusSerializer,
     CreateOperationStatusSerializer,
     ReorderOperationStatusesSerializer,
+    AdvanceOrdersStatusSerializer,
+    SetOrdersStatusSerializer,
+    OrdersStatusResultSerializer,
+    OptimizeRouteSerializer,
+    OptimizeRouteResultSerializer,
+    OperationTemplateSerializer,
 )
+from .filters import OperationFilter
 
 
 @extend_schema_view(
     list=extend_schema(tags=['Operations V1']),
     retrieve=extend_schema(tags=['Operations V1']),
     create=extend_schema(tags=['Operations V1']),
-    update=extend_schema(tags=['Operations V1']),
-    partial_update=extend_schema(tags=['Operations V1']),
+    update=extend_schema(tags=['Operations V1'], parameters=[IF_MATCH_PARAMETER]),
+    partial_update=extend_schema(tags=['Operations V1'], parameters=[IF_MATCH_PARAMETER]),
     statuses=extend_schema(tags=['Operation Statuses V1']),
+    set_status=extend_schema(tags=['Operations V1']),
+    advance=extend_schema(tags=['Operations V1']),
+    optimize_route=extend_schema(tags=['Operations V1']),
+    finalize=extend_schema(tags=['Operations V1']),
 )
 class OperationViewSet(
+    ConditionalGetMixin,
+    OptimisticConcurrencyMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet
 ):
-    queryset = Operation.objects.select_related('created_by').prefetch_related('statuses')
+    queryset = Operation.objects.select_related('created_by').prefetch_related(
+        Prefetch('statuses', queryset=OperationStatus.objects.with_position())
+    )
     permission_classes = [IsAuthenticated]
+    pagination_class = PageNumberOrCursorPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = OperationFilter
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -45,10 +68,10 @@ class OperationViewSet(
 
     def get_queryset(self):
         user = self.request.user
-        
+
         if user.role not in [User.Roles.ADMIN, User.Roles.INTERNAL]:
             raise PermissionDenied("You do not have permission to access this resource.")
-        
+
         return self.queryset.all()
 
     def perform_create(self, serializer):
@@ -60,8 +83,10 @@ class OperationViewSet(
     @extend_schema(
         request=CreateOperationSerializer,
         responses={201: OperationSerializer},
-        description="Create a new operation"
+        description="Create a new operation",
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
     )
+    @idempotent
     def create(self, request, *args, **kwargs):
         input_serializer = CreateOperationSerializer(
             data=request.data,
@@ -69,24 +94,28 @@ class OperationViewSet(
         )
         input_serializer.is_valid(raise_exception=True)
         operation = input_serializer.save()
-        
+        # Los estados copiados de una plantilla se serializan con una sola consulta
+        statuses = Prefetch('statuses', queryset=OperationStatus.objects.with_position())
+        prefetch_related_objects([operation], statuses)
+
         output_serializer = OperationSerializer(operation)
         return Response(output_serializer.data, status=status.HTTP_201_CREATED)
 
     def update(self, request, *args, **kwargs):
         operation = self.get_object()
         user = request.user
-        
+
         if user.role not in [User.Roles.ADMIN, User.Roles.INTERNAL]:
             raise PermissionDenied("You do not have permission to update operations.")
-        
+
         input_serializer = UpdateOperationSerializer(
             data=request.data,
             context={'request': request}
         )
         input_serializer.is_valid(raise_exception=True)
         validated_data = input_serializer.validated_data
-        
+        self.check_if_match(operation)
+
         # Actualizar campos básicos
         if 'name' in validated_data:
             operation.name = validated_data['name']
@@ -94,9 +123,7 @@ class OperationViewSet(
             operation.description = validated_data.get('description', '')
         if 'is_active' in validated_data:
             operation.is_active = validated_data['is_active']
-        if 'is_finalized' in validated_data:
-            operation.is_finalized = validated_data['is_finalized']
-        
+
         # Actualizar driver si se proporciona
         if 'driver_id' in validated_data:
             driver_id = validated_data['driver_id']
@@ -112,18 +139,20 @@ class OperationViewSet(
                     )
             else:
                 operation.driver = None
-        
-        # Actualizar orders si se proporcionan
-        if 'order_ids' in validated_data:
-            order_ids = validated_data['order_ids']
-            from ...orders.models import Order
-            if order_ids:
-                Order.objects.filter(id__in=order_ids).update(operation=operation)
-            # Si se envía una lista vacía, no se hace nada (mantiene los orders actuales)
-            # Si se quiere remover todos, se puede hacer en otro endpoint
-        
-        operation.save()
-        
+
+        with transaction.atomic():
+            # UPDATE condicionado a la versión leída: si otra escritura ganó,
+            # VersionConflict (409/412) corta antes de asignar pedidos
+            operation.save()
+            notify.operation_changed(operation)
+
+        # Actualizar orders si se proporcionan, por bloques fuera de la
+        # transacción del operativo
+        # Si se envía una lista vacía, no se hace nada (mantiene los orders actuales)
+        # Si se quiere remover todos, se puede hacer en otro endpoint
+        if validated_data.get('order_ids'):
+            operation.assign_orders(validated_data['order_ids'])
+
         output_serializer = OperationSerializer(operation)
         return Response(output_serializer.data, status=status.HTTP_200_OK)
 
@@ -142,7 +171,7 @@ class OperationViewSet(
         """
         GET: List all statuses for the operation
         POST: Create a new status (optionally at a specific position)
-        PUT: Reorder statuses
+        PUT: Reorder statuses (individual moves or the full status_ids sequence)
         DELETE: Delete a status (via query param ?status_id=...)
         """
         operation = self.get_object()
@@ -164,7 +193,7 @@ class OperationViewSet(
             )
             serializer.is_valid(raise_exception=True)
             status_obj = serializer.save()
-            
+
             output_serializer = OperationStatusSerializer(status_obj)
             return Response(output_serializer.data, status=status.HTTP_201_CREATED)
 
@@ -172,12 +201,25 @@ class OperationViewSet(
             # Reordenar estados
             serializer = ReorderOperationStatusesSerializer(data=request.data)
             serializer.is_valid(raise_exception=True)
-            
+
+            if 'status_ids' in serializer.validated_data:
+                # Secuencia completa en una sola sentencia
+                try:
+                    operation.reorder_statuses(serializer.validated_data['status_ids'])
+                except ValueError as error:
+                    return Response({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+                # Consulta nueva: operation.statuses viene precargado con el orden anterior
+                statuses = OperationStatus.objects.filter(operation=operation).with_position()
+                output_serializer = OperationStatusSerializer(statuses, many=True)
+                return Response(output_serializer.data, status=status.HTTP_200_OK)
+
             with transaction.atomic():
+                operation.lock()
                 for item in serializer.validated_data['statuses']:
                     status_id = item['status_id']
                     new_order = item['new_order']
-                    
+
                     try:
                         status_obj = OperationStatus.objects.get(
                             id=status_id,
@@ -188,33 +230,15 @@ class OperationViewSet(
                             {"detail": f"Status {status_id} not found in this operation."},
                             status=status.HTTP_404_NOT_FOUND
                         )
-                    
-                    old_order = status_obj.order
-                    
-                    if old_order == new_order:
-                        continue
-                    
-                    # Reordenar otros estados
-                    if old_order < new_order:
-                        # Moviendo hacia abajo
-                        OperationStatus.objects.filter(
-                            operation=operation,
-                            order__gt=old_order,
-                            order__lte=new_order
-                        ).update(order=F('order') - 1)
-                    else:
-                        # Moviendo hacia arriba
-                        OperationStatus.objects.filter(
-                            operation=operation,
-                            order__gte=new_order,
-                            order__lt=old_order
-                        ).update(order=F('order') + 1)
-                    
-                    status_obj.order = new_order
-                    status_obj.save()
-            
-            # Retornar estados reordenados
-            statuses = operation.statuses.all()
+
+                    # Solo se reescribe la clave del estado movido
+                    status_obj.sort_key = operation.status_key_at(new_order, exclude=status_obj)
+                    status_obj.save(update_fields=['sort_key'])
+
+                operation.refresh_final_status()
+
+            # Retornar estados reordenados (operation.statuses viene precargado con el orden anterior)
+            statuses = OperationStatus.objects.filter(operation=operation).with_position()
             output_serializer = OperationStatusSerializer(statuses, many=True)
             return Response(output_serializer.data, status=status.HTTP_200_OK)
 
@@ -226,7 +250,7 @@ class OperationViewSet(
                     {"detail": "status_id query parameter is required."},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            
+
             try:
                 status_obj = OperationStatus.objects.get(
                     id=status_id,
@@ -237,27 +261,143 @@ class OperationViewSet(
                     {"detail": "Status not found in this operation."},
                     status=status.HTTP_404_NOT_FOUND
                 )
-            
-            deleted_order = status_obj.order
-            
+
+            # Las claves dispersas no requieren renumerar los estados restantes
             with transaction.atomic():
                 status_obj.delete()
-                # Reordenar estados restantes
-                OperationStatus.objects.filter(
-                    operation=operation,
-                    order__gt=deleted_order
-                ).update(order=F('order') - 1)
-            
+                operation.refresh_final_status()
+
             return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(
+        detail=True,
+        methods=['post'],
+        url_path='set-status'
+    )
+    @extend_schema(
+        tags=['Operations V1'],
+        description="Move every order of the operation (or the given order_ids) to a status "
+                    "of its sequence with a single UPDATE",
+        request=SetOrdersStatusSerializer,
+        responses={200: OrdersStatusResultSerializer},
+    )
+    def set_status(self, request, pk=None):
+        operation = self.get_object()
+        user = request.user
+
+        if user.role not in [User.Roles.ADMIN, User.Roles.INTERNAL]:
+            raise PermissionDenied("You do not have permission to update operation orders.")
+
+        serializer = SetOrdersStatusSerializer(
+            data=request.data,
+            context={'operation': operation}
+        )
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            updated = operation.set_orders_status(
+                serializer.validated_data['status'].name,
+                order_ids=serializer.validated_data.get('order_ids')
+            )
+
+        return Response({'updated': updated}, status=status.HTTP_200_OK)
+
+    @action(
+        detail=True,
+        methods=['post'],
+        url_path='advance'
+    )
+    @extend_schema(
+        tags=['Operations V1'],
+        description="Advance every order of the operation (or the given order_ids) to the next "
+                    "status of its sequence with a single UPDATE",
+        request=AdvanceOrdersStatusSerializer,
+        responses={200: OrdersStatusResultSerializer},
+    )
+    def advance(self, request, pk=None):
+        operation = self.get_object()
+        user = request.user
+
+        if user.role not in [User.Roles.ADMIN, User.Roles.INTERNAL]:
+            raise PermissionDenied("You do not have permission to update operation orders.")
+
+        serializer = AdvanceOrdersStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            updated = operation.advance_orders(order_ids=serializer.validated_data.get('order_ids'))
+
+        return Response({'updated': updated}, status=status.HTTP_200_OK)
+
+    @action(
+        detail=True,
+        methods=['post'],
+        url_path='finalize'
+    )
+    @extend_schema(
+        tags=['Operations V1'],
+        description="Finalize the operation: move all its orders to the final status and deactivate them, "
+                    "mark the operation finalized and record the change, in one transaction",
+        request=None,
+        responses={200: OrdersStatusResultSerializer},
+    )
+    def finalize(self, request, pk=None):
+        operation = self.get_object()
+        user = request.user
+
+        if user.role not in [User.Roles.ADMIN, User.Roles.INTERNAL]:
+            raise PermissionDenied("You do not have permission to finalize operations.")
+
+        try:
+            updated = operation.finalize(user=user)
+        except ValueError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'updated': updated}, status=status.HTTP_200_OK)
+
+    @action(
+        detail=True,
+        methods=['post'],
+        url_path='optimize-route'
+    )
+    @extend_schema(
+        tags=['Operations V1'],
+        description="Compute the visiting order of the operation's pending orders with coordinates "
+                    "and store it as each order's route_sequence",
+        request=OptimizeRouteSerializer,
+        responses={200: OptimizeRouteResultSerializer},
+    )
+    def optimize_route(self, request, pk=None):
+        operation = self.get_object()
+        user = request.user
+
+        if user.role not in [User.Roles.ADMIN, User.Roles.INTERNAL]:
+            raise PermissionDenied("You do not have permission to update operation orders.")
+
+        serializer = OptimizeRouteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        start = None
+        if 'start_latitude' in data:
+            start = (float(data['start_latitude']), float(data['start_longitude']))
+
+        with transaction.atomic():
+            order_ids, distance = operation.optimize_route(start=start)
+
+        return Response(
+            {'order_ids': order_ids, 'distance_km': round(distance, 3)},
+            status=status.HTTP_200_OK
+        )
+
 
 @extend_schema_view(
     retrieve=extend_schema(tags=['Operation Statuses V1']),
-    update=extend_schema(tags=['Operation Statuses V1']),
-    partial_update=extend_schema(tags=['Operation Statuses V1']),
+    update=extend_schema(tags=['Operation Statuses V1'], parameters=[IF_MATCH_PARAMETER]),
+    partial_update=extend_schema(tags=['Operation Statuses V1'], parameters=[IF_MATCH_PARAMETER]),
     destroy=extend_schema(tags=['Operation Statuses V1']),
 )
 class OperationStatusViewSet(
+    OptimisticConcurrencyMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
     mixins.DestroyModelMixin,
@@ -273,24 +413,58 @@ class OperationStatusViewSet(
 
     def get_queryset(self):
         user = self.request.user
-        
+
         if user.role not in [User.Roles.ADMIN, User.Roles.INTERNAL]:
             raise PermissionDenied("You do not have permission to access this resource.")
-        
+
         return self.queryset.all()
 
+    def perform_update(self, serializer):
+        self.check_if_match(serializer.instance)
+        previous_operation = serializer.instance.operation
+
+        with transaction.atomic():
+            instance = serializer.save()
+            instance.operation.refresh_final_status()
+            if instance.operation_id != previous_operation.id:
+                previous_operation.refresh_final_status()
+
     def perform_destroy(self, instance):
         user = self.request.user
         if user.role not in [User.Roles.ADMIN, User.Roles.INTERNAL]:
             raise PermissionDenied("You do not have permission to delete operation statuses.")
-        
+
         operation = instance.operation
-        deleted_order = instance.order
-        
+
         with transaction.atomic():
             instance.delete()
-            # Reordenar estados restantes
-            OperationStatus.objects.filter(
-                operation=operation,
-                order__gt=deleted_order
-            ).update(order=F('order') - 1)
+            operation.refresh_final_status()
+
+
+@extend_schema_view(
+    list=extend_schema(tags=['Operation Templates V1']),
+    retrieve=extend_schema(tags=['Operation Templates V1']),
+    create=extend_schema(tags=['Operation Templates V1']),
+    update=extend_schema(tags=['Operation Templates V1']),
+    partial_update=extend_schema(tags=['Operation Templates V1']),
+    destroy=extend_schema(tags=['Operation Templates V1']),
+)
+class OperationTemplateViewSet(viewsets.ModelViewSet):
+    """Plantillas de operativo: secuencias de estados reutilizables."""
+    queryset = OperationTemplate.objects.select_related('created_by').prefetch_related('statuses')
+    permission_classes = [IsAuthenticated]
+    serializer_class = OperationTemplateSerializer
+
+    def get_queryset(self):
+        user = self.request.user
+
+        if user.role not in [User.Roles.ADMIN, User.Roles.INTERNAL]:
+            raise PermissionDenied("You do not have permission to access this resource.")
+
+        return self.queryset.all()
+
+    def perform_create(self, serializer):
+        user = self.request.user
+        if user.role not in [User.Roles.ADMIN, User.Roles.INTERNAL]:
+            raise PermissionDenied("You do not have permission to create operation templates.")
+        serializer.save(created_by=user)
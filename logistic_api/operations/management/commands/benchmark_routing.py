@@ -0,0 +1,63 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from ...routing import route_length, solve
+
+
+class Command(BaseCommand):
+    help = "Benchmark the route sequencing engine on random stops: solve time and route quality."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[50, 200, 500], help="Stops per operation."
+        )
+        parser.add_argument('--repeats', type=int, default=5, help="Random operations solved per size.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed, for comparable runs.")
+        parser.add_argument(
+            '--radius-km', type=float, default=15.0, help="Half side of the square where stops are drawn."
+        )
+        parser.add_argument(
+            '--budget', type=float, default=1.0, help="Fail if the median solve time exceeds these seconds."
+        )
+
+    def handle(self, *args, **options):
+        if options['repeats'] < 1:
+            raise CommandError("--repeats must be a positive integer.")
+
+        rnd = random.Random(options['seed'])
+        # ~111 km por grado de latitud; alrededor de Lima
+        spread = options['radius_km'] / 111.0
+        start = (-12.0464, -77.0428)
+        slow = []
+
+        self.stdout.write(
+            f"{'stops':>6} {'median s':>9} {'max s':>7} {'nn km':>9} {'route km':>9} {'gain':>6}"
+        )
+        for size in options['sizes']:
+            timings, initial_lengths, lengths = [], [], []
+            for _ in range(options['repeats']):
+                points = [
+                    (start[0] + rnd.uniform(-spread, spread), start[1] + rnd.uniform(-spread, spread))
+                    for _ in range(size)
+                ]
+                began = time.perf_counter()
+                matrix, initial, route, origin, end = solve(points, start=start)
+                timings.append(time.perf_counter() - began)
+                initial_lengths.append(route_length(initial, matrix, origin, end))
+                lengths.append(route_length(route, matrix, origin, end))
+
+            median = statistics.median(timings)
+            initial_km, route_km = statistics.mean(initial_lengths), statistics.mean(lengths)
+            # Calidad: mejora sobre la ruta de vecino más cercano
+            gain = (1 - route_km / initial_km) * 100 if initial_km else 0.0
+            self.stdout.write(
+                f"{size:>6} {median:>9.3f} {max(timings):>7.3f} "
+                f"{initial_km:>9.1f} {route_km:>9.1f} {gain:>5.1f}%"
+            )
+            if median > options['budget']:
+                slow.append(size)
+
+        if slow:
+            raise CommandError(f"Median solve time over {options['budget']}s for {slow} stops.")
+        self.stdout.write(self.style.SUCCESS("Routing benchmark within budget."))
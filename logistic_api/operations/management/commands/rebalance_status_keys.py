@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import Lead
+from ...models import Operation, OperationStatus
+
+
+class Command(BaseCommand):
+    help = "Re-space the status sort keys of operations whose gaps are nearly exhausted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-gap', type=int, default=8, help="Rebalance operations with two statuses closer than this."
+        )
+
+    def handle(self, *args, **options):
+        if options['min_gap'] < 2:
+            raise CommandError("--min-gap must be at least 2.")
+
+        # Operativos con algún par de estados consecutivos sin hueco suficiente
+        crowded = OperationStatus.objects.annotate(
+            next_key=Window(Lead('sort_key'), partition_by=[F('operation_id')], order_by=F('sort_key').asc())
+        ).filter(next_key__lt=F('sort_key') + options['min_gap']).values_list('operation_id', flat=True)
+
+        total = 0
+        for operation in Operation.objects.filter(id__in=set(crowded)):
+            # Una transacción corta por operativo
+            with transaction.atomic():
+                operation.lock()
+                operation.rebalance_status_keys()
+            total += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebalanced status keys of {total} operations."))
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0003_remove_operation_drivers_operation_driver'),
+        ('profile', '0004_clientprofile_contact_phone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='operation',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='operation',
+            index=models.Index(fields=['-created_at', '-id'], name='operations__created_78f2e4_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:02
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def populate_final_status(apps, schema_editor):
+    Operation = apps.get_model('operations', 'Operation')
+    OperationStatus = apps.get_model('operations', 'OperationStatus')
+    last_status = OperationStatus.objects.filter(
+        operation=OuterRef('pk')
+    ).order_by('-order').values('name')[:1]
+    Operation.objects.update(final_status=Subquery(last_status))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0004_alter_operation_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='operation',
+            name='final_status',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.RunPython(populate_final_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0005_operation_final_status'),
+        ('profile', '0005_clientprofile_profile_business_name_trgm_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='operation',
+            index=models.Index(fields=['is_active', '-created_at'], name='operations__is_acti_5fdb1c_idx'),
+        ),
+    ]
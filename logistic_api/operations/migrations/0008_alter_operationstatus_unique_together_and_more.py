@@ -0,0 +1,22 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:21
+
+import django.db.models.constraints
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0007_operation_operations__driver__3145af_idx'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='operationstatus',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='operationstatus',
+            constraint=models.UniqueConstraint(deferrable=django.db.models.constraints.Deferrable['IMMEDIATE'], fields=('operation', 'order'), name='operation_status_order_uniq'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:25
+
+import django.db.models.constraints
+from django.db import migrations, models
+
+STATUS_KEY_STEP = 1024
+
+
+def spread_sort_keys(apps, schema_editor):
+    OperationStatus = apps.get_model('operations', 'OperationStatus')
+    OperationStatus.objects.update(sort_key=models.F('sort_key') * STATUS_KEY_STEP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0008_alter_operationstatus_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='operationstatus',
+            name='operation_status_order_uniq',
+        ),
+        migrations.RemoveIndex(
+            model_name='operationstatus',
+            name='operations__operati_fd68a9_idx',
+        ),
+        migrations.RenameField(
+            model_name='operationstatus',
+            old_name='order',
+            new_name='sort_key',
+        ),
+        migrations.AlterField(
+            model_name='operationstatus',
+            name='sort_key',
+            field=models.BigIntegerField(blank=True),
+        ),
+        # Las posiciones densas 1..n pasan a claves con huecos
+        migrations.RunPython(spread_sort_keys, migrations.RunPython.noop),
+        migrations.AlterModelOptions(
+            name='operationstatus',
+            options={'ordering': ['operation_id', 'sort_key']},
+        ),
+        migrations.AddIndex(
+            model_name='operationstatus',
+            index=models.Index(fields=['operation', 'sort_key'], name='operations__operati_ab8bce_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='operationstatus',
+            constraint=models.UniqueConstraint(deferrable=django.db.models.constraints.Deferrable['IMMEDIATE'], fields=('operation', 'sort_key'), name='operation_status_sort_key_uniq'),
+        ),
+    ]
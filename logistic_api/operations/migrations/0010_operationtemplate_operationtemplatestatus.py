@@ -0,0 +1,46 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:29
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0009_operationstatus_sort_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OperationTemplate',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_operation_templates', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OperationTemplateStatus',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('order', models.PositiveIntegerField()),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statuses', to='operations.operationtemplate')),
+            ],
+            options={
+                'ordering': ['template_id', 'order'],
+                'constraints': [models.UniqueConstraint(fields=('template', 'order'), name='operation_template_status_order_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0010_operationtemplate_operationtemplatestatus'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='operation',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='operationstatus',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
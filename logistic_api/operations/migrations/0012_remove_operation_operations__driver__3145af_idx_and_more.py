@@ -0,0 +1,24 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0011_operation_version_operationstatus_version'),
+        ('profile', '0007_clientprofile_order_number_prefix'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='operation',
+            name='operations__driver__3145af_idx',
+        ),
+        migrations.AddIndex(
+            model_name='operation',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_finalized', False)), fields=['driver'], name='operation_driver_open_idx'),
+        ),
+    ]
@@ -1,21 +1,31 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import RowNumber
 from django.conf import settings
+from django.utils import timezone
+from ..audit import tracking
+from ..audit.tracking import AuditedModel
+from ..concurrency import VersionedModel, bump_version
 
+# Separación entre claves consecutivas de OperationStatus.sort_key
+STATUS_KEY_STEP = 1024
+
+
+class Operation(VersionedModel, AuditedModel):
+    audit_status_fields = ('is_finalized',)
 
-class Operation(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    
+
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
-    
+
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
         null=True,
         related_name='created_operations'
     )
-    
+
     driver = models.ForeignKey(
         'profile.DriverProfile',
         on_delete=models.SET_NULL,
@@ -23,47 +33,558 @@ class Operation(models.Model):
         blank=True,
         related_name='operations'
     )
-    
+
     is_active = models.BooleanField(default=True)
     is_finalized = models.BooleanField(default=False)
-    
+
+    # Nombre del último estado (mayor orden) de la secuencia.
+    # Se mantiene al crear, reordenar o eliminar estados (ver refresh_final_status)
+    final_status = models.CharField(max_length=100, blank=True, null=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    
+
     class Meta:
-        ordering = ['-created_at']
-    
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Soporta la paginación por cursor (keyset) sobre el orden por defecto
+            models.Index(fields=['-created_at', '-id']),
+            # Filtros del listado (OperationFilter)
+            models.Index(fields=['is_active', '-created_at']),
+            # Manifiesto y carga de trabajo de los conductores (/drivers/me/manifest/,
+            # /drivers/workload/): solo operativos abiertos
+            models.Index(
+                fields=['driver'],
+                condition=models.Q(is_active=True, is_finalized=False),
+                name='operation_driver_open_idx'
+            ),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.id}"
 
+    def refresh_final_status(self):
+        """
+        Recalcula final_status a partir del estado con mayor orden.
+        Debe llamarse después de cualquier cambio en la secuencia de estados.
+        Si cambia, actualiza finalized_at y los rollups de los pedidos afectados
+        (ver sync_finalized_orders).
+        """
+        with transaction.atomic():
+            previous_final_status, version = self.lock()
+            self.final_status = self.statuses.order_by('-sort_key').values_list('name', flat=True).first()
+            self.updated_at = timezone.now()
+            Operation.objects.filter(pk=self.pk).update(
+                final_status=self.final_status,
+                updated_at=self.updated_at,
+                version=bump_version()
+            )
+            # El UPDATE suma 1 a la versión en la base: si esta instancia estaba al
+            # día lo sigue estando, y si no, su próximo save() sigue fallando
+            self.version += 1
+            changed = previous_final_status != self.final_status
+            tracking.record_version(
+                Operation, self.pk, version + 1, tracking.UPDATE,
+                {'final_status': previous_final_status} if changed else None,
+                {'final_status': self.final_status} if changed else None
+            )
+            self.sync_finalized_orders(previous_final_status)
+
+    def lock(self):
+        """
+        Bloquea la fila del operativo hasta el fin de la transacción.
+        Retorna (final_status, version) vigentes.
+        """
+        return Operation.objects.select_for_update().filter(
+            pk=self.pk
+        ).values_list('final_status', 'version').first()
+
+    def sync_finalized_orders(self, previous_final_status):
+        """
+        Ajusta los pedidos cuando final_status pasa de previous_final_status al
+        valor actual: los que estaban en el estado final anterior dejan de estar
+        finalizados (finalized_at = NULL, se descuenta la entrega) y los que ya
+        están en el nuevo se finalizan ahora. Dos UPDATE masivos; no hace nada
+        si el estado final no cambió, y omite cada UPDATE si no hay pedidos.
+        Retorna la cantidad de pedidos actualizados.
+        """
+        from ..events import notify
+        from ..reports import rollups
+
+        if previous_final_status == self.final_status:
+            return 0
+
+        now = timezone.now()
+        updated = 0
+        if previous_final_status:
+            leaving = self.orders.filter(current_status=previous_final_status, finalized_at__isnull=False)
+            if rollups.record_deliveries(leaving, -1):
+                updated += leaving.update(finalized_at=None, updated_at=now, version=bump_version())
+        if self.final_status:
+            entering = self.orders.filter(current_status=self.final_status, finalized_at__isnull=True)
+            if rollups.record_deliveries(entering, 1):
+                updated += entering.update(finalized_at=now, updated_at=now, version=bump_version())
+        if updated:
+            self._record_orders_status(
+                notify.orders_changed(self.orders.filter(updated_at=now), notify.ORDER_STATUS),
+                ('finalized_at',)
+            )
+        return updated
+
+    def _write_status_keys(self, status_ids):
+        """
+        Reescribe sort_key = n * STATUS_KEY_STEP siguiendo status_ids, con un
+        único UPDATE, y registra las claves resultantes en AuditLog.
+        """
+        self.statuses.update(sort_key=models.Case(
+            *[
+                models.When(id=status_id, then=models.Value(n * STATUS_KEY_STEP))
+                for n, status_id in enumerate(status_ids, start=1)
+            ],
+            output_field=models.BigIntegerField()
+        ), version=bump_version())
+        rows = list(self.statuses.values('id', 'version', 'sort_key'))
+        tracking.record_rows(OperationStatus, rows, ('sort_key',), tracking.UPDATE)
+
+    def rebalance_status_keys(self):
+        """Vuelve a espaciar las claves de los estados sin cambiar su orden."""
+        self._write_status_keys(list(self.statuses.order_by('sort_key').values_list('id', flat=True)))
+
+    def next_status_key(self):
+        """Clave para agregar un estado al final de la secuencia."""
+        last_key = self.statuses.aggregate(last_key=models.Max('sort_key'))['last_key']
+        return (last_key or 0) + STATUS_KEY_STEP
+
+    def status_key_at(self, position, exclude=None):
+        """
+        Clave que ubica un estado en la posición densa `position` (1..n+1) entre
+        los estados actuales (sin contar `exclude`). Consulta solo los dos vecinos;
+        si entre ellos no queda hueco, reespacia las claves del operativo.
+        Debe llamarse con el operativo bloqueado (ver lock).
+        """
+        position = max(position, 1)
+        statuses = self.statuses.order_by('sort_key')
+        if exclude is not None:
+            statuses = statuses.exclude(pk=exclude.pk)
+
+        neighbours = list(statuses.values_list('sort_key', flat=True)[max(position - 2, 0):position])
+        if position == 1:
+            # Antes del primero (o primer estado del operativo)
+            return neighbours[0] - STATUS_KEY_STEP if neighbours else STATUS_KEY_STEP
+        if not neighbours:
+            # Posición más allá del final: se agrega después del último
+            neighbours = [statuses.values_list('sort_key', flat=True).last()]
+            if neighbours[0] is None:
+                return STATUS_KEY_STEP
+        if len(neighbours) < 2:
+            # Al final de la secuencia
+            return neighbours[-1] + STATUS_KEY_STEP
+
+        previous, following = neighbours
+        if following - previous > 1:
+            return (previous + following) // 2
+        self.rebalance_status_keys()
+        if exclude is not None:
+            exclude.version += 1
+        return self.status_key_at(position, exclude=exclude)
+
+    def reorder_statuses(self, status_ids):
+        """
+        Aplica la secuencia completa de estados `status_ids` (primero a último)
+        con un único UPDATE ... SET sort_key = CASE ... END, bajo un bloqueo del
+        operativo. La restricción única (operation, sort_key) es diferible, así
+        que la permutación se valida al final de la sentencia.
+        Lanza ValueError si status_ids no son exactamente los estados del operativo.
+        """
+        with transaction.atomic():
+            # Serializa reordenamientos y cambios de estados concurrentes del operativo
+            previous_final_status, version = self.lock()
+            names = dict(self.statuses.order_by().values_list('id', 'name'))
+            if set(names) != set(status_ids) or len(names) != len(status_ids):
+                raise ValueError("status_ids must list every status of this operation exactly once.")
+
+            self._write_status_keys(status_ids)
+            self.final_status = names[status_ids[-1]]
+            self.updated_at = timezone.now()
+            Operation.objects.filter(pk=self.pk).update(
+                final_status=self.final_status,
+                updated_at=self.updated_at,
+                version=bump_version()
+            )
+            self.version += 1
+            tracking.record_version(
+                Operation, self.pk, version + 1, tracking.UPDATE,
+                {'final_status': previous_final_status},
+                {'final_status': self.final_status, 'status_ids': status_ids}
+            )
+            self.sync_finalized_orders(previous_final_status)
+
+    def assign_orders(self, order_ids, chunk_size=None):
+        """
+        Asigna los pedidos order_ids al operativo con UPDATE de a lo más
+        chunk_size filas, cada uno en su propia transacción (o savepoint, si se
+        llama dentro de una), de modo que ni el tamaño de las sentencias ni la
+        duración de los bloqueos dependen del total. Los pedidos que quedaron
+        finalizados después de validarse se omiten.
+        Retorna la cantidad de pedidos asignados.
+        """
+        from ..events import notify
+        from ..orders.models import Order
+
+        chunk_size = chunk_size or settings.OPERATIONS_ASSIGN_CHUNK_SIZE
+        order_ids = list(dict.fromkeys(order_ids))
+        assigned = 0
+        for start in range(0, len(order_ids), chunk_size):
+            chunk = order_ids[start:start + chunk_size]
+            with transaction.atomic():
+                assigned += Order.objects.filter(id__in=chunk).exclude(
+                    operation__final_status__isnull=False,
+                    current_status=models.F('operation__final_status')
+                ).update(operation=self, updated_at=timezone.now(), version=bump_version())
+                chunk_orders = Order.objects.filter(id__in=chunk, operation=self)
+                rows = notify.orders_changed(chunk_orders, notify.ORDER_ASSIGNMENT)
+                tracking.record_rows(Order, rows, ('operation_id',), tracking.UPDATE)
+        return assigned
 
-class OperationStatus(models.Model):
+    def _orders_for_update(self, order_ids=None):
+        orders = self.orders.all()
+        if order_ids is not None:
+            orders = orders.filter(id__in=order_ids)
+        return orders
+
+    def _record_orders_status(self, rows, fields=('current_status', 'finalized_at'), user=None):
+        # Una entrada por pedido con los campos que escribió el UPDATE masivo
+        from ..orders.models import Order
+        tracking.record_rows(Order, rows, fields, tracking.STATUS_CHANGE, user=user)
+
+    def set_orders_status(self, status_name, order_ids=None):
+        """
+        Mueve todos los pedidos del operativo (o el subconjunto order_ids) al estado
+        indicado con un único UPDATE. Retorna la cantidad de pedidos actualizados.
+        """
+        from ..events import notify
+        from ..reports import rollups
+
+        now = timezone.now()
+        orders = self._orders_for_update(order_ids).exclude(current_status=status_name)
+        is_final = bool(self.final_status) and status_name == self.final_status
+
+        # Los rollups se calculan sobre el estado previo al UPDATE
+        if is_final:
+            rollups.record_deliveries(orders, 1)
+        elif self.final_status:
+            rollups.record_deliveries(orders.filter(current_status=self.final_status), -1)
+
+        updated = orders.update(
+            current_status=status_name,
+            finalized_at=now if is_final else None,
+            updated_at=now,
+            version=bump_version()
+        )
+        if updated:
+            updated_orders = self._orders_for_update(order_ids).filter(updated_at=now)
+            self._record_orders_status(notify.orders_changed(updated_orders, notify.ORDER_STATUS))
+        return updated
+
+    def advance_orders(self, order_ids=None):
+        """
+        Avanza cada pedido al siguiente estado de la secuencia con un único
+        UPDATE ... SET current_status = CASE ... END. Los pedidos sin estado pasan
+        al primero y los que están en el último estado no cambian.
+        Retorna la cantidad de pedidos actualizados.
+        """
+        from ..events import notify
+        from ..reports import rollups
+
+        names = list(self.statuses.order_by('sort_key').values_list('name', flat=True))
+        if not names:
+            return 0
+
+        now = timezone.now()
+        orders = self._orders_for_update(order_ids).filter(
+            models.Q(current_status__in=names[:-1]) | models.Q(current_status__isnull=True)
+        )
+        # Pedidos que con este avance llegan al último estado
+        reaching_final = (
+            models.Q(current_status=names[-2]) if len(names) > 1 else models.Q(current_status__isnull=True)
+        )
+        rollups.record_deliveries(orders.filter(reaching_final), 1)
+
+        transitions = [
+            models.When(current_status=current, then=models.Value(following))
+            for current, following in zip(names, names[1:])
+        ]
+        updated = orders.update(
+            current_status=models.Case(
+                *transitions,
+                default=models.Value(names[0]),
+                output_field=models.CharField()
+            ),
+            finalized_at=models.Case(
+                models.When(reaching_final, then=models.Value(now)),
+                default=models.F('finalized_at'),
+                output_field=models.DateTimeField()
+            ),
+            updated_at=now,
+            version=bump_version()
+        )
+        if updated:
+            updated_orders = self._orders_for_update(order_ids).filter(updated_at=now)
+            self._record_orders_status(notify.orders_changed(updated_orders, notify.ORDER_STATUS))
+        return updated
+
+    def finalize(self, user=None):
+        """
+        Finaliza el operativo en una sola transacción: mueve todos sus pedidos al
+        último estado y los desactiva con un único UPDATE, marca el operativo como
+        finalizado y registra el cambio en AuditLog (ver audit.tracking). El
+        número de sentencias no depende de la cantidad de pedidos.
+        Retorna la cantidad de pedidos actualizados. Lanza ValueError si el
+        operativo ya está finalizado o no tiene estados.
+        """
+        from ..events import notify
+        from ..reports import rollups
+
+        with transaction.atomic():
+            # El bloqueo también lee el estado vigente del operativo
+            is_finalized, final_status, version = Operation.objects.select_for_update().values_list(
+                'is_finalized', 'final_status', 'version'
+            ).get(pk=self.pk)
+            if is_finalized:
+                raise ValueError("Operation is already finalized.")
+            if not final_status:
+                raise ValueError("Operation has no statuses.")
+
+            now = timezone.now()
+            orders = self.orders.all()
+            rollups.record_deliveries(orders.exclude(current_status=final_status), 1)
+            updated = orders.update(
+                current_status=final_status,
+                # Los pedidos que ya estaban en el estado final conservan su finalized_at
+                finalized_at=models.Case(
+                    models.When(
+                        current_status=final_status, finalized_at__isnull=False, then=models.F('finalized_at')
+                    ),
+                    default=models.Value(now),
+                    output_field=models.DateTimeField()
+                ),
+                is_active=False,
+                updated_at=now,
+                version=bump_version()
+            )
+
+            self.is_finalized = True
+            self.final_status = final_status
+            self.updated_at = now
+            self.version += 1
+            Operation.objects.filter(pk=self.pk).update(
+                is_finalized=True, updated_at=now, version=bump_version()
+            )
+
+            rows = notify.orders_changed(self.orders.filter(updated_at=now), notify.ORDER_STATUS)
+            self._record_orders_status(rows, ('current_status', 'finalized_at', 'is_active'), user=user)
+            tracking.record_version(
+                Operation, self.pk, version + 1, tracking.STATUS_CHANGE,
+                {'is_finalized': False},
+                {'is_finalized': True, 'final_status': final_status, 'orders_updated': updated},
+                user=user
+            )
+            notify.operation_changed(self)
+        return updated
+
+    def optimize_route(self, start=None):
+        """
+        Calcula el orden de visita de los pedidos activos y pendientes del
+        operativo que tienen coordenadas, y lo guarda en route_sequence (1..n)
+        con un único UPDATE. Los demás pedidos del operativo quedan sin secuencia.
+        `start` es la coordenada (lat, lon) de partida, opcional.
+        Retorna (order_ids en orden de visita, distancia en km).
+        """
+        from ..orders.models import Order
+        from . import routing
+
+        stops = self.orders.filter(
+            is_active=True,
+            delivery_latitude__isnull=False,
+            delivery_longitude__isnull=False
+        )
+        if self.final_status:
+            stops = stops.exclude(current_status=self.final_status)
+        stops = list(stops.values_list('id', 'delivery_latitude', 'delivery_longitude', 'route_sequence'))
+
+        route, distance = routing.optimize(
+            [(float(lat), float(lon)) for _, lat, lon, _ in stops],
+            start=start
+        )
+        order_ids = [stops[index][0] for index in route]
+
+        # Solo se escriben las filas cuya secuencia cambia: las paradas con un
+        # número distinto y los pedidos que pierden su secuencia. Las demás
+        # conservan versión y updated_at (ETag / If-Match siguen válidos).
+        current = {order_id: sequence for order_id, _, _, sequence in stops}
+        changed_ids = [
+            order_id for n, order_id in enumerate(order_ids, start=1) if current[order_id] != n
+        ]
+        dropped = models.Q(route_sequence__isnull=False) & ~models.Q(id__in=order_ids)
+        now = timezone.now()
+        self.orders.filter(models.Q(id__in=changed_ids) | dropped).update(
+            route_sequence=models.Case(
+                *[
+                    models.When(id=order_id, then=models.Value(n))
+                    for n, order_id in enumerate(order_ids, start=1)
+                ],
+                default=models.Value(None),
+                output_field=models.PositiveIntegerField()
+            ),
+            updated_at=now,
+            version=bump_version()
+        )
+        # Solo las filas de este UPDATE (no pedidos agregados en paralelo)
+        rows = list(self.orders.filter(updated_at=now).values('id', 'version', 'route_sequence'))
+        tracking.record_rows(Order, rows, ('route_sequence',), tracking.UPDATE)
+        return order_ids, distance
+
+
+class OperationStatusQuerySet(models.QuerySet):
+    def with_position(self):
+        """
+        Agrega `dense_position` (1..n dentro de cada operativo). Solo es correcta
+        si el queryset incluye todos los estados de cada operativo.
+        """
+        return self.annotate(
+            dense_position=models.Window(
+                RowNumber(),
+                partition_by=[models.F('operation_id')],
+                order_by=models.F('sort_key').asc()
+            )
+        )
+
+
+class OperationStatus(VersionedModel, AuditedModel):
     """
     Estados que pertenecen a un operativo.
-    Cada estado tiene un orden dentro de la secuencia del operativo.
+    El orden se guarda como clave dispersa (sort_key, con huecos de
+    STATUS_KEY_STEP): insertar, mover o eliminar un estado escribe una sola
+    fila. La API expone la posición densa 1..n (position).
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    
+
     operation = models.ForeignKey(
         Operation,
         on_delete=models.CASCADE,
         related_name='statuses'
     )
-    
+
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
-    
-    # Orden dentro de la secuencia del operativo
-    order = models.PositiveIntegerField()
-    
+
+    # Clave de orden dentro de la secuencia del operativo (dispersa, ver Operation.status_key_at)
+    sort_key = models.BigIntegerField(blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
-    
+
+    objects = OperationStatusQuerySet.as_manager()
+
     class Meta:
-        ordering = ['operation', 'order']
-        unique_together = ['operation', 'order']
+        ordering = ['operation_id', 'sort_key']
+        constraints = [
+            # Diferible: permite permutar el orden con un solo UPDATE (reorder_statuses)
+            models.UniqueConstraint(
+                fields=['operation', 'sort_key'],
+                name='operation_status_sort_key_uniq',
+                deferrable=models.Deferrable.IMMEDIATE
+            ),
+        ]
         indexes = [
-            models.Index(fields=['operation', 'order']),
+            models.Index(fields=['operation', 'sort_key']),
         ]
-    
+
+    def __str__(self):
+        return f"{self.operation.name} - {self.name} (Orden: {self.position})"
+
+    def save(self, *args, **kwargs):
+        # Sin clave explícita, el estado se agrega al final de la secuencia
+        if self.sort_key is None:
+            self.sort_key = self.operation.next_status_key()
+        super().save(*args, **kwargs)
+
+    @property
+    def position(self):
+        """Posición densa (1..n) del estado; la precalcula with_position()."""
+        if getattr(self, 'dense_position', None) is None:
+            self.dense_position = OperationStatus.objects.filter(
+                operation_id=self.operation_id,
+                sort_key__lt=self.sort_key
+            ).count() + 1
+        return self.dense_position
+
+
+class OperationTemplate(models.Model):
+    """
+    Secuencia de estados reutilizable. Un operativo creado con from_template
+    recibe todos sus estados con un único bulk_create.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    name = models.CharField(max_length=255, unique=True)
+    description = models.TextField(blank=True, null=True)
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='created_operation_templates'
+    )
+
+    is_active = models.BooleanField(default=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    def build_statuses(self, operation):
+        """
+        Estados (sin guardar) del operativo según la plantilla, con claves
+        espaciadas. Usa los estados precargados si existen.
+        """
+        return [
+            OperationStatus(
+                operation=operation,
+                name=template_status.name,
+                description=template_status.description,
+                sort_key=n * STATUS_KEY_STEP
+            )
+            for n, template_status in enumerate(self.statuses.all(), start=1)
+        ]
+
+
+class OperationTemplateStatus(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    template = models.ForeignKey(
+        OperationTemplate,
+        on_delete=models.CASCADE,
+        related_name='statuses'
+    )
+
+    name = models.CharField(max_length=100)
+    description = models.TextField(blank=True, null=True)
+
+    # Posición dentro de la plantilla; se reescribe completa al editarla
+    order = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ['template_id', 'order']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['template', 'order'], name='operation_template_status_order_uniq'
+            ),
+        ]
+
     def __str__(self):
-        return f"{self.operation.name} - {self.name} (Orden: {self.order})"
+        return f"{self.template.name} - {self.name} (Orden: {self.order})"
@@ -0,0 +1,19 @@
+import factory
+
+
+class OperationFactory(factory.django.DjangoModelFactory):
+
+    class Meta:
+        model = 'operations.Operation'
+
+    name = factory.Sequence(lambda n: f'Operativo {n}')
+
+
+class OperationStatusFactory(factory.django.DjangoModelFactory):
+
+    class Meta:
+        model = 'operations.OperationStatus'
+
+    operation = factory.SubFactory(OperationFactory)
+    name = factory.Sequence(lambda n: f'Estado {n}')
+    # Sin sort_key: save() agrega el estado al final de la secuencia
@@ -0,0 +1,389 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db import transaction
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+import pytest
+from ...users.models import User
+from ...users.test.factories import UserFactory
+from ...audit.models import AuditLog
+from ...audit.writer import get_writer
+from ...concurrency import VersionConflict
+from ...orders.models import Order
+from ...orders.test.factories import OrderFactory
+from ..models import Operation, OperationStatus, OperationTemplate
+from .factories import OperationFactory, OperationStatusFactory
+
+
+@pytest.mark.django_db
+class TestOperationStatusesTestCase(APITestCase):
+    """
+    Tests /operations/{id}/statuses operations.
+    """
+
+    def setUp(self):
+        self.user = UserFactory(role=User.Roles.INTERNAL)
+        self.client.force_authenticate(self.user)
+        self.operation = OperationFactory(name='Lima Norte', created_by=self.user)
+        self.url = reverse('operation-statuses', kwargs={'pk': self.operation.pk})
+
+    def test_post_and_delete_requests_keep_final_status(self):
+        self.client.post(self.url, {'name': 'Recogido'})
+        response = self.client.post(self.url, {'name': 'Entregado'})
+        assert response.status_code == status.HTTP_201_CREATED
+        self.operation.refresh_from_db()
+        assert self.operation.final_status == 'Entregado'
+
+        self.client.post(self.url, {'name': 'En ruta', 'order': 2})
+        self.operation.refresh_from_db()
+        assert self.operation.final_status == 'Entregado'
+
+        response = self.client.delete(f"{self.url}?status_id={response.data['id']}")
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        self.operation.refresh_from_db()
+        assert self.operation.final_status == 'En ruta'
+
+    def test_insert_and_delete_touch_only_one_status(self):
+        first = self.client.post(self.url, {'name': 'Recogido'}).data
+        last = self.client.post(self.url, {'name': 'Entregado'}).data
+        last_key = OperationStatus.objects.get(id=last['id']).sort_key
+
+        response = self.client.post(self.url, {'name': 'En ruta', 'order': 2})
+        assert response.data['order'] == 2
+        response = self.client.get(self.url)
+        assert [(row['name'], row['order']) for row in response.data] == [
+            ('Recogido', 1), ('En ruta', 2), ('Entregado', 3)
+        ]
+
+        self.client.delete(f"{self.url}?status_id={first['id']}")
+        response = self.client.get(self.url)
+        assert [(row['name'], row['order']) for row in response.data] == [('En ruta', 1), ('Entregado', 2)]
+        # Las claves de los estados existentes no cambian
+        assert OperationStatus.objects.get(id=last['id']).sort_key == last_key
+
+        detail_url = reverse('operation-status-detail', kwargs={'pk': last['id']})
+        response = self.client.patch(detail_url, {'order': 1})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['order'] == 1
+        self.operation.refresh_from_db()
+        assert self.operation.final_status == 'En ruta'
+
+    def test_insert_without_gap_rebalances_keys(self):
+        OperationStatusFactory(operation=self.operation, name='A', sort_key=1)
+        OperationStatusFactory(operation=self.operation, name='C', sort_key=2)
+        response = self.client.post(self.url, {'name': 'B', 'order': 2})
+        assert response.status_code == status.HTTP_201_CREATED
+        names = list(OperationStatus.objects.filter(operation=self.operation).values_list('name', flat=True))
+        assert names == ['A', 'B', 'C']
+
+        OperationStatus.objects.filter(operation=self.operation, name='B').update(sort_key=1025)
+        call_command('rebalance_status_keys', stdout=StringIO())
+        statuses = OperationStatus.objects.filter(operation=self.operation)
+        keys = list(statuses.values_list('sort_key', flat=True))
+        assert keys == [1024, 2048, 3072]
+
+@pytest.mark.django_db
+class TestOperationCreateTestCase(APITestCase):
+    """
+    Tests /operations create operations.
+    """
+
+    def setUp(self):
+        self.url = reverse('operation-list')
+        self.user = UserFactory(role=User.Roles.INTERNAL)
+        self.client.force_authenticate(self.user)
+
+    def test_post_request_rejects_finalized_orders(self):
+        operation = OperationFactory(name='Anterior', final_status='Entregado')
+        OperationStatusFactory(operation=operation, name='Entregado', sort_key=1)
+        finalized = OrderFactory(order_number='ORD-1', operation=operation, current_status='Entregado')
+        pending = OrderFactory(order_number='ORD-2')
+        assert finalized.is_finalized()
+        assert list(Order.objects.finalized()) == [finalized]
+
+        payload = {'name': 'Nuevo', 'order_ids': [str(finalized.id), str(pending.id)]}
+        response = self.client.post(self.url, payload, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert str(finalized.id) in str(response.data['order_ids'])
+
+        payload = {'name': 'Nuevo', 'order_ids': [str(pending.id)]}
+        response = self.client.post(self.url, payload, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        pending.refresh_from_db()
+        assert str(pending.operation_id) == response.data['id']
+
+    @override_settings(OPERATIONS_ASSIGN_CHUNK_SIZE=2)
+    def test_post_request_validates_and_assigns_order_ids_by_chunks(self):
+        operation = OperationFactory(name='Anterior', final_status='Entregado')
+        finalized = OrderFactory(order_number='ORD-F', operation=operation, current_status='Entregado')
+        pending = [OrderFactory(order_number=f'ORD-{n}') for n in range(5)]
+        missing = '00000000-0000-0000-0000-000000000001'
+
+        order_ids = [str(order.id) for order in pending]
+        with self.assertNumQueries(1):
+            payload = {'name': 'Nuevo', 'order_ids': order_ids + [str(finalized.id), missing]}
+            response = self.client.post(self.url, payload, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert len(response.data['order_ids']) == 2
+        assert missing in response.data['order_ids'][0]
+        assert str(finalized.id) in response.data['order_ids'][1]
+
+        response = self.client.post(self.url, {'name': 'Nuevo', 'order_ids': order_ids}, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Order.objects.filter(operation_id=response.data['id']).count() == 5
+        assert operation.assign_orders([finalized.id, pending[0].id], chunk_size=1) == 1
+
+    def test_post_request_from_template_clones_statuses(self):
+        names = [f'Estado {n}' for n in range(1, 13)]
+        response = self.client.post(
+            reverse('operation-template-list'),
+            {'name': 'Reparto', 'statuses': [{'name': name} for name in names]},
+            format='json'
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        template = OperationTemplate.objects.get(id=response.data['id'])
+        assert [row['order'] for row in response.data['statuses']] == list(range(1, 13))
+
+        # Consultas constantes sin importar la cantidad de estados
+        with self.assertNumQueries(7):
+            response = self.client.post(
+                self.url, {'name': 'Nuevo', 'from_template': str(template.id)}, format='json'
+            )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [(row['name'], row['order']) for row in response.data['statuses']] == [
+            (name, n) for n, name in enumerate(names, start=1)
+        ]
+        assert response.data['final_status'] == 'Estado 12'
+
+        template.is_active = False
+        template.save()
+        response = self.client.post(
+            self.url, {'name': 'Otro', 'from_template': str(template.id)}, format='json'
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestOperationOrdersStatusTestCase(APITestCase):
+    """
+    Tests /operations/{id}/set-status and /operations/{id}/advance operations.
+    """
+
+    def setUp(self):
+        self.user = UserFactory(role=User.Roles.INTERNAL)
+        self.client.force_authenticate(self.user)
+        self.operation = OperationFactory(name='Lima Norte')
+        self.statuses = [
+            OperationStatusFactory(operation=self.operation, name=name, sort_key=n)
+            for n, name in enumerate(['Recogido', 'En ruta', 'Entregado'], start=1)
+        ]
+        self.orders = [
+            OrderFactory(order_number=f'ORD-{n}', operation=self.operation)
+            for n in range(3)
+        ]
+        OrderFactory(order_number='ORD-OTHER')
+
+    def current_statuses(self):
+        orders = Order.objects.filter(operation=self.operation).order_by('order_number')
+        return [order.current_status for order in orders]
+
+    def test_post_set_status_updates_all_or_given_orders(self):
+        url = reverse('operation-set-status', kwargs={'pk': self.operation.pk})
+        response = self.client.post(url, {'status_id': str(self.statuses[1].id)}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['updated'] == 3
+        assert self.current_statuses() == ['En ruta'] * 3
+
+        payload = {'status_id': str(self.statuses[2].id), 'order_ids': [str(self.orders[0].id)]}
+        response = self.client.post(url, payload, format='json')
+        assert response.data['updated'] == 1
+        assert self.current_statuses() == ['Entregado', 'En ruta', 'En ruta']
+        assert Order.objects.get(order_number='ORD-OTHER').current_status is None
+
+    def test_post_set_status_with_foreign_status_fails(self):
+        other = OperationFactory(name='Otro')
+        other_status = OperationStatusFactory(operation=other, name='Recogido', sort_key=1)
+        url = reverse('operation-set-status', kwargs={'pk': self.operation.pk})
+        response = self.client.post(url, {'status_id': str(other_status.id)}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_post_advance_moves_each_order_to_its_next_status(self):
+        Order.objects.filter(id=self.orders[1].id).update(current_status='Recogido')
+        Order.objects.filter(id=self.orders[2].id).update(current_status='Entregado')
+        url = reverse('operation-advance', kwargs={'pk': self.operation.pk})
+        response = self.client.post(url, {}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['updated'] == 2
+        assert self.current_statuses() == ['Recogido', 'En ruta', 'Entregado']
+
+
+@pytest.mark.django_db
+class TestOperationOptimizeRouteTestCase(APITestCase):
+    """
+    Tests /operations/{id}/optimize-route operations.
+    """
+
+    def setUp(self):
+        self.user = UserFactory(role=User.Roles.INTERNAL)
+        self.client.force_authenticate(self.user)
+        self.operation = OperationFactory(name='Lima Norte')
+        self.url = reverse('operation-optimize-route', kwargs={'pk': self.operation.pk})
+
+    def test_post_request_stores_sequence_along_the_route(self):
+        # Paradas sobre una misma línea, creadas en desorden
+        for n, longitude in enumerate(['-77.03', '-77.01', '-77.04', '-77.02']):
+            OrderFactory(
+                order_number=f'ORD-{n}', operation=self.operation,
+                delivery_latitude='-12.050000', delivery_longitude=longitude
+            )
+        OrderFactory(order_number='ORD-NOCOORDS', operation=self.operation, route_sequence=9)
+
+        payload = {'start_latitude': '-12.05', 'start_longitude': '-77.05'}
+        response = self.client.post(self.url, payload, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['distance_km'] > 0
+
+        sequenced = Order.objects.filter(
+            operation=self.operation, route_sequence__isnull=False
+        ).order_by('route_sequence')
+        assert [order.order_number for order in sequenced] == ['ORD-2', 'ORD-0', 'ORD-3', 'ORD-1']
+        route = [str(order_id) for order_id in response.data['order_ids']]
+        assert [str(order.id) for order in sequenced] == route
+        assert Order.objects.get(order_number='ORD-NOCOORDS').route_sequence is None
+
+        # Repetir la misma ruta no escribe ningún pedido
+        versions = dict(Order.objects.values_list('id', 'version'))
+        response = self.client.post(self.url, payload, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert dict(Order.objects.values_list('id', 'version')) == versions
+
+    def test_post_request_with_partial_start_fails(self):
+        response = self.client.post(self.url, {'start_latitude': '-12.05'}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestOperationStatusesReorderTestCase(APITestCase):
+    """
+    Tests PUT /operations/{id}/statuses with the full status_ids sequence.
+    """
+
+    def setUp(self):
+        self.user = UserFactory(role=User.Roles.INTERNAL)
+        self.client.force_authenticate(self.user)
+        self.operation = OperationFactory(name='Lima Norte', final_status='S39')
+        self.statuses = OperationStatus.objects.bulk_create([
+            OperationStatus(operation=self.operation, name=f'S{n}', sort_key=n + 1) for n in range(40)
+        ])
+        self.url = reverse('operation-statuses', kwargs={'pk': self.operation.pk})
+
+    def test_put_request_applies_sequence_in_constant_queries(self):
+        status_ids = [str(status_obj.id) for status_obj in reversed(self.statuses)]
+        # Constante: no depende de la cantidad de estados (2 son las de rollups al cambiar el estado final
+        # y 1 la relectura de sort_key para AuditLog)
+        with self.assertNumQueries(12):
+            response = self.client.put(self.url, {'status_ids': status_ids}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert [row['name'] for row in response.data] == [f'S{n}' for n in reversed(range(40))]
+        self.operation.refresh_from_db()
+        assert self.operation.final_status == 'S0'
+
+    def test_put_request_with_incomplete_sequence_fails(self):
+        status_ids = [str(status_obj.id) for status_obj in self.statuses[1:]]
+        response = self.client.put(self.url, {'status_ids': status_ids}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        keys = OperationStatus.objects.filter(operation=self.operation).values_list('sort_key', flat=True)
+        assert list(keys) == list(range(1, 41))
+
+
+@pytest.mark.django_db
+class TestOperationFinalizeTestCase(APITestCase):
+    """
+    Tests /operations/{id}/finalize operations.
+    """
+
+    def setUp(self):
+        self.user = UserFactory(role=User.Roles.INTERNAL)
+        self.client.force_authenticate(self.user)
+        self.operation = OperationFactory(name='Lima Norte')
+        for n, name in enumerate(['Recogido', 'Entregado'], start=1):
+            OperationStatusFactory(operation=self.operation, name=name, sort_key=n)
+        self.operation.refresh_final_status()
+        Order.objects.bulk_create(
+            OrderFactory.build_batch(50, operation=self.operation, current_status='Recogido')
+        )
+        self.url = reverse('operation-finalize', kwargs={'pk': self.operation.pk})
+
+    def test_post_request_finalizes_operation_and_orders_in_constant_queries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(10):
+                response = self.client.post(self.url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['updated'] == 50
+        get_writer().flush()
+
+        self.operation.refresh_from_db()
+        assert self.operation.is_finalized
+        orders = Order.objects.filter(operation=self.operation)
+        assert set(orders.values_list('current_status', 'is_active')) == {('Entregado', False)}
+        assert not orders.filter(finalized_at__isnull=True).exists()
+        assert AuditLog.objects.get(entity_id=self.operation.pk).new_data['orders_updated'] == 50
+
+        response = self.client.post(self.url)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_patch_request_cannot_change_is_finalized(self):
+        url = reverse('operation-detail', kwargs={'pk': self.operation.pk})
+        response = self.client.patch(url, {'is_finalized': True}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        self.operation.refresh_from_db()
+        assert not self.operation.is_finalized
+
+
+@pytest.mark.django_db
+class TestOperationOptimisticConcurrencyTestCase(APITestCase):
+    """
+    Tests If-Match / version checks on operation updates.
+    """
+
+    def setUp(self):
+        self.user = UserFactory(role=User.Roles.INTERNAL)
+        self.client.force_authenticate(self.user)
+        self.operation = OperationFactory(name='Lima Norte', created_by=self.user)
+        self.url = reverse('operation-detail', kwargs={'pk': self.operation.pk})
+
+    def test_patch_request_checks_if_match(self):
+        etag = self.client.get(self.url)['ETag']
+        assert etag.startswith('"1.')
+
+        response = self.client.patch(self.url, {'name': 'Lima Sur'}, format='json', HTTP_IF_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] == '"2"'
+        assert response.data['version'] == 2
+
+        # Otra escritura con la versión ya reemplazada no sobrescribe nada
+        response = self.client.patch(self.url, {'name': 'Lima Este'}, format='json', HTTP_IF_MATCH=etag)
+        assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+        self.operation.refresh_from_db()
+        assert self.operation.name == 'Lima Sur'
+
+    def test_save_of_stale_instance_raises_conflict(self):
+        stale = Operation.objects.get(pk=self.operation.pk)
+        self.operation.name = 'Lima Sur'
+        self.operation.save()
+
+        stale.name = 'Lima Este'
+        with pytest.raises(VersionConflict), transaction.atomic():
+            stale.save()
+        self.operation.refresh_from_db()
+        assert (self.operation.name, self.operation.version) == ('Lima Sur', 2)
+
+        # Los cambios masivos también invalidan la versión leída
+        self.operation.set_orders_status('Recogido')
+        OperationStatusFactory(operation=self.operation, name='Entregado')
+        self.operation.refresh_final_status()
+        self.operation.name = 'Lima Oeste'
+        self.operation.save()
+        assert Operation.objects.get(pk=self.operation.pk).version == 4
@@ -2,11 +2,13 @@ from rest_framework.routers import DefaultRouter
 from .api.views import (
     OperationViewSet,
     OperationStatusViewSet,
+    OperationTemplateViewSet,
 )
 
 router = DefaultRouter()
 router.register('operations', OperationViewSet, basename='operation')
 router.register('operation-statuses', OperationStatusViewSet, basename='operation-status')
+router.register('operation-templates', OperationTemplateViewSet, basename='operation-template')
 
 urlpatterns = router.urls
 
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Order
+from .models import ArchivedOrder, Order
 
 
 @admin.register(Order)
@@ -16,7 +16,10 @@ class OrderAdmin(admin.ModelAdmin):
         'is_active', 'created_at', 'client', 'operation',
         'delivery_country', 'delivery_region', 'current_status'
     )
-    readonly_fields = ('id', 'created_at', 'updated_at', 'created_by', 'current_status', 'operation')
+    readonly_fields = (
+        'id', 'created_at', 'updated_at', 'created_by', 'current_status', 'finalized_at', 'operation',
+        'route_sequence'
+    )
     fieldsets = (
         (None, {
             'fields': ('id', 'order_number', 'description')
@@ -24,11 +27,12 @@ class OrderAdmin(admin.ModelAdmin):
         ('Información de entrega', {
             'fields': (
                 'delivery_address', 'delivery_city',
-                'delivery_region', 'delivery_country'
+                'delivery_region', 'delivery_country',
+                'delivery_latitude', 'delivery_longitude'
             )
         }),
         ('Asignaciones', {
-            'fields': ('client', 'operation', 'current_status'),
+            'fields': ('client', 'operation', 'route_sequence', 'current_status', 'finalized_at'),
             'description': 'El campo operation solo puede ser asignado por ADMIN o INTERNAL al crear/actualizar operativos.'
         }),
         ('Información adicional', {
@@ -40,3 +44,18 @@ class OrderAdmin(admin.ModelAdmin):
     )
     autocomplete_fields = ['client', 'created_by']
     ordering = ['-created_at']
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    list_display = ('order_number', 'client', 'operation', 'current_status', 'created_at', 'archived_at')
+    search_fields = ('order_number', 'client__business_name', 'operation__name')
+    list_filter = ('archived_at', 'client')
+    ordering = ['-created_at']
+
+    # El archivo es de solo lectura; los pedidos llegan vía archive_orders
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
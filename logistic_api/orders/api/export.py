@@ -0,0 +1,36 @@
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Columnas exportadas (nombres de .values())
+EXPORT_FIELDS = (
+    'id', 'order_number', 'description',
+    'delivery_address', 'delivery_city', 'delivery_region', 'delivery_country',
+    'client_id', 'client__business_name', 'operation_id', 'operation__name',
+    'current_status', 'notes', 'is_active', 'created_at', 'updated_at',
+)
+
+
+class Echo:
+    """Pseudo-buffer para csv.writer: devuelve la línea en lugar de almacenarla."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', iter_csv),
+    'ndjson': ('application/x-ndjson', iter_ndjson),
+}
@@ -0,0 +1,59 @@
+from django_filters import rest_framework as filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from ..models import ArchivedOrder, Order
+
+
+class OrderFilter(filters.FilterSet):
+    """
+    Filtros del listado de pedidos.
+    Las combinaciones habituales están cubiertas por índices compuestos en Order.Meta.
+    """
+    # UUIDFilter en lugar de ModelChoiceFilter para no consultar la FK al validar
+    client = filters.UUIDFilter()
+    operation = filters.UUIDFilter()
+    # ?created_at_after=...&created_at_before=...
+    created_at = filters.IsoDateTimeFromToRangeFilter()
+
+    class Meta:
+        model = Order
+        fields = ['client', 'operation', 'current_status', 'delivery_city', 'is_active', 'created_at']
+
+
+class ArchivedOrderFilter(OrderFilter):
+    class Meta(OrderFilter.Meta):
+        model = ArchivedOrder
+
+
+class OrderSearchFilter(BaseFilterBackend):
+    """
+    Búsqueda por ?search= sobre order_number, delivery_address y razón social
+    del cliente, ordenada por relevancia (ver OrderQuerySet.search).
+    """
+    search_param = 'search'
+    # pg_trgm solo puede usar el índice con términos de al menos 3 caracteres
+    min_length = 3
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '').strip()
+        if not term:
+            return queryset
+
+        if len(term) < self.min_length:
+            raise ValidationError(
+                {self.search_param: f"Search term must have at least {self.min_length} characters."}
+            )
+
+        return queryset.search(term)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.search_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Partial match on order number, delivery address or client business name, '
+                               'ranked by relevance.',
+                'schema': {'type': 'string', 'minLength': self.min_length},
+            },
+        ]
@@ -1,40 +1,84 @@
+from decimal import Decimal
+from django.conf import settings
 from django.db import transaction
 from rest_framework import serializers
-from ..models import Order
-from ...profile.models import ClientProfile
+from ..models import ArchivedOrder, Order
+from ...profile.models import ClientProfile, InternalClientProfile
 from ...operations.models import Operation
+from ...audit import tracking
+from ...reports import rollups
+from .. import numbers
 
 
 class OrderSerializer(serializers.ModelSerializer):
     client_business_name = serializers.CharField(source='client.business_name', read_only=True)
     operation_name = serializers.CharField(source='operation.name', read_only=True)
-    
+
     class Meta:
         model = Order
         fields = '__all__'
-        read_only_fields = ('id', 'created_at', 'updated_at', 'created_by', 'current_status')
+        read_only_fields = (
+            'id', 'created_at', 'updated_at', 'created_by', 'current_status', 'finalized_at', 'route_sequence'
+        )
+
+
+class ArchivedOrderSerializer(OrderSerializer):
+    class Meta(OrderSerializer.Meta):
+        model = ArchivedOrder
+        read_only_fields = OrderSerializer.Meta.read_only_fields + ('archived_at',)
+
+
+def validate_order_number_format(value):
+    # Evita colisiones con los números que asigna el servidor (ver orders.numbers)
+    if numbers.is_allocated_format(value):
+        raise serializers.ValidationError(
+            "This format is reserved for server-assigned numbers, omit order_number to get one."
+        )
+    return value
+
+
+def validate_order_number_not_archived(value):
+    # Los pedidos archivados conservan su order_number (ver BulkCreateOrderSerializer)
+    if ArchivedOrder.objects.filter(order_number=value).exists():
+        raise serializers.ValidationError("Order with this order_number already exists.")
+    return value
 
 
 class CreateOrderSerializer(serializers.Serializer):
-    order_number = serializers.CharField()
+    # Si se omite, el servidor asigna uno con el prefijo del cliente (ver orders.numbers)
+    order_number = serializers.CharField(required=False)
     client_id = serializers.UUIDField()
     description = serializers.CharField(required=False, allow_blank=True)
     delivery_address = serializers.CharField()
     delivery_city = serializers.CharField(required=False, allow_blank=True)
     delivery_region = serializers.CharField(required=False, allow_blank=True)
     delivery_country = serializers.CharField(required=False, allow_blank=True)
+    delivery_latitude = serializers.DecimalField(
+        max_digits=9, decimal_places=6, min_value=Decimal('-90'), max_value=Decimal('90'),
+        required=False, allow_null=True
+    )
+    delivery_longitude = serializers.DecimalField(
+        max_digits=9, decimal_places=6, min_value=Decimal('-180'), max_value=Decimal('180'),
+        required=False, allow_null=True
+    )
     notes = serializers.CharField(required=False, allow_blank=True)
 
+    def validate_order_number(self, value):
+        validate_order_number_format(value)
+        if Order.objects.filter(order_number=value).exists():
+            raise serializers.ValidationError("Order with this order_number already exists.")
+        return validate_order_number_not_archived(value)
+
     def validate_client_id(self, value):
         request = self.context['request']
         user = request.user
-        
+
         # Validar que el client_id existe
         try:
             client = ClientProfile.objects.get(id=value)
         except ClientProfile.DoesNotExist:
             raise serializers.ValidationError("Client profile not found.")
-        
+
         # Validar que el usuario del token coincide con el client_id
         if user.role == 'client':
             try:
@@ -43,7 +87,7 @@ class CreateOrderSerializer(serializers.Serializer):
                     raise serializers.ValidationError("You can only create orders for your own client profile.")
             except ClientProfile.DoesNotExist:
                 raise serializers.ValidationError("You don't have an associated client profile.")
-        
+
         elif user.role == 'internal_client':
             try:
                 user_client = user.internal_client_profile.client
@@ -53,7 +97,7 @@ class CreateOrderSerializer(serializers.Serializer):
                 raise serializers.ValidationError("You don't have an associated client profile.")
         else:
             raise serializers.ValidationError("Only clients and internal clients can create orders.")
-        
+
         return value
 
     @transaction.atomic
@@ -61,22 +105,27 @@ class CreateOrderSerializer(serializers.Serializer):
         request = self.context['request']
         user = request.user
         client_id = validated_data.pop('client_id')
-        
+
         # Obtener el cliente (ya validado en validate_client_id)
         client = ClientProfile.objects.get(id=client_id)
-        
+
+        order_number = validated_data.get('order_number') or numbers.allocate_order_numbers(client)[0]
+
         order = Order.objects.create(
-            order_number=validated_data['order_number'],
+            order_number=order_number,
             description=validated_data.get('description', ''),
             delivery_address=validated_data['delivery_address'],
             delivery_city=validated_data.get('delivery_city', ''),
             delivery_region=validated_data.get('delivery_region', ''),
             delivery_country=validated_data.get('delivery_country', ''),
+            delivery_latitude=validated_data.get('delivery_latitude'),
+            delivery_longitude=validated_data.get('delivery_longitude'),
             notes=validated_data.get('notes', ''),
             created_by=user,
             client=client
         )
-        
+        rollups.record_orders_created([order])
+
         return order
 
 
@@ -86,6 +135,172 @@ class UpdateOrderSerializer(serializers.ModelSerializer):
         fields = [
             'order_number', 'description', 'delivery_address',
             'delivery_city', 'delivery_region', 'delivery_country',
-            'notes', 'is_active'
+            'delivery_latitude', 'delivery_longitude', 'notes', 'is_active'
         ]
 
+    def validate_order_number(self, value):
+        if self.instance is not None and value == self.instance.order_number:
+            return value
+        validate_order_number_format(value)
+        return validate_order_number_not_archived(value)
+
+
+class BulkOrderItemSerializer(CreateOrderSerializer):
+    order_number = serializers.CharField(max_length=50, required=False)
+
+    def validate_client_id(self, value):
+        # La pertenencia del cliente se valida una sola vez para todo el lote
+        return value
+
+    def validate_order_number(self, value):
+        # La unicidad se valida con una sola consulta para todo el lote
+        return validate_order_number_format(value)
+
+
+class BulkCreateOrderSerializer(serializers.Serializer):
+    """
+    Crea pedidos en lote.
+    El cliente del usuario se resuelve una sola vez, la unicidad de order_number
+    se valida con una única consulta IN y los pedidos válidos se insertan con
+    bulk_create por bloques. Las filas inválidas se reportan por índice sin
+    abortar el resto del lote.
+    """
+    orders = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.ORDERS_BULK_MAX_SIZE
+    )
+
+    def validate(self, attrs):
+        user = self.context['request'].user
+
+        if user.role == 'client':
+            try:
+                attrs['client'] = user.client_profile
+            except ClientProfile.DoesNotExist:
+                raise serializers.ValidationError("You don't have an associated client profile.")
+        elif user.role == 'internal_client':
+            try:
+                attrs['client'] = user.internal_client_profile.client
+            except InternalClientProfile.DoesNotExist:
+                raise serializers.ValidationError("You don't have an associated client profile.")
+        else:
+            raise serializers.ValidationError("Only clients and internal clients can create orders.")
+
+        return attrs
+
+    def create(self, validated_data):
+        user = self.context['request'].user
+        client = validated_data['client']
+        errors = []
+        pending = []
+
+        # Validación por fila (sin consultas a la base de datos)
+        for index, row in enumerate(validated_data['orders']):
+            item_serializer = BulkOrderItemSerializer(data=row, context=self.context)
+            if not item_serializer.is_valid():
+                errors.append({'index': index, 'errors': item_serializer.errors})
+                continue
+
+            data = item_serializer.validated_data
+            if data['client_id'] != client.id:
+                errors.append({
+                    'index': index,
+                    'errors': {'client_id': ["You can only create orders for your own client profile."]}
+                })
+                continue
+
+            pending.append((index, data))
+
+        # Filas sin order_number: se asignan todos con una sola reserva de bloques
+        unnumbered = [data for _, data in pending if not data.get('order_number')]
+        if unnumbered:
+            allocated = numbers.allocate_order_numbers(client, len(unnumbered))
+            for data, order_number in zip(unnumbered, allocated):
+                data['order_number'] = order_number
+
+        # Unicidad de order_number: duplicados dentro del lote y una consulta IN por tabla
+        seen_numbers = set()
+        unique_pending = []
+        for index, data in pending:
+            if data['order_number'] in seen_numbers:
+                errors.append({
+                    'index': index,
+                    'errors': {'order_number': ["Duplicated order_number in this batch."]}
+                })
+                continue
+            seen_numbers.add(data['order_number'])
+            unique_pending.append((index, data))
+
+        existing_numbers = set()
+        if seen_numbers:
+            # Los pedidos archivados conservan su order_number
+            for model in (Order, ArchivedOrder):
+                existing_numbers.update(
+                    model.objects.filter(order_number__in=seen_numbers).values_list('order_number', flat=True)
+                )
+
+        to_create = []
+        for index, data in unique_pending:
+            if data['order_number'] in existing_numbers:
+                errors.append({
+                    'index': index,
+                    'errors': {'order_number': ["Order with this order_number already exists."]}
+                })
+                continue
+
+            to_create.append((index, Order(
+                order_number=data['order_number'],
+                description=data.get('description', ''),
+                delivery_address=data['delivery_address'],
+                delivery_city=data.get('delivery_city', ''),
+                delivery_region=data.get('delivery_region', ''),
+                delivery_country=data.get('delivery_country', ''),
+                delivery_latitude=data.get('delivery_latitude'),
+                delivery_longitude=data.get('delivery_longitude'),
+                notes=data.get('notes', ''),
+                created_by=user,
+                client=client
+            )))
+
+        # Inserción por bloques; ON CONFLICT DO NOTHING cubre la carrera con
+        # inserciones concurrentes y se reporta como error de la fila
+        created = []
+        batch_size = settings.ORDERS_BULK_BATCH_SIZE
+        for start in range(0, len(to_create), batch_size):
+            chunk = to_create[start:start + batch_size]
+            with transaction.atomic():
+                Order.objects.bulk_create([order for _, order in chunk], ignore_conflicts=True)
+                inserted_ids = set(
+                    Order.objects.filter(id__in=[order.id for _, order in chunk]).values_list('id', flat=True)
+                )
+                rollups.record_orders_created(order for _, order in chunk if order.id in inserted_ids)
+                tracking.record_created(order for _, order in chunk if order.id in inserted_ids)
+
+            for index, order in chunk:
+                if order.id in inserted_ids:
+                    created.append((index, order))
+                else:
+                    errors.append({
+                        'index': index,
+                        'errors': {'order_number': ["Order with this order_number already exists."]}
+                    })
+
+        errors.sort(key=lambda error: error['index'])
+        return {'created': created, 'errors': errors}
+
+
+class BulkCreatedOrderSerializer(serializers.Serializer):
+    index = serializers.IntegerField()
+    id = serializers.UUIDField()
+    order_number = serializers.CharField()
+
+
+class BulkRowErrorSerializer(serializers.Serializer):
+    index = serializers.IntegerField()
+    errors = serializers.DictField()
+
+
+class BulkCreateOrderResultSerializer(serializers.Serializer):
+    created = BulkCreatedOrderSerializer(many=True)
+    errors = BulkRowErrorSerializer(many=True)
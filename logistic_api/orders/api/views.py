@@ -1,15 +1,33 @@
-from drf_spectacular.utils import extend_schema, extend_schema_view
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
 from rest_framework import mixins, viewsets, status
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied
+from ...events.brokers import get_broker
+from ...events.stream import EventStreamRenderer, event_stream
+from ...idempotency.decorators import IDEMPOTENCY_KEY_PARAMETER, idempotent
+from ...mixins import IF_MATCH_PARAMETER, ConditionalGetMixin, OptimisticConcurrencyMixin
+from ...pagination import PageNumberOrCursorPagination
 from ...users.models import User
-from ...profile.models import ClientProfile
-from ..models import Order
+from ...profile.models import ClientProfile, InternalClientProfile
+from ..models import ArchivedOrder, Order
+from .export import EXPORT_FIELDS, EXPORT_FORMATS
+from .filters import ArchivedOrderFilter, OrderFilter, OrderSearchFilter
 from .serializers import (
     OrderSerializer,
+    ArchivedOrderSerializer,
     CreateOrderSerializer,
     UpdateOrderSerializer,
+    BulkOrderItemSerializer,
+    BulkCreateOrderSerializer,
+    BulkCreateOrderResultSerializer,
 )
 
 
@@ -17,10 +35,15 @@ from .serializers import (
     list=extend_schema(tags=['Orders V1']),
     retrieve=extend_schema(tags=['Orders V1']),
     create=extend_schema(tags=['Orders V1']),
-    update=extend_schema(tags=['Orders V1']),
-    partial_update=extend_schema(tags=['Orders V1']),
+    update=extend_schema(tags=['Orders V1'], parameters=[IF_MATCH_PARAMETER]),
+    partial_update=extend_schema(tags=['Orders V1'], parameters=[IF_MATCH_PARAMETER]),
+    bulk=extend_schema(tags=['Orders V1']),
+    export=extend_schema(tags=['Orders V1']),
+    events=extend_schema(tags=['Orders V1']),
 )
 class OrderViewSet(
+    ConditionalGetMixin,
+    OptimisticConcurrencyMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -29,69 +52,113 @@ class OrderViewSet(
 ):
     queryset = Order.objects.select_related('client', 'operation', 'created_by')
     permission_classes = [IsAuthenticated]
+    pagination_class = PageNumberOrCursorPagination
+    filter_backends = [DjangoFilterBackend, OrderSearchFilter]
+    # OrderSerializer expone client.business_name y operation.name
+    conditional_timestamp_fields = ('updated_at', 'client.updated_at', 'operation.updated_at')
+    # Acciones de lectura que aceptan ?archived=true para leer del archivo
+    archived_actions = ['list', 'retrieve', 'export']
+
+    def is_archived_request(self):
+        request = getattr(self, 'request', None)
+        if request is None or self.action not in self.archived_actions:
+            return False
+        return request.query_params.get('archived') == 'true'
+
+    @property
+    def filterset_class(self):
+        return ArchivedOrderFilter if self.is_archived_request() else OrderFilter
 
     def get_serializer_class(self):
         if self.action == "create":
             return CreateOrderSerializer
         elif self.action in ["update", "partial_update"]:
             return UpdateOrderSerializer
+        elif self.is_archived_request():
+            return ArchivedOrderSerializer
         return OrderSerializer
 
     def get_queryset(self):
         user = self.request.user
-        
+
+        if self.is_archived_request():
+            queryset = ArchivedOrder.objects.select_related('client', 'operation', 'created_by')
+        else:
+            queryset = self.queryset
+
         if user.role == User.Roles.ADMIN:
-            return self.queryset.all()
+            return queryset.all()
         elif user.role == User.Roles.INTERNAL:
-            return self.queryset.all()
+            return queryset.all()
         elif user.role == User.Roles.CLIENT:
             try:
                 client_profile = user.client_profile
-                return self.queryset.filter(client=client_profile)
+                return queryset.filter(client=client_profile)
             except ClientProfile.DoesNotExist:
-                return self.queryset.none()
+                return queryset.none()
         elif user.role == User.Roles.INTERNAL_CLIENT:
             try:
                 client_profile = user.internal_client_profile.client
-                return self.queryset.filter(client=client_profile)
+                return queryset.filter(client=client_profile)
             except:
-                return self.queryset.none()
+                return queryset.none()
         elif user.role == User.Roles.DRIVER:
-            # Drivers solo ven pedidos de sus operativos
+            # Drivers solo ven pedidos de sus operativos (un solo JOIN, sin cargar el perfil)
+            return queryset.filter(operation__driver__user=user)
+        else:
+            raise PermissionDenied("You do not have permission to access this resource.")
+
+    def get_event_scope(self):
+        """
+        Filtro de eventos equivalente a get_queryset: None para ver todos, o
+        los valores de scope que deben coincidir (ver events.notify).
+        """
+        user = self.request.user
+
+        if user.role in [User.Roles.ADMIN, User.Roles.INTERNAL]:
+            return None
+        elif user.role == User.Roles.CLIENT:
             try:
-                driver_profile = user.driver_profile
-                operations = driver_profile.operations.all()
-                return self.queryset.filter(operation__in=operations)
-            except:
-                return self.queryset.none()
+                return {'client_id': str(user.client_profile.id)}
+            except ClientProfile.DoesNotExist:
+                return {'client_id': ''}
+        elif user.role == User.Roles.INTERNAL_CLIENT:
+            try:
+                return {'client_id': str(user.internal_client_profile.client.id)}
+            except InternalClientProfile.DoesNotExist:
+                return {'client_id': ''}
+        elif user.role == User.Roles.DRIVER:
+            return {'driver_user_id': str(user.id)}
         else:
             raise PermissionDenied("You do not have permission to access this resource.")
 
     @extend_schema(
         request=CreateOrderSerializer,
         responses={201: OrderSerializer},
-        description="Create a new order"
+        description="Create a new order",
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
     )
+    @idempotent
     def create(self, request, *args, **kwargs):
         user = request.user
-        
+
         if user.role not in [User.Roles.CLIENT, User.Roles.INTERNAL_CLIENT]:
             raise PermissionDenied("Only clients and internal clients can create orders.")
-        
+
         input_serializer = CreateOrderSerializer(
             data=request.data,
             context={'request': request}
         )
         input_serializer.is_valid(raise_exception=True)
         order = input_serializer.save()
-        
+
         output_serializer = OrderSerializer(order)
         return Response(output_serializer.data, status=status.HTTP_201_CREATED)
 
     def update(self, request, *args, **kwargs):
         order = self.get_object()
         user = request.user
-        
+
         # Solo el cliente propietario, ADMIN o INTERNAL pueden actualizar
         if user.role not in [User.Roles.ADMIN, User.Roles.INTERNAL]:
             if user.role in [User.Roles.CLIENT, User.Roles.INTERNAL_CLIENT]:
@@ -101,21 +168,131 @@ class OrderViewSet(
                         client = user.client_profile
                     else:
                         client = user.internal_client_profile.client
-                    
+
                     if order.client != client:
                         raise PermissionDenied("You can only update your own orders.")
                 except:
                     raise PermissionDenied("You do not have permission to update this order.")
             else:
                 raise PermissionDenied("You do not have permission to update orders.")
-        
+
         input_serializer = UpdateOrderSerializer(
             order,
             data=request.data,
             partial=kwargs.get('partial', False)
         )
         input_serializer.is_valid(raise_exception=True)
+        self.check_if_match(order)
         order = input_serializer.save()
-        
+
         output_serializer = OrderSerializer(order)
         return Response(output_serializer.data, status=status.HTTP_200_OK)
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='bulk'
+    )
+    @extend_schema(
+        tags=['Orders V1'],
+        request=BulkOrderItemSerializer(many=True),
+        responses={201: BulkCreateOrderResultSerializer, 400: BulkCreateOrderResultSerializer},
+        description="Create orders in bulk from a JSON array. Invalid rows are reported by index "
+                    "without failing the rest of the batch."
+    )
+    def bulk(self, request):
+        user = request.user
+
+        if user.role not in [User.Roles.CLIENT, User.Roles.INTERNAL_CLIENT]:
+            raise PermissionDenied("Only clients and internal clients can create orders.")
+
+        if not isinstance(request.data, list):
+            return Response(
+                {"detail": "Expected a JSON array of orders."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        input_serializer = BulkCreateOrderSerializer(
+            data={'orders': request.data},
+            context={'request': request}
+        )
+        input_serializer.is_valid(raise_exception=True)
+        result = input_serializer.save()
+
+        output_serializer = BulkCreateOrderResultSerializer({
+            'created': [
+                {'index': index, 'id': order.id, 'order_number': order.order_number}
+                for index, order in result['created']
+            ],
+            'errors': result['errors'],
+        })
+        response_status = status.HTTP_201_CREATED if result['created'] else status.HTTP_400_BAD_REQUEST
+        return Response(output_serializer.data, status=response_status)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='export'
+    )
+    @extend_schema(
+        tags=['Orders V1'],
+        parameters=[
+            OpenApiParameter(
+                'file_format',
+                OpenApiTypes.STR,
+                enum=list(EXPORT_FORMATS),
+                description="Export format (default: csv)"
+            ),
+        ],
+        responses={(200, 'text/csv'): OpenApiTypes.STR, (200, 'application/x-ndjson'): OpenApiTypes.STR},
+        description="Stream every order visible to the user (same filters as the list) as CSV or NDJSON"
+    )
+    def export(self, request):
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {"detail": f"Unsupported file_format. Use one of: {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        content_type, iter_rows = EXPORT_FORMATS[file_format]
+        # Cursor de servidor sobre .values(): memoria constante sin importar el total de filas
+        rows = self.filter_queryset(self.get_queryset()).values(*EXPORT_FIELDS).iterator(
+            chunk_size=settings.ORDERS_EXPORT_CHUNK_SIZE
+        )
+
+        response = StreamingHttpResponse(iter_rows(rows), content_type=content_type)
+        filename = f"orders-{timezone.now():%Y%m%d%H%M%S}.{file_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='events',
+        renderer_classes=[EventStreamRenderer, JSONRenderer]
+    )
+    @extend_schema(
+        tags=['Orders V1'],
+        parameters=[
+            OpenApiParameter(
+                'Last-Event-ID',
+                OpenApiTypes.STR,
+                location=OpenApiParameter.HEADER,
+                description="Resume after this event id (sent automatically by EventSource on reconnect)"
+            ),
+        ],
+        responses={(200, 'text/event-stream'): OpenApiTypes.STR},
+        description="Server-Sent Events stream of order status/assignment and operation changes visible "
+                    "to the user. Events: order.status, order.assignment, operation.updated, and reset "
+                    "when the stream cannot resume (reload through the REST endpoints)."
+    )
+    def events(self, request):
+        scope = self.get_event_scope()
+        stream = event_stream(get_broker(), scope, request.headers.get('Last-Event-ID'))
+
+        response = StreamingHttpResponse(stream, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Evita que nginx acumule el stream en su buffer
+        response['X-Accel-Buffering'] = 'no'
+        return response
@@ -0,0 +1,58 @@
+"""
+Archivo de pedidos de operativos finalizados (orders_order -> orders_archivedorder).
+
+Cada lote se mueve con una sola sentencia (DELETE ... RETURNING dentro de un
+INSERT ... SELECT), así que no hay ventana en la que un pedido exista en ambas
+tablas o en ninguna, y FOR UPDATE SKIP LOCKED evita bloquear escrituras
+concurrentes sobre los pedidos.
+"""
+from django.db import connection, transaction
+from ..operations.models import Operation
+from .models import ArchivedOrder, Order
+
+
+def _archive_batch(before, batch_size):
+    quote = connection.ops.quote_name
+    columns = ', '.join(
+        quote(field.column)
+        for field in ArchivedOrder._meta.concrete_fields
+        if field.name != 'archived_at'
+    )
+    orders = quote(Order._meta.db_table)
+    archive = quote(ArchivedOrder._meta.db_table)
+    operations = quote(Operation._meta.db_table)
+
+    sql = f"""
+        WITH batch AS (
+            SELECT o.id
+            FROM {orders} o
+            JOIN {operations} op ON op.id = o.operation_id
+            WHERE op.is_finalized AND o.created_at < %s
+            ORDER BY o.created_at
+            LIMIT %s
+            FOR UPDATE OF o SKIP LOCKED
+        ), moved AS (
+            DELETE FROM {orders} o USING batch
+            WHERE o.id = batch.id
+            RETURNING o.*
+        )
+        INSERT INTO {archive} ({columns}, archived_at)
+        SELECT {columns}, now() FROM moved
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, [before, batch_size])
+        return cursor.rowcount
+
+
+def archive_finalized_orders(before, batch_size=5000, max_batches=None):
+    """
+    Mueve al archivo, por lotes, los pedidos creados antes de `before` cuyo
+    operativo está finalizado. Genera la cantidad de pedidos movidos por lote.
+    """
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = _archive_batch(before, batch_size)
+        if not moved:
+            return
+        batches += 1
+        yield moved
@@ -0,0 +1,31 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from ...archive import archive_finalized_orders
+
+
+class Command(BaseCommand):
+    help = "Move orders of finalized operations older than N days to the archive table, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=30, help="Archive orders older than this many days."
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000, help="Orders moved per transaction."
+        )
+        parser.add_argument('--max-batches', type=int, default=None, help="Stop after this many batches.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+
+        before = timezone.now() - timedelta(days=options['older_than_days'])
+        total = 0
+        for moved in archive_finalized_orders(before, options['batch_size'], options['max_batches']):
+            total += moved
+            self.stdout.write(f"Archived {moved} orders ({total} total)")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Archived {total} orders created before {before:%Y-%m-%d %H:%M}.")
+        )
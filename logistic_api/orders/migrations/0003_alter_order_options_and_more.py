@@ -0,0 +1,25 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0004_alter_operation_options_and_more'),
+        ('orders', '0002_remove_order_contact_name_remove_order_contact_phone'),
+        ('profile', '0004_clientprofile_contact_phone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='order',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['-created_at', '-id'], name='orders_orde_created_f2fe3a_idx'),
+        ),
+    ]
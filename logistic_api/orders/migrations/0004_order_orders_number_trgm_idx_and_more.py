@@ -0,0 +1,27 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:02
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0005_operation_final_status'),
+        ('orders', '0003_alter_order_options_and_more'),
+        ('profile', '0005_clientprofile_profile_business_name_trgm_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('order_number'), name='gin_trgm_ops'), name='orders_number_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('delivery_address'), name='gin_trgm_ops'), name='orders_address_trgm_idx'),
+        ),
+    ]
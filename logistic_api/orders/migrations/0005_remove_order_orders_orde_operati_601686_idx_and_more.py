@@ -0,0 +1,37 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0006_operation_operations__is_acti_5fdb1c_idx'),
+        ('orders', '0004_order_orders_number_trgm_idx_and_more'),
+        ('profile', '0005_clientprofile_profile_business_name_trgm_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='order',
+            name='orders_orde_operati_601686_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='order',
+            name='orders_orde_client__7a26db_idx',
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['client', '-created_at'], name='orders_orde_client__16ef1b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['operation', 'current_status'], name='orders_orde_operati_e30ea7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['is_active', '-created_at'], name='orders_orde_is_acti_ffc494_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:10
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def populate_finalized_at(apps, schema_editor):
+    # Sin historial de estados, updated_at es la mejor aproximación disponible
+    Order = apps.get_model('orders', 'Order')
+    Order.objects.filter(
+        operation__final_status__isnull=False,
+        current_status=F('operation__final_status')
+    ).update(finalized_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0005_operation_final_status'),
+        ('orders', '0005_remove_order_orders_orde_operati_601686_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='finalized_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(populate_finalized_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:11
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0007_operation_operations__driver__3145af_idx'),
+        ('orders', '0006_order_finalized_at'),
+        ('profile', '0006_clientprofile_updated_at_driverprofile_updated_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('order_number', models.CharField(db_index=True, max_length=50, unique=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('delivery_address', models.TextField()),
+                ('delivery_city', models.CharField(blank=True, max_length=100, null=True)),
+                ('delivery_region', models.CharField(blank=True, max_length=100, null=True)),
+                ('delivery_country', models.CharField(blank=True, max_length=100, null=True)),
+                ('current_status', models.CharField(blank=True, max_length=100, null=True)),
+                ('finalized_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('client', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_orders', to='profile.clientprofile')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_orders', to=settings.AUTH_USER_MODEL)),
+                ('operation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_orders', to='operations.operation')),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+                'abstract': False,
+                'indexes': [models.Index(fields=['client', '-created_at'], name='orders_arch_client__df62d6_idx'), models.Index(fields=['-created_at', '-id'], name='orders_arch_created_d41098_idx')],
+            },
+        ),
+    ]
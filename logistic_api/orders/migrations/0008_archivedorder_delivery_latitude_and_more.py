@@ -0,0 +1,45 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:16
+
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_archivedorder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedorder',
+            name='delivery_latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, validators=[django.core.validators.MinValueValidator(Decimal('-90')), django.core.validators.MaxValueValidator(Decimal('90'))]),
+        ),
+        migrations.AddField(
+            model_name='archivedorder',
+            name='delivery_longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, validators=[django.core.validators.MinValueValidator(Decimal('-180')), django.core.validators.MaxValueValidator(Decimal('180'))]),
+        ),
+        migrations.AddField(
+            model_name='archivedorder',
+            name='route_sequence',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='delivery_latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, validators=[django.core.validators.MinValueValidator(Decimal('-90')), django.core.validators.MaxValueValidator(Decimal('90'))]),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='delivery_longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, validators=[django.core.validators.MinValueValidator(Decimal('-180')), django.core.validators.MaxValueValidator(Decimal('180'))]),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='route_sequence',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
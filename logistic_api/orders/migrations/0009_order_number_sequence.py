@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:17
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_archivedorder_delivery_latitude_and_more'),
+    ]
+
+    operations = [
+        # INCREMENT BY debe coincidir con orders.numbers.BLOCK_SIZE
+        migrations.RunSQL(
+            "CREATE SEQUENCE IF NOT EXISTS orders_order_number_seq START WITH 1 INCREMENT BY 100",
+            "DROP SEQUENCE IF EXISTS orders_order_number_seq",
+        ),
+    ]
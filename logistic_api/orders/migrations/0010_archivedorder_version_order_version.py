@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_order_number_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedorder',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0012_remove_operation_operations__driver__3145af_idx_and_more'),
+        ('orders', '0010_archivedorder_version_order_version'),
+        ('profile', '0007_clientprofile_order_number_prefix'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['operation', 'current_status'], name='order_operation_active_idx'),
+        ),
+    ]
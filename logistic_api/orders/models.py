@@ -1,23 +1,128 @@
 import uuid
+from decimal import Decimal
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import TrigramWordSimilarity
 from django.db import models
+from django.db.models.functions import Greatest, Upper
 from django.conf import settings
+from ..audit.tracking import AuditedModel
+from ..concurrency import VersionedModel
 
 
-class Order(models.Model):
+class OrderQuerySet(models.QuerySet):
+    def finalized(self):
+        """Pedidos cuyo current_status coincide con el último estado de su operativo."""
+        return self.filter(
+            operation__final_status__isnull=False,
+            current_status=models.F('operation__final_status')
+        )
+
+    def annotate_is_finalized(self):
+        """Agrega el atributo booleano `finalized` calculado en la misma consulta."""
+        return self.annotate(
+            finalized=models.Case(
+                models.When(
+                    operation__final_status__isnull=False,
+                    current_status=models.F('operation__final_status'),
+                    then=models.Value(True)
+                ),
+                default=models.Value(False),
+                output_field=models.BooleanField()
+            )
+        )
+
+    def search(self, term):
+        """
+        Búsqueda parcial por order_number, delivery_address y razón social del cliente.
+        Los ICONTAINS se resuelven con los índices GIN pg_trgm sobre UPPER(columna)
+        y los resultados se ordenan por similitud (atributo `search_rank`).
+        """
+        from ..profile.models import ClientProfile
+        # Los clientes son pocos: resolverlos antes permite a Postgres combinar
+        # los tres filtros con BitmapOr en lugar de filtrar después del JOIN
+        client_ids = list(
+            ClientProfile.objects.filter(business_name__icontains=term).values_list('id', flat=True)
+        )
+        matches = models.Q(order_number__icontains=term) | models.Q(delivery_address__icontains=term)
+        return self.filter(matches | models.Q(client_id__in=client_ids)).annotate(
+            search_rank=Greatest(
+                TrigramWordSimilarity(term, 'order_number'),
+                TrigramWordSimilarity(term, 'delivery_address'),
+                TrigramWordSimilarity(term, 'client__business_name'),
+            )
+        ).order_by('-search_rank', '-created_at', '-id')
+
+
+class BaseOrder(VersionedModel, AuditedModel):
+    """
+    Campos comunes de Order y ArchivedOrder.
+    Las relaciones se declaran en cada modelo para mantener los related_name.
+    """
+    audit_status_fields = ('current_status',)
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    
+
     # Código único del pedido
     order_number = models.CharField(max_length=50, unique=True, db_index=True)
-    
+
     # Información del pedido
     description = models.TextField(blank=True, null=True)
-    
+
     # Dirección de entrega
     delivery_address = models.TextField()
     delivery_city = models.CharField(max_length=100, blank=True, null=True)
     delivery_region = models.CharField(max_length=100, blank=True, null=True)
     delivery_country = models.CharField(max_length=100, blank=True, null=True)
-    
+    # Coordenadas de entrega (WGS84), usadas para secuenciar la ruta del operativo
+    delivery_latitude = models.DecimalField(
+        max_digits=9, decimal_places=6, blank=True, null=True,
+        validators=[MinValueValidator(Decimal('-90')), MaxValueValidator(Decimal('90'))]
+    )
+    delivery_longitude = models.DecimalField(
+        max_digits=9, decimal_places=6, blank=True, null=True,
+        validators=[MinValueValidator(Decimal('-180')), MaxValueValidator(Decimal('180'))]
+    )
+    # Posición del pedido en la ruta de su operativo (ver Operation.optimize_route)
+    route_sequence = models.PositiveIntegerField(blank=True, null=True)
+
+    # Estado actual del pedido (se sincroniza con el estado del operativo)
+    current_status = models.CharField(max_length=100, blank=True, null=True)
+    # Momento en que el pedido llegó al estado final del operativo
+    finalized_at = models.DateTimeField(blank=True, null=True, db_index=True)
+
+    # Información adicional
+    notes = models.TextField(blank=True, null=True)
+
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+        ordering = ['-created_at', '-id']
+
+    def __str__(self):
+        client_name = self.client.business_name if self.client else "No client"
+        return f"{self.order_number} - {client_name}"
+
+    def is_finalized(self):
+        """
+        Verifica si el pedido está en el estado final del operativo.
+        Un pedido está finalizado si tiene un operativo asignado y su current_status
+        coincide con el último estado (mayor orden) del operativo, que se guarda
+        en Operation.final_status.
+        Para validar muchos pedidos usar Order.objects.annotate_is_finalized().
+        """
+        if not self.operation_id or not self.current_status:
+            return False
+
+        return self.current_status == self.operation.final_status
+
+
+class Order(BaseOrder):
     # Creador del pedido (CLIENT o INTERNAL_CLIENT)
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -25,7 +130,7 @@ class Order(models.Model):
         null=True,
         related_name='created_orders'
     )
-    
+
     # Cliente propietario del pedido
     client = models.ForeignKey(
         'profile.ClientProfile',
@@ -34,7 +139,7 @@ class Order(models.Model):
         null=True,
         blank=True
     )
-    
+
     # Operativo al que pertenece (opcional al crear, se asigna después)
     operation = models.ForeignKey(
         'operations.Operation',
@@ -43,46 +148,62 @@ class Order(models.Model):
         blank=True,
         related_name='orders'
     )
-    
-    # Estado actual del pedido (se sincroniza con el estado del operativo)
-    current_status = models.CharField(max_length=100, blank=True, null=True)
-    
-    # Información adicional
-    notes = models.TextField(blank=True, null=True)
-    
-    is_active = models.BooleanField(default=True)
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
-    
-    class Meta:
-        ordering = ['-created_at']
+
+    class Meta(BaseOrder.Meta):
         indexes = [
             models.Index(fields=['order_number']),
-            models.Index(fields=['operation']),
-            models.Index(fields=['client']),
+            # Filtros del listado (OrderFilter). Los índices simples de client y
+            # operation ya los crea la ForeignKey (db_index)
+            models.Index(fields=['client', '-created_at']),
+            models.Index(fields=['operation', 'current_status']),
+            models.Index(fields=['is_active', '-created_at']),
+            # Pedidos pendientes por operativo (/drivers/workload/)
+            models.Index(
+                fields=['operation', 'current_status'],
+                condition=models.Q(is_active=True),
+                name='order_operation_active_idx'
+            ),
+            # Soporta la paginación por cursor (keyset) sobre el orden por defecto
+            models.Index(fields=['-created_at', '-id']),
+            # Búsqueda parcial (?search=): Django traduce icontains a UPPER(col) LIKE ...
+            GinIndex(OpClass(Upper('order_number'), name='gin_trgm_ops'), name='orders_number_trgm_idx'),
+            GinIndex(OpClass(Upper('delivery_address'), name='gin_trgm_ops'), name='orders_address_trgm_idx'),
+        ]
+
+
+class ArchivedOrder(BaseOrder):
+    """
+    Pedidos de operativos finalizados movidos fuera de orders_order por el
+    comando archive_orders. Mantienen el mismo id y los mismos campos; se
+    consultan desde /orders/ con ?archived=true.
+    """
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='archived_orders'
+    )
+
+    client = models.ForeignKey(
+        'profile.ClientProfile',
+        on_delete=models.CASCADE,
+        related_name='archived_orders',
+        null=True,
+        blank=True
+    )
+
+    operation = models.ForeignKey(
+        'operations.Operation',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='archived_orders'
+    )
+
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta(BaseOrder.Meta):
+        indexes = [
+            models.Index(fields=['client', '-created_at']),
+            models.Index(fields=['-created_at', '-id']),
         ]
-    
-    def __str__(self):
-        client_name = self.client.business_name if self.client else "No client"
-        return f"{self.order_number} - {client_name}"
-    
-    def is_finalized(self):
-        """
-        Verifica si el pedido está en el estado final del operativo.
-        Un pedido está finalizado si tiene un operativo asignado y su current_status
-        coincide con el último estado (mayor orden) del operativo.
-        """
-        if not self.operation or not self.current_status:
-            return False
-        
-        from ..operations.models import OperationStatus
-        # Obtener el último estado del operativo (mayor orden)
-        last_status = OperationStatus.objects.filter(
-            operation=self.operation
-        ).order_by('-order').first()
-        
-        if not last_status:
-            return False
-        
-        # Comparar el current_status con el nombre del último estado
-        return self.current_status == last_status.name
@@ -0,0 +1,70 @@
+"""
+Asignación de order_number en el servidor.
+
+Los números salen de una secuencia global de Postgres con INCREMENT BY
+BLOCK_SIZE: cada nextval() reserva un bloque de BLOCK_SIZE números para el
+proceso, que los entrega desde memoria. nextval() no es transaccional ni toma
+bloqueos de fila, así que la creación concurrente no compite por ninguna fila
+y los números nunca se repiten, aunque la transacción que los pidió haga
+rollback (los bloques sin usar quedan como huecos).
+
+El número se formatea con el prefijo del cliente y relleno de ceros, por lo
+que dentro de un mismo proceso los números de un cliente son crecientes
+también como texto. Ese formato queda reservado para el servidor: los
+order_number que envía el cliente no pueden usarlo (ver is_allocated_format),
+así nunca coinciden con uno asignado.
+"""
+import re
+import threading
+from django.conf import settings
+from django.db import connection
+
+SEQUENCE_NAME = 'orders_order_number_seq'
+# Debe coincidir con el INCREMENT BY de la secuencia (migración 0009)
+BLOCK_SIZE = 100
+
+# PREFIX-0000000000 (ver format_order_number y ClientProfile.order_number_prefix)
+ALLOCATED_FORMAT = re.compile(r'^[A-Z0-9]+-\d{10}$')
+
+_lock = threading.Lock()
+_blocks = []
+
+
+def _reserve_blocks(count):
+    """Reserva `count` bloques con una sola consulta."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT nextval(%s) FROM generate_series(1, %s)", [SEQUENCE_NAME, count])
+        return [[start, start + BLOCK_SIZE] for (start,) in cursor.fetchall()]
+
+
+def allocate(count=1):
+    """Retorna `count` números únicos y crecientes."""
+    numbers = []
+    with _lock:
+        available = sum(end - start for start, end in _blocks)
+        if available < count:
+            missing = count - available
+            _blocks.extend(_reserve_blocks(-(-missing // BLOCK_SIZE)))
+
+        while len(numbers) < count:
+            block = _blocks[0]
+            take = min(count - len(numbers), block[1] - block[0])
+            numbers.extend(range(block[0], block[0] + take))
+            block[0] += take
+            if block[0] == block[1]:
+                _blocks.pop(0)
+    return numbers
+
+
+def format_order_number(client, number):
+    prefix = client.order_number_prefix or settings.ORDERS_NUMBER_DEFAULT_PREFIX
+    return f"{prefix}-{number:010d}"
+
+
+def allocate_order_numbers(client, count=1):
+    """Genera `count` order_number para el cliente."""
+    return [format_order_number(client, number) for number in allocate(count)]
+
+
+def is_allocated_format(order_number):
+    return ALLOCATED_FORMAT.match(order_number) is not None
@@ -0,0 +1,10 @@
+import factory
+
+
+class OrderFactory(factory.django.DjangoModelFactory):
+
+    class Meta:
+        model = 'orders.Order'
+
+    order_number = factory.Sequence(lambda n: f'ORD-TEST-{n}')
+    delivery_address = 'Av. Siempre Viva 742'
@@ -0,0 +1,437 @@
+import json
+from io import StringIO
+from datetime import timedelta
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+import pytest
+from ...users.models import User
+from ...users.test.factories import UserFactory
+from ...idempotency.models import IdempotencyKey
+from ...profile.test.factories import ClientProfileFactory
+from ...operations.test.factories import OperationFactory, OperationStatusFactory
+from ..models import ArchivedOrder, Order
+from .factories import OrderFactory
+
+
+@pytest.mark.django_db
+class TestOrderBulkCreateTestCase(APITestCase):
+    """
+    Tests /orders/bulk/ operations.
+    """
+
+    def setUp(self):
+        self.url = reverse('order-bulk')
+        self.client_profile = ClientProfileFactory(business_name='ACME')
+        self.user = self.client_profile.user
+        self.client.force_authenticate(self.user)
+
+    def build_row(self, order_number, **kwargs):
+        row = {
+            'order_number': order_number,
+            'client_id': str(self.client_profile.id),
+            'delivery_address': 'Av. Siempre Viva 742',
+        }
+        row.update(kwargs)
+        return row
+
+    def test_post_request_creates_all_valid_rows(self):
+        rows = [self.build_row(f'ORD-{n}') for n in range(5)]
+        response = self.client.post(self.url, rows, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert len(response.data['created']) == 5
+        assert response.data['errors'] == []
+        assert Order.objects.filter(client=self.client_profile, created_by=self.user).count() == 5
+
+    def test_post_request_reports_invalid_rows_by_index(self):
+        OrderFactory(order_number='ORD-EXISTING', client=self.client_profile)
+        other_client = ClientProfileFactory(business_name='Other')
+        rows = [
+            self.build_row('ORD-1'),
+            self.build_row('ORD-EXISTING'),
+            self.build_row('ORD-1'),
+            self.build_row('ORD-2', client_id=str(other_client.id)),
+            {'order_number': 'ORD-3'},
+        ]
+        response = self.client.post(self.url, rows, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [row['index'] for row in response.data['created']] == [0]
+        assert [error['index'] for error in response.data['errors']] == [1, 2, 3, 4]
+        assert Order.objects.filter(order_number__in=['ORD-1', 'ORD-2', 'ORD-3']).count() == 1
+
+    def test_post_request_allocates_missing_order_numbers(self):
+        self.client_profile.order_number_prefix = 'ACME'
+        self.client_profile.save()
+        rows = [self.build_row(None) for _ in range(3)] + [self.build_row('ORD-1')]
+        for row in rows[:3]:
+            del row['order_number']
+        response = self.client.post(self.url, rows, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+
+        allocated = [row['order_number'] for row in response.data['created'][:3]]
+        assert all(number.startswith('ACME-') for number in allocated)
+        assert allocated == sorted(allocated) and len(set(allocated)) == 3
+        assert response.data['created'][3]['order_number'] == 'ORD-1'
+
+        response = self.client.post(reverse('order-list'), self.build_row(''), format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        row = self.build_row(None)
+        del row['order_number']
+        response = self.client.post(reverse('order-list'), row, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['order_number'] > allocated[-1]
+
+        # El formato de los números asignados está reservado al servidor
+        next_number = f"ACME-{int(response.data['order_number'][5:]) + 1:010d}"
+        response = self.client.post(reverse('order-list'), self.build_row(next_number), format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = self.client.post(self.url, [self.build_row(next_number)], format='json')
+        assert response.data['errors'][0]['errors']['order_number']
+
+    def test_post_request_with_non_list_body_fails(self):
+        response = self.client.post(self.url, self.build_row('ORD-1'), format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_post_request_from_internal_user_is_forbidden(self):
+        internal = UserFactory(role=User.Roles.INTERNAL)
+        self.client.force_authenticate(internal)
+        response = self.client.post(self.url, [self.build_row('ORD-1')], format='json')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+class TestOrderListPaginationTestCase(APITestCase):
+    """
+    Tests /orders list pagination modes.
+    """
+
+    def setUp(self):
+        self.url = reverse('order-list')
+        self.user = UserFactory(role=User.Roles.ADMIN)
+        self.client.force_authenticate(self.user)
+        for n in range(15):
+            OrderFactory(order_number=f'ORD-{n}')
+
+    def test_get_request_defaults_to_page_number_pagination(self):
+        response = self.client.get(self.url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 15
+
+    def test_get_request_with_cursor_mode_walks_all_rows_without_count(self):
+        response = self.client.get(self.url, {'pagination': 'cursor'})
+        assert response.status_code == status.HTTP_200_OK
+        assert 'count' not in response.data
+        ids = [row['id'] for row in response.data['results']]
+
+        response = self.client.get(response.data['next'])
+        assert response.status_code == status.HTTP_200_OK
+        ids += [row['id'] for row in response.data['results']]
+        assert response.data['next'] is None
+        assert len(set(ids)) == 15
+
+
+@pytest.mark.django_db
+class TestOrderSearchTestCase(APITestCase):
+    """
+    Tests /orders?search= operations.
+    """
+
+    def setUp(self):
+        self.url = reverse('order-list')
+        self.user = UserFactory(role=User.Roles.ADMIN)
+        self.client.force_authenticate(self.user)
+        client_profile = ClientProfileFactory(business_name='Farmacias Unidas')
+        OrderFactory(order_number='ORD-2024-00123', delivery_address='Av. Arequipa 100')
+        OrderFactory(order_number='ORD-2024-00999', delivery_address='Jr. Cusco 200', client=client_profile)
+        OrderFactory(order_number='ORD-2024-00555', delivery_address='Calle Lima 300')
+
+    def search(self, term):
+        response = self.client.get(self.url, {'search': term})
+        assert response.status_code == status.HTTP_200_OK
+        return [row['order_number'] for row in response.data['results']]
+
+    def test_get_request_matches_partial_fields(self):
+        assert self.search('00123') == ['ORD-2024-00123']
+        assert self.search('arequipa') == ['ORD-2024-00123']
+        assert self.search('farmacias') == ['ORD-2024-00999']
+        assert len(self.search('ord-2024')) == 3
+
+    def test_get_request_with_short_term_fails(self):
+        response = self.client.get(self.url, {'search': 'ab'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_get_request_with_cursor_pagination_fails(self):
+        # El cursor descartaría el orden por relevancia
+        response = self.client.get(self.url, {'search': 'ord-2024', 'pagination': 'cursor'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'search' in response.data
+
+
+@pytest.mark.django_db
+class TestOrderFilterTestCase(APITestCase):
+    """
+    Tests /orders list filters.
+    """
+
+    def setUp(self):
+        self.url = reverse('order-list')
+        self.user = UserFactory(role=User.Roles.ADMIN)
+        self.client.force_authenticate(self.user)
+        OrderFactory(order_number='ORD-1', delivery_city='Lima', current_status='En ruta')
+        OrderFactory(order_number='ORD-2', delivery_city='Cusco', is_active=False)
+        OrderFactory(order_number='ORD-3', delivery_city='Lima')
+
+    def filter(self, **params):
+        response = self.client.get(self.url, params)
+        assert response.status_code == status.HTTP_200_OK
+        return sorted(row['order_number'] for row in response.data['results'])
+
+    def test_get_request_filters_by_fields(self):
+        assert self.filter(delivery_city='Lima') == ['ORD-1', 'ORD-3']
+        assert self.filter(current_status='En ruta') == ['ORD-1']
+        assert self.filter(is_active='false') == ['ORD-2']
+
+    def test_get_request_filters_by_created_at_range(self):
+        Order.objects.filter(order_number='ORD-3').update(created_at='2020-01-01T00:00:00Z')
+        assert self.filter(created_at_before='2021-01-01T00:00:00Z') == ['ORD-3']
+        assert self.filter(created_at_after='2021-01-01T00:00:00Z') == ['ORD-1', 'ORD-2']
+
+
+@pytest.mark.django_db
+class TestOrderExportTestCase(APITestCase):
+    """
+    Tests /orders/export/ operations.
+    """
+
+    def setUp(self):
+        self.url = reverse('order-export')
+        self.client_profile = ClientProfileFactory(business_name='ACME')
+        self.user = self.client_profile.user
+        self.client.force_authenticate(self.user)
+        OrderFactory(order_number='ORD-1', client=self.client_profile)
+        OrderFactory(order_number='ORD-2', client=self.client_profile, is_active=False)
+        OrderFactory(order_number='ORD-OTHER')
+
+    def test_get_request_streams_csv_scoped_to_client(self):
+        response = self.client.get(self.url)
+        assert response.status_code == status.HTTP_200_OK
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert lines[0].startswith('id,order_number')
+        assert len(lines) == 3
+        assert 'ORD-OTHER' not in ''.join(lines)
+
+    def test_get_request_streams_filtered_ndjson(self):
+        response = self.client.get(self.url, {'file_format': 'ndjson', 'is_active': 'true'})
+        assert response.status_code == status.HTTP_200_OK
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert [json.loads(line)['order_number'] for line in lines] == ['ORD-1']
+
+    def test_get_request_with_unknown_format_fails(self):
+        response = self.client.get(self.url, {'file_format': 'xlsx'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestOrderConditionalGetTestCase(APITestCase):
+    """
+    Tests ETag / Last-Modified handling on /orders.
+    """
+
+    def setUp(self):
+        self.user = UserFactory(role=User.Roles.ADMIN)
+        self.client.force_authenticate(self.user)
+        self.order = OrderFactory(order_number='ORD-1')
+
+    def test_get_request_with_matching_etag_returns_not_modified(self):
+        for url in [reverse('order-detail', kwargs={'pk': self.order.pk}), reverse('order-list')]:
+            response = self.client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            etag = response['ETag']
+
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == status.HTTP_304_NOT_MODIFIED
+            assert response['ETag'] == etag
+
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+            assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_get_request_after_update_returns_new_etag(self):
+        url = reverse('order-detail', kwargs={'pk': self.order.pk})
+        etag = self.client.get(url)['ETag']
+
+        self.order.notes = 'Frágil'
+        self.order.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+class TestOrderArchiveTestCase(APITestCase):
+    """
+    Tests the archive_orders command and /orders?archived=true.
+    """
+
+    def setUp(self):
+        self.user = UserFactory(role=User.Roles.ADMIN)
+        self.client.force_authenticate(self.user)
+        finalized = OperationFactory(name='Cerrado', is_finalized=True)
+        active = OperationFactory(name='Abierto')
+        old = timezone.now() - timedelta(days=60)
+        for number, operation in [('ORD-1', finalized), ('ORD-2', finalized), ('ORD-3', active)]:
+            order = OrderFactory(order_number=number, operation=operation)
+            Order.objects.filter(pk=order.pk).update(created_at=old)
+        OrderFactory(order_number='ORD-4', operation=finalized)
+
+    def test_command_moves_old_orders_of_finalized_operations(self):
+        call_command('archive_orders', '--batch-size', '1', stdout=StringIO())
+
+        assert sorted(ArchivedOrder.objects.values_list('order_number', flat=True)) == ['ORD-1', 'ORD-2']
+        assert sorted(Order.objects.values_list('order_number', flat=True)) == ['ORD-3', 'ORD-4']
+
+        response = self.client.get(reverse('order-list'), {'archived': 'true'})
+        assert response.status_code == status.HTTP_200_OK
+        assert sorted(row['order_number'] for row in response.data['results']) == ['ORD-1', 'ORD-2']
+
+        archived = ArchivedOrder.objects.get(order_number='ORD-1')
+        response = self.client.get(reverse('order-detail', kwargs={'pk': archived.pk}), {'archived': 'true'})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['archived_at'] is not None
+
+        response = self.client.get(reverse('order-detail', kwargs={'pk': archived.pk}))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_create_and_update_requests_reject_archived_order_numbers(self):
+        call_command('archive_orders', stdout=StringIO())
+
+        order = Order.objects.get(order_number='ORD-3')
+        response = self.client.patch(
+            reverse('order-detail', kwargs={'pk': order.pk}), {'order_number': 'ORD-1'}, format='json'
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'order_number' in response.data
+
+        client_profile = ClientProfileFactory(business_name='ACME')
+        self.client.force_authenticate(client_profile.user)
+        response = self.client.post(reverse('order-list'), {
+            'order_number': 'ORD-2', 'client_id': str(client_profile.id), 'delivery_address': 'x'
+        }, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'order_number' in response.data
+        assert not Order.objects.filter(order_number='ORD-2').exists()
+
+
+@pytest.mark.django_db
+class TestOrderIdempotentCreateTestCase(APITestCase):
+    """
+    Tests Idempotency-Key handling on POST /orders.
+    """
+
+    def setUp(self):
+        self.url = reverse('order-list')
+        self.client_profile = ClientProfileFactory(business_name='ACME')
+        self.user = self.client_profile.user
+        self.client.force_authenticate(self.user)
+        self.payload = {
+            'order_number': 'ORD-1',
+            'client_id': str(self.client_profile.id),
+            'delivery_address': 'Av. Siempre Viva 742',
+        }
+
+    def test_retry_with_same_key_replays_response(self):
+        first = self.client.post(self.url, self.payload, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        assert first.status_code == status.HTTP_201_CREATED
+
+        retry = self.client.post(self.url, self.payload, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        assert retry.status_code == status.HTTP_201_CREATED
+        assert retry['Idempotent-Replayed'] == 'true'
+        assert retry.data['id'] == first.data['id']
+        assert Order.objects.count() == 1
+
+        other = self.client.post(
+            self.url, {**self.payload, 'order_number': 'ORD-2'}, format='json', HTTP_IDEMPOTENCY_KEY='abc'
+        )
+        assert other.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_failed_request_does_not_keep_the_key(self):
+        response = self.client.post(
+            self.url, {'order_number': 'ORD-1'}, format='json', HTTP_IDEMPOTENCY_KEY='abc'
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = self.client.post(self.url, self.payload, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_retry_while_first_request_is_pending(self):
+        first = self.client.post(self.url, self.payload, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        stored = IdempotencyKey.objects.get(key='abc')
+        # Reserva confirmada de una petición que sigue en curso
+        IdempotencyKey.objects.filter(pk=stored.pk).update(
+            response_status=IdempotencyKey.PENDING, response_body=None
+        )
+        Order.objects.filter(pk=first.data['id']).delete()
+
+        response = self.client.post(self.url, self.payload, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+        # Una reserva vieja sin respuesta se considera abandonada y se reemplaza
+        IdempotencyKey.objects.filter(pk=stored.pk).update(created_at=timezone.now() - timedelta(hours=1))
+        response = self.client.post(self.url, self.payload, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert IdempotencyKey.objects.get(key='abc').response_status == status.HTTP_201_CREATED
+
+
+@pytest.mark.django_db
+@override_settings(EVENTS_STREAM_TIMEOUT_SECONDS=0.3, EVENTS_HEARTBEAT_SECONDS=0.1)
+class TestOrderEventsTestCase(APITestCase):
+    """
+    Tests /orders/events/ stream.
+    """
+
+    def setUp(self):
+        self.url = reverse('order-events')
+        client_profile = ClientProfileFactory(business_name='ACME')
+        self.user = client_profile.user
+        other_profile = ClientProfileFactory(business_name='Otro')
+        self.operation = OperationFactory(name='Lima Norte')
+        OperationStatusFactory(operation=self.operation, name='En ruta')
+        OperationStatusFactory(operation=self.operation, name='Entregado')
+        self.own = OrderFactory(order_number='ORD-1', client=client_profile, operation=self.operation)
+        self.foreign = OrderFactory(order_number='ORD-2', client=other_profile, operation=self.operation)
+        self.client.force_authenticate(self.user)
+
+    def read(self, response):
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'text/event-stream'
+        return b''.join(response.streaming_content).decode()
+
+    def advance(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.operation.advance_orders()
+
+    def test_get_request_streams_only_visible_changes(self):
+        response = self.client.get(self.url, HTTP_ACCEPT='text/event-stream')
+        self.advance()
+        body = self.read(response)
+        assert 'event: order.status' in body
+        assert str(self.own.id) in body
+        assert '"current_status": "En ruta"' in body
+        assert str(self.foreign.id) not in body
+
+    def test_get_request_resumes_from_last_event_id(self):
+        response = self.client.get(self.url)
+        self.advance()
+        first_id = next(line[4:] for line in self.read(response).splitlines() if line.startswith('id: '))
+
+        self.advance()
+        body = self.read(self.client.get(self.url, HTTP_LAST_EVENT_ID=first_id))
+        assert '"current_status": "Entregado"' in body
+        assert '"current_status": "En ruta"' not in body
+        assert 'event: reset' not in body
+
+        body = self.read(self.client.get(self.url, HTTP_LAST_EVENT_ID='unknown-1'))
+        assert 'event: reset' in body
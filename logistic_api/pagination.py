@@ -0,0 +1,71 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Paginación keyset sobre (-created_at, -id).
+    No ejecuta COUNT(*) ni OFFSET, por lo que el costo de una página no depende
+    de su profundidad. Requiere un índice compuesto con el mismo orden.
+    """
+    ordering = ('-created_at', '-id')
+
+
+class PageNumberOrCursorPagination(BasePagination):
+    """
+    Mantiene la paginación por número de página por defecto y activa la
+    paginación por cursor cuando el cliente envía ?pagination=cursor o un
+    ?cursor=... devuelto en una respuesta anterior.
+    El cursor impone el orden (-created_at, -id), así que se rechaza junto con
+    parámetros que definen otro orden (?search= ordena por relevancia).
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    cursor_excluded_params = ('search',)
+
+    def __init__(self):
+        self.page_number_paginator = PageNumberPagination()
+        self.cursor_paginator = CreatedAtCursorPagination()
+        self.paginator = self.page_number_paginator
+
+    def use_cursor(self, request):
+        mode = request.query_params.get(self.mode_query_param)
+        return mode == self.cursor_mode or self.cursor_paginator.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            params = request.query_params
+            excluded = [param for param in self.cursor_excluded_params if params.get(param)]
+            if excluded:
+                message = "Cannot be combined with cursor pagination, use page numbers."
+                raise ValidationError({param: [message] for param in excluded})
+            self.paginator = self.cursor_paginator
+        else:
+            self.paginator = self.page_number_paginator
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number_paginator.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            *self.page_number_paginator.get_schema_operation_parameters(view),
+            {
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Set to "cursor" to use keyset pagination (next/previous cursors, no count).',
+                'schema': {'type': 'string', 'enum': [self.cursor_mode]},
+            },
+            *self.cursor_paginator.get_schema_operation_parameters(view),
+        ]
+
+    @property
+    def display_page_controls(self):
+        return self.paginator.display_page_controls
+
+    def to_html(self):
+        return self.paginator.to_html()
@@ -3,7 +3,10 @@ from .models import ClientProfile, InternalClientProfile, DriverProfile
 
 @admin.register(ClientProfile)
 class ClientProfileAdmin(admin.ModelAdmin):
-    list_display = ("business_name", "ruc", "phone_number", "contact_phone", "is_active", "created_at")
+    list_display = (
+        "business_name", "ruc", "order_number_prefix", "phone_number", "contact_phone",
+        "is_active", "created_at"
+    )
     search_fields = ("business_name", "ruc", "phone_number", "contact_phone")
 
 
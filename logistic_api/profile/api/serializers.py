@@ -18,6 +18,22 @@ class DriverProfileSerializer(serializers.ModelSerializer):
         model = DriverProfile
         fields = '__all__'
 
+class DriverWorkloadSerializer(serializers.ModelSerializer):
+    email = serializers.EmailField(source='user.email', read_only=True)
+    active_operations = serializers.IntegerField(read_only=True)
+    pending_orders = serializers.IntegerField(read_only=True)
+    available = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DriverProfile
+        fields = (
+            'id', 'first_name', 'last_name', 'email', 'is_active',
+            'active_operations', 'pending_orders', 'available',
+        )
+
+    def get_available(self, obj) -> bool:
+        return obj.is_active and obj.active_operations == 0
+
 class InternalClientSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(source='user.email')
 
@@ -70,7 +86,6 @@ class CreateClientSerializer(serializers.Serializer):
             ruc=validated_data['ruc']
         )
 
-
         return client_profile
 
 class CreateInternalClientSerializer(serializers.Serializer):
@@ -83,7 +98,7 @@ class CreateInternalClientSerializer(serializers.Serializer):
     @transaction.atomic
     def create(self, validated_data):
         client_id = validated_data.pop('client_id')
-        
+
         try:
             client_profile = ClientProfile.objects.get(id=client_id)
         except ClientProfile.DoesNotExist:
@@ -1,5 +1,9 @@
-from drf_spectacular.utils import extend_schema, extend_schema_view
+from django.db.models import F, Prefetch
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
 from rest_framework import mixins, viewsets
+from rest_framework.decorators import action
+from ...mixins import ConditionalGetMixin
 from ...users.models import User
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -17,9 +21,13 @@ from ...profile.api.serializers import (
     CreateInternalSerializer,
     InternalClientSerializer,
     DriverProfileSerializer,
+    DriverWorkloadSerializer,
     ClientProfileSerializer
 )
 from ...users.api.serializers import UserSerializer
+from ...operations.models import Operation, OperationStatus
+from ...operations.api.serializers import DriverManifestOperationSerializer
+from ...orders.models import Order
 
 @extend_schema_view(
     list=extend_schema(tags=['Drivers V1']),
@@ -28,8 +36,11 @@ from ...users.api.serializers import UserSerializer
     update=extend_schema(tags=['Drivers V1']),
     partial_update=extend_schema(tags=['Drivers V1']),
     destroy=extend_schema(tags=['Drivers V1']),
+    manifest=extend_schema(tags=['Drivers V1']),
+    workload=extend_schema(tags=['Drivers V1']),
 )
 class DriverViewSet(
+    ConditionalGetMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
     mixins.DestroyModelMixin,
@@ -43,7 +54,7 @@ class DriverViewSet(
         if self.action == 'create':
             return CreateDriverSerializer
         return DriverProfileSerializer
-    
+
     @extend_schema(
         request=CreateDriverSerializer,
         responses={201: DriverProfileSerializer},
@@ -53,11 +64,76 @@ class DriverViewSet(
         input_serializer = CreateDriverSerializer(data=request.data)
         input_serializer.is_valid(raise_exception=True)
 
-        client_profile = input_serializer.save() 
+        client_profile = input_serializer.save()
 
         output_serializer = DriverProfileSerializer(client_profile)
         return Response(output_serializer.data, status=201)
 
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='workload'
+    )
+    @extend_schema(
+        tags=['Drivers V1'],
+        parameters=[
+            OpenApiParameter(
+                'available',
+                OpenApiTypes.BOOL,
+                description="Only active drivers without open (active, non-finalized) operations"
+            ),
+        ],
+        description="Open operations and pending orders of every driver, computed in a single query",
+        responses={200: DriverWorkloadSerializer(many=True)}
+    )
+    def workload(self, request):
+        user = request.user
+
+        if user.role not in [User.Roles.ADMIN, User.Roles.INTERNAL]:
+            raise PermissionDenied("You do not have permission to access this resource.")
+
+        drivers = DriverProfile.objects.select_related('user').with_workload().order_by(
+            'last_name', 'first_name', 'id'
+        )
+        if request.query_params.get('available') == 'true':
+            drivers = drivers.available()
+
+        serializer = DriverWorkloadSerializer(drivers, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='me/manifest'
+    )
+    @extend_schema(
+        tags=['Drivers V1'],
+        description="Active, non-finalized operations of the authenticated driver with their "
+                    "ordered statuses and active orders",
+        responses={200: DriverManifestOperationSerializer(many=True)}
+    )
+    def manifest(self, request):
+        user = request.user
+
+        if user.role != User.Roles.DRIVER:
+            raise PermissionDenied("Only drivers have a manifest.")
+
+        # 3 consultas fijas: operativos (filtrados por el usuario vía JOIN, sin
+        # cargar el perfil), sus estados y sus pedidos activos
+        operations = Operation.objects.filter(
+            driver__user=user,
+            is_active=True,
+            is_finalized=False
+        ).prefetch_related(
+            Prefetch('statuses', queryset=OperationStatus.objects.with_position()),
+            Prefetch('orders', queryset=Order.objects.filter(is_active=True).order_by(
+                F('route_sequence').asc(nulls_last=True), 'created_at', 'id'
+            ))
+        )
+
+        serializer = DriverManifestOperationSerializer(operations, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
 
 @extend_schema_view(
     list=extend_schema(tags=['Clients V1']),
@@ -67,6 +143,7 @@ class DriverViewSet(
     partial_update=extend_schema(tags=['Clients V1']),
 )
 class ClientViewSet(
+    ConditionalGetMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -86,7 +163,7 @@ class ClientViewSet(
         if user.role == User.Roles.ADMIN:
             return self.queryset
         return self.queryset.filter(user=user)
-    
+
     @extend_schema(
         request=CreateClientSerializer,
         responses={201: ClientProfileSerializer},
@@ -96,7 +173,7 @@ class ClientViewSet(
         input_serializer = CreateClientSerializer(data=request.data)
         input_serializer.is_valid(raise_exception=True)
 
-        client_profile = input_serializer.save() 
+        client_profile = input_serializer.save()
 
         output_serializer = ClientProfileSerializer(client_profile)
         return Response(output_serializer.data, status=201)
@@ -111,6 +188,7 @@ class ClientViewSet(
     destroy=extend_schema(tags=['Internal Clients V1']),
 )
 class InternalClientViewSet(
+    ConditionalGetMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -128,7 +206,7 @@ class InternalClientViewSet(
 
     def get_queryset(self):
         user = self.request.user
-        
+
         if user.role == User.Roles.ADMIN:
             return self.queryset.all()
         elif user.role == User.Roles.CLIENT:
@@ -176,13 +254,13 @@ class InternalViewSet(
 
     def get_queryset(self):
         user = self.request.user
-        
+
         if user.role not in [User.Roles.ADMIN, User.Roles.INTERNAL]:
             raise PermissionDenied("You do not have permission to access this resource.")
-        
+
         if user.role == User.Roles.ADMIN:
             return self.queryset.all()
-        
+
         # INTERNAL puede ver todos los internos
         return self.queryset.all()
 
@@ -193,10 +271,10 @@ class InternalViewSet(
     )
     def create(self, request, *args, **kwargs):
         user = self.request.user
-        
+
         if user.role not in [User.Roles.ADMIN, User.Roles.INTERNAL]:
             raise PermissionDenied("You do not have permission to create internal users.")
-        
+
         input_serializer = CreateInternalSerializer(data=request.data)
         input_serializer.is_valid(raise_exception=True)
 
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:02
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profile', '0004_clientprofile_contact_phone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='clientprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('business_name'), name='gin_trgm_ops'), name='profile_business_name_trgm_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profile', '0005_clientprofile_profile_business_name_trgm_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clientprofile',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='driverprofile',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='internalclientprofile',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:17
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profile', '0006_clientprofile_updated_at_driverprofile_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clientprofile',
+            name='order_number_prefix',
+            field=models.CharField(blank=True, max_length=10, null=True, validators=[django.core.validators.RegexValidator('^[A-Z0-9]+$', 'Use only uppercase letters and digits.')]),
+        ),
+    ]
@@ -1,5 +1,8 @@
 import uuid
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.core.validators import RegexValidator
 from django.db import models
+from django.db.models.functions import Upper
 from django.db.models.base import settings
 
 class ClientProfile(models.Model):
@@ -16,8 +19,23 @@ class ClientProfile(models.Model):
     phone_number = models.CharField(max_length=20, blank=True, null=True)
     contact_phone = models.CharField(max_length=20, blank=True, null=True)
 
+    # Prefijo de los order_number que asigna el servidor (ver orders.numbers)
+    order_number_prefix = models.CharField(
+        max_length=10, blank=True, null=True,
+        validators=[RegexValidator(r'^[A-Z0-9]+$', "Use only uppercase letters and digits.")]
+    )
+
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Búsqueda parcial de pedidos por razón social (Order.objects.search)
+            GinIndex(
+                OpClass(Upper('business_name'), name='gin_trgm_ops'), name='profile_business_name_trgm_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.ruc} - {self.business_name}"
@@ -42,11 +60,33 @@ class InternalClientProfile(models.Model):
     last_name = models.CharField(max_length=150)
 
     is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} - ({self.client.ruc})"
 
 
+class DriverProfileQuerySet(models.QuerySet):
+    def with_workload(self):
+        """
+        Agrega `active_operations` (operativos activos sin finalizar) y
+        `pending_orders` (pedidos activos de esos operativos que no están en el
+        estado final) en la misma consulta.
+        """
+        open_operations = models.Q(operations__is_active=True, operations__is_finalized=False)
+        not_final = ~models.Q(operations__orders__current_status=models.F('operations__final_status'))
+        pending_orders = open_operations & models.Q(operations__orders__is_active=True) & not_final
+        return self.annotate(
+            # Un operativo se repite por cada uno de sus pedidos en el JOIN
+            active_operations=models.Count('operations', filter=open_operations, distinct=True),
+            pending_orders=models.Count('operations__orders', filter=pending_orders),
+        )
+
+    def available(self):
+        """Conductores activos sin operativos abiertos. Requiere with_workload()."""
+        return self.filter(is_active=True, active_operations=0)
+
+
 class DriverProfile(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
@@ -62,6 +102,9 @@ class DriverProfile(models.Model):
     license_number = models.CharField(max_length=50, blank=True, null=True)
 
     is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = DriverProfileQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -0,0 +1,34 @@
+import factory
+from ...users.models import User
+from ...users.test.factories import UserFactory
+
+
+class ClientProfileFactory(factory.django.DjangoModelFactory):
+
+    class Meta:
+        model = 'profile.ClientProfile'
+
+    user = factory.SubFactory(UserFactory, role=User.Roles.CLIENT)
+    business_name = factory.Sequence(lambda n: f'Cliente {n}')
+    ruc = factory.Sequence(lambda n: f'20{n:09d}')
+
+
+class InternalClientProfileFactory(factory.django.DjangoModelFactory):
+
+    class Meta:
+        model = 'profile.InternalClientProfile'
+
+    user = factory.SubFactory(UserFactory, role=User.Roles.INTERNAL_CLIENT)
+    client = factory.SubFactory(ClientProfileFactory)
+    first_name = factory.Faker('first_name')
+    last_name = factory.Faker('last_name')
+
+
+class DriverProfileFactory(factory.django.DjangoModelFactory):
+
+    class Meta:
+        model = 'profile.DriverProfile'
+
+    user = factory.SubFactory(UserFactory, role=User.Roles.DRIVER)
+    first_name = factory.Faker('first_name')
+    last_name = factory.Faker('last_name')
@@ -0,0 +1,88 @@
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+import pytest
+from ...users.models import User
+from ...users.test.factories import UserFactory
+from ...operations.test.factories import OperationFactory, OperationStatusFactory
+from ...orders.test.factories import OrderFactory
+from .factories import DriverProfileFactory
+
+
+@pytest.mark.django_db
+class TestDriverManifestTestCase(APITestCase):
+    """
+    Tests /drivers/me/manifest/ operations.
+    """
+
+    def setUp(self):
+        self.url = reverse('driver-manifest')
+        self.driver = DriverProfileFactory()
+        self.user = self.driver.user
+        self.client.force_authenticate(self.user)
+
+    def test_get_request_returns_active_operations_in_fixed_queries(self):
+        for n in range(3):
+            operation = OperationFactory(name=f'Operativo {n}', driver=self.driver)
+            OperationStatusFactory(operation=operation, name='Recogido', sort_key=1)
+            OperationStatusFactory(operation=operation, name='Entregado', sort_key=2)
+            OrderFactory(operation=operation)
+        OperationFactory(name='Finalizado', driver=self.driver, is_finalized=True)
+        OperationFactory(name='Inactivo', driver=self.driver, is_active=False)
+        OperationFactory(name='Otro conductor')
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert sorted(row['name'] for row in response.data) == ['Operativo 0', 'Operativo 1', 'Operativo 2']
+        assert [s['name'] for s in response.data[0]['statuses']] == ['Recogido', 'Entregado']
+        assert len(response.data[0]['orders']) == 1
+
+    def test_get_request_from_non_driver_is_forbidden(self):
+        internal = UserFactory(role=User.Roles.INTERNAL)
+        self.client.force_authenticate(internal)
+        response = self.client.get(self.url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+class TestDriverWorkloadTestCase(APITestCase):
+    """
+    Tests /drivers/workload/ operations.
+    """
+
+    def setUp(self):
+        self.url = reverse('driver-workload')
+        self.user = UserFactory(role=User.Roles.INTERNAL)
+        self.client.force_authenticate(self.user)
+
+        # El listado se ordena por apellido
+        self.busy = DriverProfileFactory(first_name='busy', last_name='Quispe')
+        self.free = DriverProfileFactory(first_name='free', last_name='Rojas')
+        DriverProfileFactory(first_name='inactive', last_name='Soto', is_active=False)
+        for n in range(2):
+            operation = OperationFactory(name=f'Operativo {n}', driver=self.busy, final_status='Entregado')
+            OrderFactory(operation=operation)
+            OrderFactory(operation=operation, current_status='Recogido')
+            OrderFactory(operation=operation, current_status='Entregado')
+            OrderFactory(operation=operation, is_active=False)
+        OperationFactory(name='Finalizado', driver=self.free, is_finalized=True)
+
+    def test_get_request_returns_workload_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [
+            (row['first_name'], row['active_operations'], row['pending_orders'], row['available'])
+            for row in response.data
+        ] == [('busy', 2, 4, False), ('free', 0, 0, True), ('inactive', 0, 0, False)]
+
+        response = self.client.get(self.url, {'available': 'true'})
+        assert [row['id'] for row in response.data] == [str(self.free.id)]
+
+    def test_get_request_from_driver_is_forbidden(self):
+        self.client.force_authenticate(self.busy.user)
+        response = self.client.get(self.url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,13 @@
+from django.contrib import admin
+from .models import DailyOrderRollup
+
+
+@admin.register(DailyOrderRollup)
+class DailyOrderRollupAdmin(admin.ModelAdmin):
+    list_display = (
+        'day', 'dimension', 'key', 'created_count', 'delivered_count', 'in_flight_count', 'updated_at'
+    )
+    search_fields = ('key',)
+    list_filter = ('dimension', 'day')
+    readonly_fields = ('id', 'updated_at')
+    ordering = ['-day', 'dimension', 'key']
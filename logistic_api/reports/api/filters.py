@@ -0,0 +1,11 @@
+from django_filters import rest_framework as filters
+from ..models import DailyOrderRollup
+
+
+class DailyOrderRollupFilter(filters.FilterSet):
+    # ?day_after=YYYY-MM-DD&day_before=YYYY-MM-DD
+    day = filters.DateFromToRangeFilter()
+
+    class Meta:
+        model = DailyOrderRollup
+        fields = ['dimension', 'key', 'day']
@@ -0,0 +1,19 @@
+from rest_framework import serializers
+from ..models import DailyOrderRollup
+
+
+class DailyOrderRollupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DailyOrderRollup
+        fields = (
+            'day', 'dimension', 'key', 'created_count', 'delivered_count', 'in_flight_count', 'updated_at'
+        )
+        read_only_fields = fields
+
+
+class DailyOrderRollupSummarySerializer(serializers.Serializer):
+    dimension = serializers.CharField()
+    key = serializers.CharField()
+    created_count = serializers.IntegerField()
+    delivered_count = serializers.IntegerField()
+    in_flight_count = serializers.IntegerField()
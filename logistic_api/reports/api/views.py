@@ -0,0 +1,91 @@
+from django.db.models import Sum
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.utils import extend_schema, extend_schema_view
+from rest_framework import mixins, viewsets, status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.exceptions import PermissionDenied
+from ...users.models import User
+from ...profile.models import ClientProfile, DriverProfile, InternalClientProfile
+from ..models import DailyOrderRollup
+from .filters import DailyOrderRollupFilter
+from .serializers import DailyOrderRollupSerializer, DailyOrderRollupSummarySerializer
+
+
+@extend_schema_view(
+    list=extend_schema(tags=['Reports V1']),
+    summary=extend_schema(tags=['Reports V1']),
+)
+class DailyOrderRollupViewSet(
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet
+):
+    """
+    Indicadores diarios de pedidos por cliente, conductor o región, servidos
+    desde la tabla de rollups (sin recorrer orders_order).
+    """
+    queryset = DailyOrderRollup.objects.all()
+    permission_classes = [IsAuthenticated]
+    serializer_class = DailyOrderRollupSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = DailyOrderRollupFilter
+
+    def get_queryset(self):
+        user = self.request.user
+
+        if user.role in [User.Roles.ADMIN, User.Roles.INTERNAL]:
+            return self.queryset.all()
+        elif user.role == User.Roles.CLIENT:
+            try:
+                client_profile = user.client_profile
+            except ClientProfile.DoesNotExist:
+                return self.queryset.none()
+            return self.queryset.filter(
+                dimension=DailyOrderRollup.Dimensions.CLIENT, key=str(client_profile.id)
+            )
+        elif user.role == User.Roles.INTERNAL_CLIENT:
+            try:
+                client_profile = user.internal_client_profile.client
+            except InternalClientProfile.DoesNotExist:
+                return self.queryset.none()
+            return self.queryset.filter(
+                dimension=DailyOrderRollup.Dimensions.CLIENT, key=str(client_profile.id)
+            )
+        elif user.role == User.Roles.DRIVER:
+            try:
+                driver_profile = user.driver_profile
+            except DriverProfile.DoesNotExist:
+                return self.queryset.none()
+            return self.queryset.filter(
+                dimension=DailyOrderRollup.Dimensions.DRIVER, key=str(driver_profile.id)
+            )
+        else:
+            raise PermissionDenied("You do not have permission to access this resource.")
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='summary'
+    )
+    @extend_schema(
+        tags=['Reports V1'],
+        description="Totals per dimension and key over the filtered day range. in_flight_count "
+                    "counts orders created in the range that have not reached their final status.",
+        responses={200: DailyOrderRollupSummarySerializer(many=True)}
+    )
+    def summary(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        totals = queryset.values('dimension', 'key').annotate(
+            created_count=Sum('created_count'),
+            delivered_count=Sum('delivered_count'),
+            in_flight_count=Sum('in_flight_count'),
+        ).order_by('dimension', 'key')
+
+        page = self.paginate_queryset(totals)
+        if page is not None:
+            serializer = DailyOrderRollupSummarySerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = DailyOrderRollupSummarySerializer(totals, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
@@ -0,0 +1,35 @@
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from ...rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily order rollups for a day range from the orders table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start', type=date.fromisoformat, help="First day (YYYY-MM-DD). Defaults to --end."
+        )
+        parser.add_argument(
+            '--end', type=date.fromisoformat, help="Last day (YYYY-MM-DD). Defaults to today."
+        )
+        parser.add_argument('--chunk-days', type=int, default=7, help="Days rebuilt per transaction.")
+
+    def handle(self, *args, **options):
+        end = options['end'] or timezone.localdate()
+        start = options['start'] or end
+        if start > end:
+            raise CommandError("--start must be on or before --end.")
+        if options['chunk_days'] < 1:
+            raise CommandError("--chunk-days must be a positive integer.")
+
+        # Se reconstruye por bloques para no mantener una transacción larga
+        day = start
+        while day <= end:
+            chunk_end = min(day + timedelta(days=options['chunk_days'] - 1), end)
+            rows = rebuild(day, chunk_end)
+            self.stdout.write(f"{day} .. {chunk_end}: {rows} rollup rows")
+            day = chunk_end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt order rollups from {start} to {end}."))
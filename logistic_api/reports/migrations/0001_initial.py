@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:10
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyOrderRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('dimension', models.CharField(choices=[('client', 'Client'), ('driver', 'Driver'), ('region', 'Region')], max_length=20)),
+                ('key', models.CharField(blank=True, max_length=100)),
+                ('created_count', models.IntegerField(default=0)),
+                ('delivered_count', models.IntegerField(default=0)),
+                ('in_flight_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-day', 'dimension', 'key'],
+                'indexes': [models.Index(fields=['dimension', 'key', '-day'], name='reports_dai_dimensi_b0fb83_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'dimension', 'key'), name='reports_rollup_day_dimension_key')],
+            },
+        ),
+    ]
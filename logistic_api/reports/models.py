@@ -0,0 +1,45 @@
+import uuid
+from django.db import models
+
+
+class DailyOrderRollup(models.Model):
+    """
+    Contadores diarios de pedidos por cliente, conductor o región.
+    Se mantienen de forma incremental (ver reports.rollups) y pueden
+    reconstruirse con el comando rebuild_order_rollups.
+    """
+    class Dimensions(models.TextChoices):
+        CLIENT = 'client', 'Client'
+        DRIVER = 'driver', 'Driver'
+        REGION = 'region', 'Region'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    day = models.DateField()
+    dimension = models.CharField(max_length=20, choices=Dimensions.choices)
+    # id del cliente/conductor o nombre de la región ('' si el pedido no tiene región)
+    key = models.CharField(max_length=100, blank=True)
+
+    # Pedidos creados ese día (clientes y regiones)
+    created_count = models.IntegerField(default=0)
+    # Pedidos que llegaron al estado final del operativo ese día
+    delivered_count = models.IntegerField(default=0)
+    # Pedidos creados ese día que aún no llegan al estado final (clientes y regiones)
+    in_flight_count = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-day', 'dimension', 'key']
+        constraints = [
+            # Destino del INSERT ... ON CONFLICT de los incrementos
+            models.UniqueConstraint(
+                fields=['day', 'dimension', 'key'], name='reports_rollup_day_dimension_key'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['dimension', 'key', '-day']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} - {self.dimension}:{self.key}"
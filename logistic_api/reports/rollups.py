@@ -0,0 +1,159 @@
+"""
+Mantenimiento incremental de DailyOrderRollup.
+
+Los incrementos se agrupan en memoria y se aplican con un único
+INSERT ... ON CONFLICT DO UPDATE por llamada, de modo que crear un lote de
+pedidos o cambiar el estado de un operativo completo cuesta una consulta
+agregada y un upsert, sin importar la cantidad de pedidos.
+"""
+import uuid
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from ..orders.models import ArchivedOrder, Order
+from .models import DailyOrderRollup
+
+CLIENT = DailyOrderRollup.Dimensions.CLIENT
+DRIVER = DailyOrderRollup.Dimensions.DRIVER
+REGION = DailyOrderRollup.Dimensions.REGION
+
+# Índices dentro de la lista de contadores [created, delivered, in_flight]
+CREATED, DELIVERED, IN_FLIGHT = range(3)
+
+
+def _new_counters():
+    return defaultdict(lambda: [0, 0, 0])
+
+
+def _add(counters, day, dimension, key, metric, amount):
+    if key is None or not amount:
+        return
+    counters[(day, dimension, str(key))][metric] += amount
+
+
+def apply_increments(counters):
+    """
+    Suma los contadores {(day, dimension, key): [created, delivered, in_flight]}
+    a la tabla de rollups con un único upsert.
+    """
+    rows = [
+        (uuid.uuid4(), day, dimension, key, *values)
+        for (day, dimension, key), values in sorted(counters.items())
+        if any(values)
+    ]
+    if not rows:
+        return
+
+    quote = connection.ops.quote_name
+    table = quote(DailyOrderRollup._meta.db_table)
+    columns = (
+        'id', 'day', 'dimension', 'key', 'created_count', 'delivered_count', 'in_flight_count', 'updated_at'
+    )
+    placeholders = ', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s)'] * len(rows))
+    increments = ', '.join(
+        f"{quote(column)} = {table}.{quote(column)} + EXCLUDED.{quote(column)}"
+        for column in ('created_count', 'delivered_count', 'in_flight_count')
+    )
+    sql = (
+        f"INSERT INTO {table} ({', '.join(quote(column) for column in columns)}) "
+        f"VALUES {placeholders} "
+        f"ON CONFLICT ({quote('day')}, {quote('dimension')}, {quote('key')}) "
+        f"DO UPDATE SET {increments}, {quote('updated_at')} = EXCLUDED.{quote('updated_at')}"
+    )
+    now = timezone.now()
+    params = [value for row in rows for value in (*row, now)]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def record_orders_created(orders):
+    """Registra pedidos recién creados (un upsert para todo el lote)."""
+    counters = _new_counters()
+    for order in orders:
+        day = timezone.localdate(order.created_at)
+        for dimension, key in ((CLIENT, order.client_id), (REGION, order.delivery_region or '')):
+            _add(counters, day, dimension, key, CREATED, 1)
+            _add(counters, day, dimension, key, IN_FLIGHT, 1)
+    apply_increments(counters)
+
+
+def record_deliveries(orders, delta):
+    """
+    Registra pedidos que entran (delta=1) o salen (delta=-1) del estado final.
+    `orders` es un queryset que se evalúa antes del UPDATE del estado, con una
+    sola consulta agregada.
+    Las entregas se cuentan hoy; al revertirse se descuentan del día en que se
+    registraron (finalized_at). Retorna la cantidad de pedidos contados.
+    """
+    days = {'created_day': TruncDate('created_at')}
+    if delta < 0:
+        days['delivered_day'] = TruncDate('finalized_at')
+    groups = orders.annotate(**days).values(
+        'client_id', 'delivery_region', 'operation__driver_id', *days
+    ).annotate(total=Count('id')).order_by()
+
+    today = timezone.localdate()
+    counters = _new_counters()
+    count = 0
+    for group in groups:
+        count += group['total']
+        total = group['total'] * delta
+        day = group.get('delivered_day') or today
+        region = group['delivery_region'] or ''
+        keys = ((CLIENT, group['client_id']), (REGION, region), (DRIVER, group['operation__driver_id']))
+        for dimension, key in keys:
+            _add(counters, day, dimension, key, DELIVERED, total)
+        for dimension, key in ((CLIENT, group['client_id']), (REGION, region)):
+            _add(counters, group['created_day'], dimension, key, IN_FLIGHT, -total)
+    apply_increments(counters)
+    return count
+
+
+def _day_bounds(start, end):
+    """Rango [start 00:00, end+1 00:00) para filtrar por índice sin castear a fecha."""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+    )
+
+
+@transaction.atomic
+def rebuild(start, end):
+    """
+    Recalcula desde orders_order y orders_archivedorder todos los rollups entre start y end (inclusive).
+    Retorna la cantidad de filas escritas.
+    """
+    DailyOrderRollup.objects.filter(day__range=(start, end)).delete()
+    since, until = _day_bounds(start, end)
+    counters = _new_counters()
+
+    # Los pedidos archivados siguen contando para los días que ya pasaron
+    for model in (Order, ArchivedOrder):
+        created = model.objects.filter(
+            created_at__gte=since, created_at__lt=until
+        ).annotate(day=TruncDate('created_at'))
+        for field, dimension in (('client_id', CLIENT), ('delivery_region', REGION)):
+            groups = created.values('day', field).annotate(
+                total=Count('id'),
+                open=Count('id', filter=Q(finalized_at__isnull=True))
+            ).order_by()
+            for group in groups:
+                key = group[field] if dimension != REGION else (group[field] or '')
+                _add(counters, group['day'], dimension, key, CREATED, group['total'])
+                _add(counters, group['day'], dimension, key, IN_FLIGHT, group['open'])
+
+        delivered = model.objects.filter(
+            finalized_at__gte=since, finalized_at__lt=until
+        ).annotate(day=TruncDate('finalized_at'))
+        fields = (('client_id', CLIENT), ('delivery_region', REGION), ('operation__driver_id', DRIVER))
+        for field, dimension in fields:
+            for group in delivered.values('day', field).annotate(total=Count('id')).order_by():
+                key = group[field] if dimension != REGION else (group[field] or '')
+                _add(counters, group['day'], dimension, key, DELIVERED, group['total'])
+
+    apply_increments(counters)
+    return sum(1 for values in counters.values() if any(values))
@@ -0,0 +1,120 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+import pytest
+from ...users.models import User
+from ...users.test.factories import UserFactory
+from ...profile.test.factories import ClientProfileFactory, DriverProfileFactory
+from ...operations.test.factories import OperationFactory, OperationStatusFactory
+from ..models import DailyOrderRollup
+
+
+@pytest.mark.django_db
+class TestDailyOrderRollupTestCase(APITestCase):
+    """
+    Tests incremental maintenance and /reports/daily-orders operations.
+    """
+
+    def setUp(self):
+        self.client_profile = ClientProfileFactory(business_name='ACME')
+        self.client_user = self.client_profile.user
+        self.driver = DriverProfileFactory()
+        self.internal = UserFactory(role=User.Roles.INTERNAL)
+
+    def create_orders(self, count):
+        self.client.force_authenticate(self.client_user)
+        rows = [
+            {
+                'order_number': f'ORD-{n}',
+                'client_id': str(self.client_profile.id),
+                'delivery_address': 'x',
+                'delivery_region': 'Lima',
+            }
+            for n in range(count)
+        ]
+        response = self.client.post(reverse('order-bulk'), rows, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        return [row['id'] for row in response.data['created']]
+
+    def rollup(self, dimension, key):
+        row = DailyOrderRollup.objects.get(day=timezone.localdate(), dimension=dimension, key=str(key))
+        return row.created_count, row.delivered_count, row.in_flight_count
+
+    def snapshot(self):
+        return sorted(
+            DailyOrderRollup.objects.values_list(
+                'day', 'dimension', 'key', 'created_count', 'delivered_count', 'in_flight_count'
+            )
+        )
+
+    def test_rollups_follow_creation_and_delivery(self):
+        order_ids = self.create_orders(4)
+        assert self.rollup('client', self.client_profile.id) == (4, 0, 4)
+        assert self.rollup('region', 'Lima') == (4, 0, 4)
+
+        operation = OperationFactory(name='Lima Norte', driver=self.driver)
+        OperationStatusFactory(operation=operation, name='En ruta', sort_key=1)
+        OperationStatusFactory(operation=operation, name='Entregado', sort_key=2)
+        operation.refresh_final_status()
+        self.client.force_authenticate(self.internal)
+        self.client.put(
+            reverse('operation-detail', kwargs={'pk': operation.pk}), {'order_ids': order_ids}, format='json'
+        )
+
+        operation.advance_orders()
+        operation.advance_orders(order_ids=order_ids[:3])
+        assert self.rollup('client', self.client_profile.id) == (4, 3, 1)
+        assert self.rollup('driver', self.driver.id) == (0, 3, 0)
+
+        operation.set_orders_status('En ruta', order_ids=order_ids[:1])
+        assert self.rollup('client', self.client_profile.id) == (4, 2, 2)
+
+        incremental = self.snapshot()
+        call_command('rebuild_order_rollups', stdout=StringIO())
+        assert self.snapshot() == incremental
+
+    def test_rollups_follow_final_status_changes(self):
+        order_ids = self.create_orders(3)
+        operation = OperationFactory(name='Lima Norte', driver=self.driver)
+        en_ruta = OperationStatusFactory(operation=operation, name='En ruta', sort_key=1)
+        entregado = OperationStatusFactory(operation=operation, name='Entregado', sort_key=2)
+        operation.refresh_final_status()
+        operation.assign_orders(order_ids)
+        operation.set_orders_status('Entregado', order_ids=order_ids[:2])
+        operation.set_orders_status('En ruta', order_ids=order_ids[2:])
+        assert self.rollup('client', self.client_profile.id) == (3, 2, 1)
+
+        # Un estado nuevo al final: los pedidos en 'Entregado' dejan de estar finalizados
+        OperationStatusFactory(operation=operation, name='Firmado', sort_key=3)
+        operation.refresh_final_status()
+        assert self.rollup('client', self.client_profile.id) == (3, 0, 3)
+        assert not operation.orders.filter(finalized_at__isnull=False).exists()
+
+        # Reordenar deja 'En ruta' como estado final
+        operation.reorder_statuses([entregado.id, operation.statuses.get(name='Firmado').id, en_ruta.id])
+        assert self.rollup('client', self.client_profile.id) == (3, 1, 2)
+        assert str(operation.orders.get(finalized_at__isnull=False).id) == order_ids[2]
+
+        incremental = self.snapshot()
+        call_command('rebuild_order_rollups', stdout=StringIO())
+        assert self.snapshot() == incremental
+
+    def test_get_summary_is_scoped_to_the_client(self):
+        self.create_orders(2)
+        DailyOrderRollup.objects.create(
+            day=timezone.localdate() - timedelta(days=1), dimension='client', key='other', created_count=5
+        )
+
+        response = self.client.get(reverse('daily-order-rollup-summary'))
+        assert response.status_code == status.HTTP_200_OK
+        assert [(row['key'], row['created_count']) for row in response.data['results']] == [
+            (str(self.client_profile.id), 2)
+        ]
+
+        self.client.force_authenticate(self.internal)
+        response = self.client.get(reverse('daily-order-rollup-list'), {'dimension': 'client'})
+        assert response.data['count'] == 2
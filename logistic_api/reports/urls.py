@@ -0,0 +1,7 @@
+from rest_framework.routers import DefaultRouter
+from .api.views import DailyOrderRollupViewSet
+
+router = DefaultRouter()
+router.register('reports/daily-orders', DailyOrderRollupViewSet, basename='daily-order-rollup')
+
+urlpatterns = router.urls
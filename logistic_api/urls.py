@@ -28,6 +28,8 @@ urlpatterns = [
     path('api/v1/', include('logistic_api.profile.urls')),
     path('api/v1/', include('logistic_api.operations.urls')),
     path('api/v1/', include('logistic_api.orders.urls')),
+    path('api/v1/', include('logistic_api.reports.urls')),
+    path('api/v1/', include('logistic_api.audit.urls')),
 
     # JWT
     path('api/v1/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
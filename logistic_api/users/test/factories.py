@@ -5,12 +5,11 @@ class UserFactory(factory.django.DjangoModelFactory):
 
     class Meta:
         model = 'users.User'
-        django_get_or_create = ('username',)
+        django_get_or_create = ('email',)
 
-    id = factory.Faker('uuid4')
-    username = factory.Sequence(lambda n: f'testuser{n}')
+    id = factory.Faker('uuid4', cast_to=None)
+    email = factory.Sequence(lambda n: f'testuser{n}@example.com')
     password = factory.Faker('password', length=10, special_chars=True, digits=True,
                              upper_case=True, lower_case=True)
-    email = factory.Faker('email')
     is_active = True
     is_staff = False